@@ -49,7 +49,8 @@ data "aws_iam_policy_document" "lambda_approval_request" {
   statement {
     effect = "Allow"
     actions = [
-      "ssm:GetParameter"
+      "ssm:GetParameter",
+      "ssm:GetParameters"
     ]
     resources = [aws_ssm_parameter.email_approval_secret.arn]
   }
@@ -91,6 +92,7 @@ module "lambda_approval_request" {
     SENDER_EMAIL_ADDRESS          = var.approval_request_sender_email
     SES_TEMPLATE                  = aws_ses_template.approval.name
     EMAIL_APPROVAL_SECRET_SSM_KEY = aws_ssm_parameter.email_approval_secret.name
+    SSM_CACHE_TTL                 = tostring(var.lambda_ssm_cache_ttl)
   }
   allowed_triggers = {
     SNSInvokeAccess = {
@@ -134,7 +136,8 @@ data "aws_iam_policy_document" "approval_response" {
   statement {
     effect = "Allow"
     actions = [
-      "ssm:GetParameter"
+      "ssm:GetParameter",
+      "ssm:GetParameters"
     ]
     resources = [aws_ssm_parameter.email_approval_secret.arn]
   }
@@ -213,6 +216,7 @@ module "lambda_approval_response" {
     AURORA_CLUSTER_ARN            = aws_rds_cluster.metadb.arn
     AURORA_SECRET_ARN             = aws_secretsmanager_secret_version.ci_metadb_user.arn
     EMAIL_APPROVAL_SECRET_SSM_KEY = aws_ssm_parameter.email_approval_secret.name
+    SSM_CACHE_TTL                 = tostring(var.lambda_ssm_cache_ttl)
   }
 
   authorization_type         = "NONE"
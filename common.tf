@@ -33,7 +33,7 @@ data "aws_iam_policy_document" "merge_lock_ssm_param_full_access" {
   statement {
     sid       = "SSMParamMergeLockAccess"
     effect    = "Allow"
-    actions   = ["ssm:GetParameter", "ssm:PutParameter"]
+    actions   = ["ssm:GetParameter", "ssm:GetParameters", "ssm:PutParameter"]
     resources = [aws_ssm_parameter.merge_lock.arn]
   }
 }
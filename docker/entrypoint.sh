@@ -2,16 +2,42 @@
 
 set -e
 
+now_ms() {
+    date +%s%3N
+}
+
+startup_start=$(now_ms)
+startup_report=()
+
+# pre-installed versions are linked within this directory which takes
+# precedence over the tfenv and tgswitch binaries
+export TERRA_BIN_PATH="${TERRA_BIN_PATH:-/usr/local/terra-bin}"
+export PATH="$TERRA_BIN_PATH:$PATH"
+
 if [ -n "${TERRAFORM_VERSION}" ]; then
-    echo "Installing Terraform version via tfenv: ${TERRAFORM_VERSION}"
-    tfenv install "${TERRAFORM_VERSION}"
-    tfenv use "${TERRAFORM_VERSION}"
+    step_start=$(now_ms)
+    if python -m common.versions use terraform "${TERRAFORM_VERSION}" "$TERRA_BIN_PATH"; then
+        install_source="pre-installed"
+    else
+        echo "Installing Terraform version via tfenv: ${TERRAFORM_VERSION}"
+        tfenv install "${TERRAFORM_VERSION}"
+        tfenv use "${TERRAFORM_VERSION}"
+        install_source="tfenv"
+    fi
+    startup_report+=("Terraform ${TERRAFORM_VERSION} (${install_source}): $(($(now_ms) - step_start))ms")
 fi
 terraform --version
 
 if [ -n "${TERRAGRUNT_VERSION}" ]; then
-    echo "Installing Terragrunt version via tgswitch: ${TERRAGRUNT_VERSION}"
-    tgswitch "${TERRAGRUNT_VERSION}"
+    step_start=$(now_ms)
+    if python -m common.versions use terragrunt "${TERRAGRUNT_VERSION}" "$TERRA_BIN_PATH"; then
+        install_source="pre-installed"
+    else
+        echo "Installing Terragrunt version via tgswitch: ${TERRAGRUNT_VERSION}"
+        tgswitch "${TERRAGRUNT_VERSION}"
+        install_source="tgswitch"
+    fi
+    startup_report+=("Terragrunt ${TERRAGRUNT_VERSION} (${install_source}): $(($(now_ms) - step_start))ms")
 fi
 terragrunt --version
 
@@ -22,11 +48,53 @@ if [ -z "${SOURCE_VERSION}" ]; then
 fi
 echo "Branch: ${SOURCE_VERSION}"
 
-git clone -b "$SOURCE_VERSION" --single-branch "$SOURCE_CLONE_URL" "$SOURCE_REPO_PATH"
+full_clone() {
+    if [ -n "${SOURCE_MIRROR_PATH}" ]; then
+        echo "Cloning with shared mirror: ${SOURCE_MIRROR_PATH}"
+        if python -m common.mirror "$SOURCE_CLONE_URL" "$SOURCE_VERSION" "$SOURCE_REPO_PATH" "$SOURCE_MIRROR_PATH"; then
+            return
+        fi
+        echo "Mirror clone failed -- falling back to clone without mirror"
+        rm -rf "$SOURCE_REPO_PATH"
+    fi
+    git clone -b "$SOURCE_VERSION" --single-branch "$SOURCE_CLONE_URL" "$SOURCE_REPO_PATH"
+}
+
+step_start=$(now_ms)
+# sparse clones are skipped if a mirror is available given the mirror clone
+# only downloads new objects
+if [ "${SOURCE_CLONE_MODE}" == "sparse" ] && [ -n "${CFG_PATH}" ] && [ -z "${SOURCE_MIRROR_PATH}" ]; then
+    echo "Sparse cloning directory: ${CFG_PATH}"
+    if ! python -m common.checkout "$SOURCE_CLONE_URL" "$SOURCE_VERSION" "$SOURCE_REPO_PATH" "$CFG_PATH"; then
+        echo "Sparse checkout directories could not be determined -- falling back to full clone"
+        rm -rf "$SOURCE_REPO_PATH"
+        full_clone
+    fi
+else
+    full_clone
+fi
+startup_report+=("Source clone: $(($(now_ms) - step_start))ms")
 cd "$SOURCE_REPO_PATH"
 
 echo "Current working directory: $PWD"
 
+step_start=$(now_ms)
+# Terraform installs the providers within the image's and shared mirror from
+# the local filesystem and only downloads the providers that aren't mirrored
+provider_cli_config="$HOME/.terraform.d/provider-mirror.tfrc"
+if python -m common.provider_mirror configure "$SOURCE_REPO_PATH" "$provider_cli_config"; then
+    export TF_CLI_CONFIG_FILE="$provider_cli_config"
+    startup_report+=("Provider mirror: $(($(now_ms) - step_start))ms")
+else
+    echo "Provider mirror is not configured -- providers will be downloaded"
+fi
+
+echo "Startup time report:"
+for line in "${startup_report[@]}"; do
+    echo "  ${line}"
+done
+echo "  Total: $(($(now_ms) - startup_start))ms"
+
 # TODO: Design guardrails around what commands can be runned from the ecs task
 # Either restrict commands only from this docker image's /src (user won't be able to customize task execution with before/after scripts)
 # or create a check to ensure that the command is only running a script from the $SOURCE_CLONE_URL
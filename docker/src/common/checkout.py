@@ -0,0 +1,300 @@
+import os
+import re
+import sys
+import logging
+from typing import List, Set, Iterator, Tuple
+
+from .utils import subprocess_run
+from .graph import (
+    Block,
+    CONFIG_FILENAME,
+    UnresolvableConfigException,
+    read_config,
+    get_include_paths,
+    literal,
+    literal_list,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+# functions that read files within Terragrunt configurations
+READ_FUNCTIONS = [
+    "read_terragrunt_config",
+    "file",
+    "templatefile",
+    "sops_decrypt_file",
+]
+# maximum sparse checkout updates before the include set is considered unresolvable
+MAX_ROUNDS = 20
+
+
+def is_within(path: str, parent: str) -> bool:
+    """Returns True if the relative path is the parent directory or within it"""
+    return parent == "" or path == parent or path.startswith(parent + "/")
+
+
+def get_exprs(block: Block) -> Iterator[List[Tuple[str, str]]]:
+    """Yields every attribute expression within the block and its nested blocks"""
+    yield from block.attributes.values()
+    for nested in block.blocks:
+        yield from get_exprs(nested)
+
+
+def get_local_source_dir(source: str, cfg_dir: str) -> str:
+    """
+    Returns the absolute path of the directory Terraform copies for the local
+    module source or None if the source isn't a local path
+
+    Arguments:
+        source: Terraform module source (e.g. ../modules//vpc)
+        cfg_dir: Directory the source is relative to
+    """
+    if not source.startswith(("./", "../")):
+        return None
+    # the directory before the double slash is copied in its entirety
+    return os.path.normpath(os.path.join(cfg_dir, source.split("//")[0]))
+
+
+def get_module_dirs(module_dir: str, recursive: bool = True) -> Set[str]:
+    """
+    Returns the absolute paths of the local module directories that the
+    Terraform files within the directory call
+
+    Arguments:
+        module_dir: Absolute path to a directory that contains Terraform files
+        recursive: Includes the Terraform files within subdirectories
+    """
+    dirs = set()
+    for root, subdirs, files in os.walk(module_dir):
+        subdirs[:] = [d for d in subdirs if recursive and not d.startswith(".")]
+        for name in files:
+            if name.endswith(".tf.json"):
+                raise UnresolvableConfigException(
+                    f"JSON Terraform files are not supported: {root}/{name}"
+                )
+            if not name.endswith(".tf"):
+                continue
+            for module in read_config(os.path.join(root, name)).get_blocks("module"):
+                source = literal(
+                    module.attributes.get("source", []),
+                    f"module.{'.'.join(module.labels)}.source",
+                )
+                source_dir = get_local_source_dir(source, root)
+                if source_dir:
+                    dirs.add(source_dir)
+
+    return dirs
+
+
+def get_config_dirs(cfg_dir: str) -> Set[str]:
+    """
+    Returns the absolute paths of the directories that Terragrunt reads when
+    running within the configuration directory excluding the configuration's
+    parent directories. This includes the directories of included
+    configurations, read files, local Terraform sources and dependencies.
+    Raises UnresolvableConfigException if any of the paths can only be
+    resolved by evaluating the configuration.
+
+    Arguments:
+        cfg_dir: Absolute path to a directory that contains a terragrunt.hcl file
+    """
+    cfg = read_config(os.path.join(cfg_dir, CONFIG_FILENAME))
+    include_paths = get_include_paths(cfg_dir, cfg)
+
+    dirs = set(os.path.dirname(path) for path in include_paths)
+    configs = [cfg]
+    for path in include_paths:
+        # included configurations outside of the checkout are read once the
+        # next sparse checkout update adds their directory
+        if os.path.isfile(path):
+            configs.append(read_config(path))
+
+    for config in configs:
+        for expr in get_exprs(config):
+            expr = [token for token in expr if token[0] != "newline"]
+            for i, token in enumerate(expr[:-2]):
+                if token[0] != "ident" or token[1] not in READ_FUNCTIONS:
+                    continue
+                if expr[i + 1] != ("punct", "("):
+                    continue
+                arg = expr[i + 2]
+                if arg[0] == "string":
+                    dirs.add(os.path.dirname(os.path.join(cfg_dir, arg[1])))
+                # files within parent folders are always checked out
+                elif arg != ("ident", "find_in_parent_folders"):
+                    raise UnresolvableConfigException(
+                        f"{token[1]}() path within {cfg_dir} can't be resolved"
+                    )
+
+        for block in config.get_blocks("terraform"):
+            if "source" not in block.attributes:
+                continue
+            source_dir = get_local_source_dir(
+                literal(block.attributes["source"], "terraform.source"), cfg_dir
+            )
+            if source_dir:
+                dirs.add(source_dir)
+
+        for dependency in config.get_blocks("dependency"):
+            dirs.add(
+                os.path.join(
+                    cfg_dir,
+                    literal(
+                        dependency.attributes.get("config_path", []),
+                        f"dependency.{'.'.join(dependency.labels)}.config_path",
+                    ),
+                )
+            )
+        for dependencies in config.get_blocks("dependencies"):
+            paths = literal_list(dependencies.attributes.get("paths", []), "paths")
+            dirs.update(os.path.join(cfg_dir, path) for path in paths)
+
+    # nested directories are separate Terragrunt configurations or modules
+    # that are only used if they're called by the configuration's files
+    dirs.update(get_module_dirs(cfg_dir, recursive=False))
+
+    return set(os.path.normpath(dir) for dir in dirs)
+
+
+def get_sparse_patterns(dirs: List[str]) -> List[str]:
+    """
+    Returns the sparse checkout patterns that include every file within the
+    directories and the files directly within their parent directories. This
+    matches the patterns that `git sparse-checkout set --cone` generates.
+
+    Arguments:
+        dirs: Directories relative to the repository root
+    """
+    # removes directories that are already within other directories
+    dirs = [
+        dir
+        for dir in dirs
+        if not any(other != dir and is_within(dir, other) for other in dirs)
+    ]
+    parents = set()
+    for dir in dirs:
+        parts = dir.split("/")
+        for i in range(1, len(parts)):
+            parents.add("/".join(parts[:i]))
+
+    def escape(path):
+        return re.sub(r"([\\*?\[])", r"\\\1", path)
+
+    patterns = ["/*", "!/*/"]
+    for path in sorted(parents.union(dirs)):
+        patterns.append(f"/{escape(path)}/")
+        if path not in dirs:
+            patterns.append(f"!/{escape(path)}/*/")
+
+    return patterns
+
+
+def sparse_checkout(repo_path: str, dirs: List[str]) -> None:
+    """
+    Updates the repository's working tree to only contain the sparse checkout
+    patterns of the directories
+
+    Arguments:
+        repo_path: Path to the git repository
+        dirs: Directories relative to the repository root
+    """
+    patterns = get_sparse_patterns(dirs)
+    log.debug(f"Sparse checkout patterns:\n{patterns}")
+    with open(os.path.join(repo_path, ".git", "info", "sparse-checkout"), "w") as f:
+        f.write("\n".join(patterns) + "\n")
+    # read-tree is used instead of `git sparse-checkout` to support git
+    # versions older than 2.25
+    subprocess_run(f"git -C {repo_path} read-tree -mu HEAD")
+
+
+def get_sparse_dirs(repo_path: str, cfg_path: str) -> List[str]:
+    """
+    Sparse checks out the Terragrunt directory and the directories it depends
+    on and returns the checked out directories. Each checkout update can reveal
+    new includes or dependencies so the checkout is updated until no new
+    directories are found.
+
+    Arguments:
+        repo_path: Path to the git repository with sparse checkout enabled
+        cfg_path: Terragrunt directory relative to the repository root
+    """
+    repo_path = os.path.abspath(repo_path)
+    dirs = {os.path.normpath(cfg_path)}
+    for _ in range(MAX_ROUNDS):
+        sparse_checkout(repo_path, list(dirs))
+
+        found = set()
+        for dir in dirs:
+            abs_dir = os.path.join(repo_path, dir)
+            if os.path.isfile(os.path.join(abs_dir, CONFIG_FILENAME)):
+                found.update(get_config_dirs(abs_dir))
+            elif os.path.isdir(abs_dir):
+                found.update(get_module_dirs(abs_dir))
+
+        new_dirs = set()
+        for abs_dir in found:
+            dir = os.path.relpath(abs_dir, repo_path)
+            if dir == ".." or dir.startswith("../"):
+                raise UnresolvableConfigException(
+                    f"Directory is outside of the repository: {abs_dir}"
+                )
+            dir = "" if dir == "." else dir
+            # skips directories that are already checked out and parent
+            # directories whose files directly within them are checked out
+            if not any(
+                is_within(dir, other) or is_within(other, dir) for other in dirs
+            ):
+                new_dirs.add(dir)
+
+        if len(new_dirs) == 0:
+            return sorted(dirs)
+
+        log.debug(f"New sparse checkout directories:\n{sorted(new_dirs)}")
+        dirs.update(new_dirs)
+
+    raise UnresolvableConfigException(
+        f"Sparse checkout directories were not resolved within {MAX_ROUNDS} updates"
+    )
+
+
+def sparse_clone(clone_url: str, branch: str, repo_path: str, cfg_path: str) -> None:
+    """
+    Clones only the latest commit of the branch without file contents (blobless)
+    and sparse checks out the Terragrunt directory and the directories it
+    depends on. File contents are downloaded only for the checked out files.
+
+    Arguments:
+        clone_url: Repository clone URL
+        branch: Branch to clone
+        repo_path: Path to clone the repository to
+        cfg_path: Terragrunt directory relative to the repository root
+    """
+    subprocess_run(f"git init -q {repo_path}")
+    for cmd in [
+        f"remote add origin {clone_url}",
+        "config remote.origin.promisor true",
+        "config remote.origin.partialclonefilter blob:none",
+        "config core.sparseCheckout true",
+        f"fetch --depth 1 --filter=blob:none origin {branch}",
+    ]:
+        subprocess_run(f"git -C {repo_path} {cmd}")
+
+    # only checks out the files directly within the repository root until the
+    # sparse directories are resolved
+    with open(os.path.join(repo_path, ".git", "info", "sparse-checkout"), "w") as f:
+        f.write("/*\n!/*/\n")
+    subprocess_run(f"git -C {repo_path} checkout -q -b {branch} FETCH_HEAD")
+
+    dirs = get_sparse_dirs(repo_path, cfg_path)
+    log.info(f"Sparse checkout directories:\n{dirs}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    try:
+        sparse_clone(*sys.argv[1:5])
+    except Exception as e:
+        # entrypoint falls back to a full clone
+        log.error(e)
+        sys.exit(1)
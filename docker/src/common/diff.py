@@ -0,0 +1,84 @@
+import os
+import logging
+import subprocess
+from functools import lru_cache
+
+from .utils import subprocess_run
+from .github_client import get_client
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+# maps `git diff --name-status` status letters to the GitHub API file statuses
+GIT_STATUSES = {
+    "A": "added",
+    "M": "modified",
+    "D": "removed",
+    "T": "modified",
+}
+
+
+def get_git_diff_files(repo_path: str, base: str, head: str) -> dict:
+    """
+    Returns a mapping of every file that differs between the base and head
+    commit and its GitHub API file status (e.g. added, modified, removed)
+    using the local git repository
+
+    Arguments:
+        repo_path: Path to the local git repository
+        base: Base commit ID
+        head: Head commit ID
+    """
+    # three-dot diff matches the GitHub compare API's merge base diff and
+    # renames are reported as a removed and an added file so that both the
+    # old and new directory are collected
+    run = subprocess_run(
+        f"git -C {repo_path} diff --name-status --no-renames -z {base}...{head}"
+    )
+
+    # -z output is NUL-delimited status and path pairs which prevents git from
+    # quoting paths that contain special characters
+    entries = run.stdout.split("\0")
+    diff_files = {}
+    for status, filename in zip(entries[::2], entries[1::2]):
+        diff_files[filename] = GIT_STATUSES.get(status[0], "changed")
+
+    return diff_files
+
+
+def get_github_diff_files(repo_full_name: str, base: str, head: str) -> dict:
+    """
+    Returns a mapping of every file that differs between the base and head
+    commit and its file status using the GitHub compare API
+
+    Arguments:
+        repo_full_name: Full name of GitHub repo (e.g. user/repo-name)
+        base: Base commit ID
+        head: Head commit ID
+    """
+    repo = get_client(os.environ["GITHUB_TOKEN"]).get_repo(repo_full_name)
+
+    return {diff.filename: diff.status for diff in repo.compare(base, head).files}
+
+
+# the differences between two commits never change so the differences are only
+# collected once for every account's scan
+@lru_cache(maxsize=None)
+def get_diff_files(base: str, head: str) -> dict:
+    """
+    Returns a mapping of every file that differs between the base and head
+    commit and its file status. The local clone within SOURCE_REPO_PATH is used
+    unless DIFF_PROVIDER is set to `github` or the local clone doesn't contain
+    the commits (e.g. shallow clones) in which case the GitHub compare API is used.
+
+    Arguments:
+        base: Base commit ID
+        head: Head commit ID
+    """
+    if os.environ.get("DIFF_PROVIDER", "git") == "git":
+        try:
+            return get_git_diff_files(os.environ["SOURCE_REPO_PATH"], base, head)
+        except subprocess.CalledProcessError as e:
+            log.info(f"Falling back to GitHub compare API: {e}")
+
+    return get_github_diff_files(os.environ["REPO_FULL_NAME"], base, head)
@@ -0,0 +1,612 @@
+import os
+import logging
+import hashlib
+import json
+import tempfile
+from typing import List, Tuple, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+CONFIG_FILENAME = "terragrunt.hcl"
+# directories that are never searched for Terragrunt configurations
+IGNORED_DIRS = [".terragrunt-cache", ".terraform", ".git"]
+# functions whose first argument is the path of a file read by the configuration
+READ_FUNCTIONS = [
+    "file",
+    "filebase64",
+    "fileexists",
+    "templatefile",
+    "read_terragrunt_config",
+    "read_tfvars_file",
+    "sops_decrypt_file",
+]
+
+
+class UnresolvableConfigException(Exception):
+    """Raised when a Terragrunt configuration can't be resolved without Terragrunt"""
+
+    pass
+
+
+class Block:
+    """Parsed HCL block containing its top-level attributes and nested blocks"""
+
+    def __init__(self, type: str = None, labels: List[str] = None):
+        self.type = type
+        self.labels = labels or []
+        # attribute names mapped to their expression's tokens
+        self.attributes = {}
+        self.blocks = []
+
+    def get_blocks(self, type: str) -> List["Block"]:
+        return [block for block in self.blocks if block.type == type]
+
+
+def tokenize(content: str) -> List[Tuple[str, str]]:
+    """
+    Returns list of (kind, value) tokens for the HCL content. Comments are
+    dropped and string tokens with template sequences are marked as `template`
+    since their values can't be resolved without evaluating them.
+
+    Arguments:
+        content: HCL file content
+    """
+    tokens = []
+    i = 0
+    length = len(content)
+    while i < length:
+        char = content[i]
+        if char == "\n":
+            tokens.append(("newline", char))
+            i += 1
+        elif char in " \t\r":
+            i += 1
+        elif char == "#" or content.startswith("//", i):
+            end = content.find("\n", i)
+            i = length if end == -1 else end
+        elif content.startswith("/*", i):
+            end = content.find("*/", i + 2)
+            if end == -1:
+                raise UnresolvableConfigException("Unterminated block comment")
+            i = end + 2
+        elif char == '"':
+            j = i + 1
+            while j < length and content[j] != '"':
+                if content[j] == "\n":
+                    raise UnresolvableConfigException("Unterminated string")
+                j += 2 if content[j] == "\\" else 1
+            if j >= length:
+                raise UnresolvableConfigException("Unterminated string")
+            j += 1
+            raw = content[i:j]
+            if "${" in raw or "%{" in raw:
+                tokens.append(("template", raw))
+            else:
+                try:
+                    tokens.append(("string", json.loads(raw)))
+                except ValueError:
+                    tokens.append(("template", raw))
+            i = j
+        elif content.startswith("<<", i):
+            # heredocs are always treated as templates
+            line_end = content.find("\n", i)
+            if line_end == -1:
+                raise UnresolvableConfigException("Unterminated heredoc")
+            start = i + 2
+            marker = content[start:line_end].lstrip("-").strip()
+            end = line_end
+            while True:
+                next_end = content.find("\n", end + 1)
+                start = end + 1
+                line = content[start:] if next_end == -1 else content[start:next_end]
+                if line.strip() == marker:
+                    break
+                if next_end == -1:
+                    raise UnresolvableConfigException("Unterminated heredoc")
+                end = next_end
+            tokens.append(("template", content[i:next_end]))
+            i = length if next_end == -1 else next_end
+        elif char.isalpha() or char == "_":
+            j = i
+            while j < length and (content[j].isalnum() or content[j] in "_-"):
+                j += 1
+            tokens.append(("ident", content[i:j]))
+            i = j
+        else:
+            tokens.append(("punct", char))
+            i += 1
+
+    return tokens
+
+
+def parse_body(tokens: List[Tuple[str, str]], pos: int, block: Block) -> int:
+    """
+    Parses the block body tokens into the block's attributes and nested blocks
+    and returns the token position after the body
+
+    Arguments:
+        tokens: Tokens returned from tokenize()
+        pos: Token position of the body's first token
+        block: Block to add the parsed attributes and nested blocks to
+    """
+    while pos < len(tokens):
+        kind, value = tokens[pos]
+        if kind == "newline":
+            pos += 1
+        elif (kind, value) == ("punct", "}") and block.type is not None:
+            return pos + 1
+        elif kind == "ident":
+            name = value
+            pos += 1
+            if pos < len(tokens) and tokens[pos] == ("punct", "="):
+                pos += 1
+                expr = []
+                depth = 0
+                while pos < len(tokens):
+                    kind, value = tokens[pos]
+                    if kind == "punct" and value in "{[(":
+                        depth += 1
+                    elif kind == "punct" and value in "}])":
+                        if depth == 0:
+                            break
+                        depth -= 1
+                    elif kind == "newline" and depth == 0:
+                        break
+                    expr.append((kind, value))
+                    pos += 1
+                block.attributes[name] = expr
+            else:
+                labels = []
+                while pos < len(tokens) and tokens[pos][0] in ["string", "ident"]:
+                    labels.append(tokens[pos][1])
+                    pos += 1
+                if pos >= len(tokens) or tokens[pos] != ("punct", "{"):
+                    raise UnresolvableConfigException(
+                        f"Unexpected token after block: {name}"
+                    )
+                nested = Block(name, labels)
+                pos = parse_body(tokens, pos + 1, nested)
+                block.blocks.append(nested)
+        else:
+            raise UnresolvableConfigException(f"Unexpected token: {value}")
+
+    if block.type is not None:
+        raise UnresolvableConfigException(f"Unterminated block: {block.type}")
+    return pos
+
+
+_parse_cache = {}
+
+
+def parse(content: str) -> Block:
+    """
+    Returns the parsed HCL content. Results are cached by the hash of the
+    content so unchanged files are only parsed once.
+
+    Arguments:
+        content: HCL file content
+    """
+    key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    if key not in _parse_cache:
+        try:
+            root = Block()
+            parse_body(tokenize(content), 0, root)
+            _parse_cache[key] = root
+        except UnresolvableConfigException as e:
+            _parse_cache[key] = e
+
+    result = _parse_cache[key]
+    if isinstance(result, UnresolvableConfigException):
+        raise result
+    return result
+
+
+def literal(expr: List[Tuple[str, str]], name: str) -> str:
+    """Returns the string value of the expression if it's a string literal"""
+    if len(expr) == 1 and expr[0][0] == "string":
+        return expr[0][1]
+    raise UnresolvableConfigException(f"{name} is not a string literal")
+
+
+def literal_list(expr: List[Tuple[str, str]], name: str) -> List[str]:
+    """Returns the string values of the expression if it's a list of string literals"""
+    expr = [token for token in expr if token[0] != "newline"]
+    if (
+        len(expr) < 2
+        or expr[0] != ("punct", "[")
+        or expr[-1] != ("punct", "]")
+        or any(kind not in ["string", "punct"] for kind, _ in expr)
+    ):
+        raise UnresolvableConfigException(f"{name} is not a list of string literals")
+
+    values = []
+    for kind, value in expr[1:-1]:
+        if kind == "string":
+            values.append(value)
+        elif value != ",":
+            raise UnresolvableConfigException(
+                f"{name} is not a list of string literals"
+            )
+    return values
+
+
+def read_config(path: str) -> Block:
+    with open(path, "r") as f:
+        return parse(f.read())
+
+
+def find_in_parent_folders(cfg_dir: str, filename: str) -> str:
+    """Returns the path of the closest file with the name within the parent folders"""
+    parent = os.path.dirname(cfg_dir)
+    while True:
+        if os.path.isfile(os.path.join(parent, filename)):
+            return os.path.join(parent, filename)
+        if os.path.dirname(parent) == parent:
+            raise UnresolvableConfigException(
+                f"Could not find {filename} in parent folders of {cfg_dir}"
+            )
+        parent = os.path.dirname(parent)
+
+
+def get_include_paths(cfg_dir: str, cfg: Block) -> List[str]:
+    """
+    Returns the file paths of the configuration's include blocks. Only string
+    literals and find_in_parent_folders() calls with no argument or a string
+    literal argument are resolved.
+
+    Arguments:
+        cfg_dir: Directory of the configuration
+        cfg: Parsed configuration
+    """
+    paths = []
+    for include in cfg.get_blocks("include"):
+        expr = [
+            token
+            for token in include.attributes.get("path", [])
+            if token[0] != "newline"
+        ]
+        if len(expr) == 1 and expr[0][0] == "string":
+            paths.append(os.path.normpath(os.path.join(cfg_dir, expr[0][1])))
+            continue
+
+        if (
+            len(expr) in [3, 4]
+            and expr[0] == ("ident", "find_in_parent_folders")
+            and expr[1] == ("punct", "(")
+            and expr[-1] == ("punct", ")")
+        ):
+            filename = CONFIG_FILENAME
+            if len(expr) == 4:
+                filename = literal(expr[2:3], "find_in_parent_folders() argument")
+            paths.append(find_in_parent_folders(cfg_dir, filename))
+            continue
+
+        raise UnresolvableConfigException(
+            f"include path within {cfg_dir} can't be resolved"
+        )
+
+    return paths
+
+
+def get_read_args(content: str) -> List[Tuple[str, List[Tuple[str, str]]]]:
+    """
+    Returns the name and first argument tokens of every call within the HCL
+    content to a function that reads other files
+
+    Arguments:
+        content: HCL file content
+    """
+    tokens = [token for token in tokenize(content) if token[0] != "newline"]
+    calls = []
+    for i, (kind, value) in enumerate(tokens[:-1]):
+        if (
+            kind != "ident"
+            or value not in READ_FUNCTIONS
+            or tokens[i + 1] != ("punct", "(")
+        ):
+            continue
+
+        arg = []
+        depth = 0
+        for kind, value in tokens[i + 2 :]:
+            if kind == "punct" and value in "{[(":
+                depth += 1
+            elif kind == "punct" and value in "}])":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif (kind, value) == ("punct", ",") and depth == 0:
+                break
+            arg.append((kind, value))
+        calls.append((tokens[i][1], arg))
+
+    return calls
+
+
+def resolve_read_path(cfg_dir: str, arg: List[Tuple[str, str]]) -> str:
+    """
+    Returns the absolute path of the file read by a function call argument.
+    Only string literals and find_in_parent_folders() calls with a string
+    literal argument are resolved.
+
+    Arguments:
+        cfg_dir: Directory relative paths are resolved from
+        arg: First argument tokens returned from get_read_args()
+    """
+    if len(arg) == 1 and arg[0][0] == "string":
+        return os.path.normpath(os.path.join(cfg_dir, arg[0][1]))
+
+    if (
+        len(arg) == 4
+        and arg[0] == ("ident", "find_in_parent_folders")
+        and arg[1] == ("punct", "(")
+        and arg[-1] == ("punct", ")")
+    ):
+        return find_in_parent_folders(
+            cfg_dir, literal(arg[2:3], "find_in_parent_folders() argument")
+        )
+
+    raise UnresolvableConfigException(f"File read within {cfg_dir} can't be resolved")
+
+
+def has_terraform_files(cfg_dir: str) -> bool:
+    return any(
+        name.endswith(".tf") or name.endswith(".tf.json")
+        for name in os.listdir(cfg_dir)
+    )
+
+
+def read_node(cfg_dir: str) -> Tuple[bool, List[str]]:
+    """
+    Returns whether the Terragrunt configuration within the directory is a
+    Terraform module and the absolute paths of the directories it depends on
+    via `dependency` and `dependencies` blocks. Configurations without a
+    `terraform.source` attribute or Terraform files (e.g. parent configurations
+    that are only included) are skipped by Terragrunt's graph and aren't
+    modules.
+
+    Arguments:
+        cfg_dir: Absolute path to a directory that contains a terragrunt.hcl file
+    """
+    cfg = read_config(os.path.join(cfg_dir, CONFIG_FILENAME))
+    includes = [read_config(path) for path in get_include_paths(cfg_dir, cfg)]
+
+    for include in includes:
+        # Terragrunt merges dependencies from included configurations which
+        # would require evaluating the configurations in the same way
+        if include.get_blocks("dependency") or include.get_blocks("dependencies"):
+            raise UnresolvableConfigException(
+                f"Included configuration defines dependencies: {cfg_dir}"
+            )
+
+    is_module = has_terraform_files(cfg_dir) or any(
+        "source" in block.attributes
+        for config in [cfg] + includes
+        for block in config.get_blocks("terraform")
+    )
+
+    deps = []
+    for dependency in cfg.get_blocks("dependency"):
+        deps.append(
+            literal(
+                dependency.attributes.get("config_path", []),
+                f"dependency.{'.'.join(dependency.labels)}.config_path",
+            )
+        )
+    for dependencies in cfg.get_blocks("dependencies"):
+        deps.extend(literal_list(dependencies.attributes.get("paths", []), "paths"))
+
+    resolved = []
+    for dep in deps:
+        dep = os.path.normpath(os.path.join(cfg_dir, dep))
+        if os.path.basename(dep).endswith(".hcl"):
+            dep = os.path.dirname(dep)
+        if dep not in resolved:
+            resolved.append(dep)
+
+    return is_module, resolved
+
+
+def find_config_dirs(path: str) -> List[str]:
+    """
+    Returns the absolute paths of every directory within the path that
+    contains a terragrunt.hcl file
+
+    Arguments:
+        path: Parent directory to search within
+    """
+    cfg_dirs = []
+    for root, dirs, files in os.walk(os.path.abspath(path)):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+        if CONFIG_FILENAME in files:
+            cfg_dirs.append(root)
+
+    return cfg_dirs
+
+
+def extract_graph_deps(path: str, repo_root: str) -> dict:
+    """
+    Returns the same mapping as the `terragrunt graph-dependencies` command
+    by reading the `dependency` and `dependencies` blocks of every Terragrunt
+    configuration within the path. Raises UnresolvableConfigException if any
+    of the dependency paths can only be resolved by evaluating the
+    configuration.
+
+    Arguments:
+        path: Parent directory to search for Terragrunt configurations within
+        repo_root: Directory the returned paths will be relative to
+    """
+    graph_deps = {}
+    for cfg_dir in find_config_dirs(path):
+        is_module, deps = read_node(cfg_dir)
+        if is_module:
+            graph_deps[os.path.relpath(cfg_dir, repo_root)] = [
+                os.path.relpath(dep, repo_root) for dep in deps
+            ]
+    log.debug(f"Parsed configurations: {len(graph_deps)}")
+
+    return graph_deps
+
+
+class GraphCache:
+    """
+    Persistent cache of each Terragrunt directory's graph node. Entries are
+    keyed by a hash of the directory's path and the HCL files that can affect
+    its dependencies so that only directories with changed configurations are
+    re-evaluated. Entries are stored within a local directory or an S3 bucket
+    if the URI starts with `s3://`.
+    """
+
+    def __init__(self, uri: str):
+        self.uri = uri
+        self.hits = 0
+        self.misses = 0
+        # hashes of each directory's HCL files for the current run given
+        # parent directories are shared between most keys
+        self._dir_hashes = {}
+        # file reads of each HCL file given parent configurations are shared
+        # between most keys as well
+        self._read_args = {}
+
+        if uri.startswith("s3://"):
+            self.bucket, _, self.prefix = uri.replace("s3://", "", 1).partition("/")
+            self.s3 = boto3.client("s3", endpoint_url=os.environ.get("S3_ENDPOINT_URL"))
+        else:
+            self.s3 = None
+            os.makedirs(uri, exist_ok=True)
+
+    def get_dir_hash(self, dir: str) -> str:
+        """Returns the hash of the HCL files directly within the directory"""
+        if dir not in self._dir_hashes:
+            digest = hashlib.sha256()
+            for name in sorted(os.listdir(dir)):
+                path = os.path.join(dir, name)
+                if name.endswith(".hcl") and os.path.isfile(path):
+                    with open(path, "rb") as f:
+                        digest.update(name.encode("utf-8") + b"\0" + f.read() + b"\0")
+            self._dir_hashes[dir] = digest.hexdigest()
+
+        return self._dir_hashes[dir]
+
+    def get_read_paths(self, cfg_dir: str, paths: List[str]) -> List[str]:
+        """
+        Returns the absolute paths of the files read by the HCL files via
+        functions such as read_terragrunt_config() or file(). Files read with
+        read_terragrunt_config() are searched for file reads as well.
+
+        Arguments:
+            cfg_dir: Directory of the configuration the HCL files are evaluated for
+            paths: Paths of the configuration and its included configurations
+        """
+        queue = [(cfg_dir, path) for path in paths]
+        read_paths = []
+        while queue:
+            base_dir, path = queue.pop(0)
+            if path not in self._read_args:
+                with open(path, "r") as f:
+                    self._read_args[path] = get_read_args(f.read())
+
+            for name, arg in self._read_args[path]:
+                read_path = resolve_read_path(base_dir, arg)
+                if read_path in read_paths:
+                    continue
+                read_paths.append(read_path)
+                if name == "read_terragrunt_config" and os.path.isfile(read_path):
+                    queue.append((os.path.dirname(read_path), read_path))
+
+        return read_paths
+
+    def get_key(self, cfg_dir: str, repo_root: str) -> Optional[str]:
+        """
+        Returns the cache key of the Terragrunt directory. The key covers the
+        HCL files within the directory and its parent directories up to the
+        repository root, any included configurations outside of them, the
+        files read by the configurations and whether the directory contains
+        Terraform files. Returns None if the included or read files can't be
+        resolved without evaluating the configuration since the directory's
+        node can't be safely cached.
+
+        Arguments:
+            cfg_dir: Absolute path to a directory that contains a terragrunt.hcl file
+            repo_root: Repository root directory
+        """
+        repo_root = os.path.abspath(repo_root)
+        digest = hashlib.sha256(os.path.relpath(cfg_dir, repo_root).encode("utf-8"))
+        digest.update(str(has_terraform_files(cfg_dir)).encode("utf-8"))
+
+        dir = cfg_dir
+        while True:
+            digest.update(self.get_dir_hash(dir).encode("utf-8"))
+            if dir == repo_root or os.path.dirname(dir) == dir:
+                break
+            dir = os.path.dirname(dir)
+
+        try:
+            cfg_path = os.path.join(cfg_dir, CONFIG_FILENAME)
+            include_paths = get_include_paths(cfg_dir, read_config(cfg_path))
+            for path in include_paths:
+                digest.update(self.get_dir_hash(os.path.dirname(path)).encode("utf-8"))
+
+            for path in self.get_read_paths(cfg_dir, [cfg_path] + include_paths):
+                rel_path = os.path.relpath(path, repo_root)
+                digest.update(rel_path.encode("utf-8") + b"\0")
+                if os.path.isfile(path):
+                    with open(path, "rb") as f:
+                        digest.update(hashlib.sha256(f.read()).digest())
+        except UnresolvableConfigException as e:
+            log.debug(f"Skipping cache for {cfg_dir}: {e}")
+            return None
+
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Returns the cached node containing the `is_module` flag and the
+        dependency paths relative to the directory or None if the key isn't
+        cached
+        """
+        try:
+            if self.s3:
+                content = self.s3.get_object(
+                    Bucket=self.bucket, Key=f"{self.prefix}/{key}.json".lstrip("/")
+                )["Body"].read()
+            else:
+                with open(os.path.join(self.uri, f"{key}.json"), "rb") as f:
+                    content = f.read()
+            node = json.loads(content)
+        except (FileNotFoundError, ValueError):
+            node = None
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ["NoSuchKey", "404"]:
+                raise e
+            node = None
+
+        if node is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return node
+
+    def put(self, key: str, node: dict) -> None:
+        content = json.dumps(node).encode("utf-8")
+        if self.s3:
+            self.s3.put_object(
+                Bucket=self.bucket,
+                Key=f"{self.prefix}/{key}.json".lstrip("/"),
+                Body=content,
+            )
+        else:
+            path = os.path.join(self.uri, f"{key}.json")
+            # writes to a uniquely named temporary file first so that
+            # concurrent tasks and threads sharing the directory never read or
+            # write partially written entries
+            with tempfile.NamedTemporaryFile(
+                dir=self.uri, prefix=f"{key}.", suffix=".tmp", delete=False
+            ) as f:
+                f.write(content)
+            os.replace(f.name, path)
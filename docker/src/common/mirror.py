@@ -0,0 +1,109 @@
+import os
+import sys
+import fcntl
+import hashlib
+import shutil
+import logging
+import time
+from contextlib import contextmanager
+
+from .utils import subprocess_run
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+def get_mirror_repo_path(clone_url: str, mirror_path: str) -> str:
+    """
+    Returns the path of the clone URL's mirror repository within the mirror
+    directory. The path is keyed by a hash of the clone URL so that multiple
+    repositories can share the directory without exposing credentials within
+    the URL.
+
+    Arguments:
+        clone_url: Repository clone URL
+        mirror_path: Directory that contains the mirror repositories (e.g. EFS mount)
+    """
+    key = hashlib.sha256(clone_url.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(mirror_path, f"{key}.git")
+
+
+@contextmanager
+def lock(path: str):
+    """
+    Holds an exclusive lock on the file so that concurrent tasks sharing the
+    mirror don't update it at the same time
+
+    Arguments:
+        path: Lock file path
+    """
+    with open(path, "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def update_mirror(clone_url: str, mirror_path: str) -> str:
+    """
+    Creates the clone URL's mirror repository if it doesn't exist or fetches
+    only the new objects if it does and returns the mirror repository's path
+
+    Arguments:
+        clone_url: Repository clone URL
+        mirror_path: Directory that contains the mirror repositories (e.g. EFS mount)
+    """
+    os.makedirs(mirror_path, exist_ok=True)
+    repo_path = get_mirror_repo_path(clone_url, mirror_path)
+
+    start = time.perf_counter()
+    with lock(f"{repo_path}.lock"):
+        if os.path.isfile(os.path.join(repo_path, "HEAD")):
+            log.info("Fetching new objects into mirror")
+            subprocess_run(f"git -C {repo_path} fetch --prune --quiet origin")
+        else:
+            log.info("Creating mirror")
+            # clones into a temporary directory so that a failed clone never
+            # leaves a partial mirror behind
+            tmp_path = f"{repo_path}.{os.getpid()}.tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            subprocess_run(f"git clone --mirror --quiet {clone_url} {tmp_path}")
+            # prevents automatic garbage collection from removing objects
+            # that clones referencing the mirror may still be using
+            subprocess_run(f"git -C {tmp_path} config gc.auto 0")
+            os.replace(tmp_path, repo_path)
+    log.info(f"Updated mirror -- Duration: {time.perf_counter() - start:.2f}s")
+
+    return repo_path
+
+
+def mirror_clone(clone_url: str, branch: str, repo_path: str, mirror_path: str) -> None:
+    """
+    Clones the branch using the objects within the shared mirror repository so
+    only objects that aren't already within the mirror are downloaded. The
+    clone is dissociated from the mirror so later mirror updates can't affect it.
+
+    Arguments:
+        clone_url: Repository clone URL
+        branch: Branch to clone
+        repo_path: Path to clone the repository to
+        mirror_path: Directory that contains the mirror repositories (e.g. EFS mount)
+    """
+    reference = update_mirror(clone_url, mirror_path)
+
+    start = time.perf_counter()
+    subprocess_run(
+        f"git clone --quiet --reference {reference} --dissociate -b {branch} --single-branch {clone_url} {repo_path}"
+    )
+    log.info(f"Cloned from mirror -- Duration: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    try:
+        mirror_clone(*sys.argv[1:5])
+    except Exception as e:
+        # entrypoint falls back to a clone without the mirror
+        log.error(e)
+        sys.exit(1)
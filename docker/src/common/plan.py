@@ -0,0 +1,124 @@
+import logging
+import re
+import subprocess
+import threading
+from collections import deque
+from typing import Iterator, Optional
+
+from .utils import TerragruntException
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+# maximum characters a prefix path can span before it's considered malformed
+MAX_PREFIX_LENGTH = 4096
+
+
+class PlanDiffParser:
+    """
+    Line by line state machine that detects the Terragrunt directories with a
+    `terraform plan -detailed-exitcode` exit status of 2 within the
+    `terragrunt run-all plan` stderr. Terragrunt logs the failed directories
+    in the following format:
+
+        <error>: exit status 2
+
+         prefix=[<directory>]
+    """
+
+    SEARCH = "search"
+    EXIT_STATUS = "exit_status"
+    BLANK = "blank"
+    PREFIX = "prefix"
+
+    def __init__(self):
+        self.state = self.SEARCH
+        self.prefix = ""
+
+    def feed(self, line: str) -> Optional[str]:
+        """
+        Returns the directory of the diff if the line completes a diff entry
+
+        Arguments:
+            line: Line of the run-all plan stderr
+        """
+        line = line.rstrip("\n")
+
+        if self.state == self.EXIT_STATUS:
+            if line == "":
+                self.state = self.BLANK
+                return None
+            self.state = self.SEARCH
+
+        elif self.state == self.BLANK:
+            self.state = self.SEARCH
+            m = re.match(r"\sprefix=\[(.*)", line)
+            if m:
+                return self.read_prefix(m.group(1))
+
+        elif self.state == self.PREFIX:
+            return self.read_prefix("\n" + line)
+
+        if re.search(r"exit\sstatus\s2$", line):
+            self.state = self.EXIT_STATUS
+
+        return None
+
+    def read_prefix(self, value: str) -> Optional[str]:
+        end = value.find("]")
+        if end == -1:
+            self.prefix += value
+            self.state = self.PREFIX
+            if len(self.prefix) > MAX_PREFIX_LENGTH:
+                log.warning(f"Skipping malformed prefix: {self.prefix[:100]}...")
+                self.prefix = ""
+                self.state = self.SEARCH
+            return None
+
+        path = self.prefix + value[:end]
+        self.prefix = ""
+        self.state = self.SEARCH
+        return path
+
+
+def stream_plan_diff_paths(
+    process: subprocess.Popen, stderr_tail_size: int = 100
+) -> Iterator[str]:
+    """
+    Yields the directories with a Terraform plan difference as soon as they're
+    logged by the `terragrunt run-all plan -detailed-exitcode` process. The
+    stdout is logged line by line within a separate thread and only the last
+    stderr lines are kept for the error message so memory usage stays bounded
+    regardless of the output size.
+
+    Arguments:
+        process: Run-all plan process with piped text stdout and stderr
+        stderr_tail_size: Number of the last stderr lines to log if the
+            process fails
+    """
+
+    def log_stdout():
+        for line in process.stdout:
+            log.debug(line.rstrip("\n"))
+
+    stdout_thread = threading.Thread(target=log_stdout, daemon=True)
+    stdout_thread.start()
+
+    parser = PlanDiffParser()
+    stderr_tail = deque(maxlen=stderr_tail_size)
+    for line in process.stderr:
+        stderr_tail.append(line)
+        path = parser.feed(line)
+        if path:
+            yield path
+
+    process.wait()
+    stdout_thread.join()
+
+    # -detailed-exitcode flag causes a return code of 2 if there's a
+    # difference in the Terraform plan
+    if process.returncode not in [0, 2]:
+        log.error(f"Stderr:\n{''.join(stderr_tail)}")
+        raise TerragruntException(
+            "Terragrunt run-all plan command failed -- Aborting task"
+        )
@@ -0,0 +1,272 @@
+import os
+import sys
+import shutil
+import subprocess
+import logging
+import tempfile
+import time
+from typing import Dict, List, Set
+
+from .graph import read_config, literal
+from .mirror import lock
+from .providers import LOCK_FILENAME
+from .utils import subprocess_run
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+# mirror that is populated when the image is built
+DEFAULT_IMAGE_MIRROR_PATH = "/usr/local/terraform-providers"
+DEFAULT_PLATFORM = "linux_amd64"
+
+
+def get_lock_files(path: str) -> List[str]:
+    """
+    Returns the paths of the Terraform lock files within the directory
+    excluding the lock files within Terraform and Terragrunt cache directories
+
+    Arguments:
+        path: Directory to search (e.g. source repository root)
+    """
+    paths = []
+    for root, subdirs, files in os.walk(path):
+        subdirs[:] = [
+            d for d in subdirs if d not in [".git", ".terraform", ".terragrunt-cache"]
+        ]
+        if LOCK_FILENAME in files:
+            paths.append(os.path.join(root, LOCK_FILENAME))
+
+    return sorted(paths)
+
+
+def get_locked_providers(lock_paths: List[str]) -> Dict[str, Set[str]]:
+    """
+    Returns a mapping of the provider addresses and their versions that are
+    selected within the Terraform lock files
+
+    Arguments:
+        lock_paths: Paths to `.terraform.lock.hcl` files
+    """
+    providers = {}
+    for path in lock_paths:
+        for block in read_config(path).get_blocks("provider"):
+            version = literal(
+                block.attributes.get("version", []), f"{path}: {block.labels[0]}"
+            )
+            providers.setdefault(block.labels[0], set()).add(version)
+
+    return providers
+
+
+def parse_providers(specs: List[str]) -> Dict[str, Set[str]]:
+    """
+    Returns a mapping of the provider addresses and their versions
+
+    Arguments:
+        specs: Provider versions formatted as <address>=<version>
+            (e.g. registry.terraform.io/hashicorp/aws=4.0.0)
+    """
+    providers = {}
+    for spec in specs:
+        address, version = spec.split("=")
+        providers.setdefault(address, set()).add(version)
+
+    return providers
+
+
+def get_package_path(
+    mirror_path: str, address: str, version: str, platform: str = DEFAULT_PLATFORM
+) -> str:
+    """
+    Returns the path of the provider version's package within the mirror's
+    packed layout: <hostname>/<namespace>/<type>/terraform-provider-<type>_<version>_<platform>.zip
+
+    Arguments:
+        mirror_path: Provider mirror directory
+        address: Fully qualified provider address (e.g. registry.terraform.io/hashicorp/aws)
+        version: Provider version
+        platform: Provider package platform
+    """
+    type = address.split("/")[-1]
+    return os.path.join(
+        mirror_path, address, f"terraform-provider-{type}_{version}_{platform}.zip"
+    )
+
+
+def get_config(providers: Dict[str, str]) -> str:
+    """
+    Returns a Terraform configuration that requires the exact provider versions
+
+    Arguments:
+        providers: Mapping of provider addresses and versions
+    """
+    required = "".join(
+        f'    p{i} = {{\n      source  = "{address}"\n      version = "= {version}"\n    }}\n'
+        for i, (address, version) in enumerate(sorted(providers.items()))
+    )
+    return f"terraform {{\n  required_providers {{\n{required}  }}\n}}\n"
+
+
+def populate(
+    mirror_path: str,
+    providers: Dict[str, Set[str]],
+    platform: str = DEFAULT_PLATFORM,
+) -> List[str]:
+    """
+    Downloads the provider versions that aren't already within the mirror via
+    `terraform providers mirror` and returns the packages that were added.
+    Packages are downloaded into a temporary directory and moved into the
+    mirror once complete so that tasks reading the mirror never see a partial
+    package.
+
+    Arguments:
+        mirror_path: Provider mirror directory
+        providers: Mapping of provider addresses and their versions
+        platform: Provider package platform
+    """
+    missing = {
+        address: sorted(
+            version
+            for version in versions
+            if not os.path.isfile(
+                get_package_path(mirror_path, address, version, platform)
+            )
+        )
+        for address, versions in providers.items()
+    }
+    missing = {address: versions for address, versions in missing.items() if versions}
+    if len(missing) == 0:
+        return []
+
+    os.makedirs(mirror_path, exist_ok=True)
+    tmp_path = f"{mirror_path.rstrip('/')}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    added = []
+    try:
+        # a configuration can only require one version of each provider so
+        # the versions are mirrored over multiple rounds
+        rounds = max(len(versions) for versions in missing.values())
+        for i in range(rounds):
+            with tempfile.TemporaryDirectory() as cfg_dir:
+                with open(os.path.join(cfg_dir, "main.tf"), "w") as f:
+                    f.write(
+                        get_config(
+                            {
+                                address: versions[i]
+                                for address, versions in missing.items()
+                                if i < len(versions)
+                            }
+                        )
+                    )
+                subprocess_run(
+                    f"terraform -chdir={cfg_dir} providers mirror -platform={platform} {tmp_path}"
+                )
+
+        for address, versions in missing.items():
+            for version in versions:
+                src = get_package_path(tmp_path, address, version, platform)
+                dst = get_package_path(mirror_path, address, version, platform)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                os.replace(src, dst)
+                added.append(dst)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    return added
+
+
+def get_cli_config(mirror_paths: List[str], base_config: str = "") -> str:
+    """
+    Returns a Terraform CLI configuration that installs providers from the
+    filesystem mirrors before downloading them from their origin registry.
+    Terraform only uses a mirror's package if its version is selected so
+    providers and versions that aren't mirrored are still downloaded.
+
+    Arguments:
+        mirror_paths: Provider mirror directories
+        base_config: Existing CLI configuration to extend
+    """
+    mirrors = "".join(
+        f'  filesystem_mirror {{\n    path = "{path}"\n  }}\n' for path in mirror_paths
+    )
+    return f"{base_config}\nprovider_installation {{\n{mirrors}  direct {{}}\n}}\n"
+
+
+def configure(repo_path: str, cli_config_path: str) -> bool:
+    """
+    Adds the providers within the repository's lock files to the shared mirror
+    defined by PROVIDER_MIRROR_PATH and writes a CLI configuration that uses
+    the image's and the shared mirror. Returns False if no mirror is available
+    or the existing CLI configuration defined by TF_CLI_CONFIG_FILE already
+    configures provider installation.
+
+    Arguments:
+        repo_path: Source repository root
+        cli_config_path: Path to write the CLI configuration to
+    """
+    mirror_paths = []
+    image_mirror_path = os.environ.get(
+        "PROVIDER_IMAGE_MIRROR_PATH", DEFAULT_IMAGE_MIRROR_PATH
+    )
+    if os.path.isdir(image_mirror_path):
+        mirror_paths.append(image_mirror_path)
+
+    shared_mirror_path = os.environ.get("PROVIDER_MIRROR_PATH")
+    if shared_mirror_path:
+        start = time.perf_counter()
+        providers = get_locked_providers(get_lock_files(repo_path))
+        os.makedirs(shared_mirror_path, exist_ok=True)
+        try:
+            with lock(f"{shared_mirror_path.rstrip('/')}.lock"):
+                added = populate(shared_mirror_path, providers)
+            log.info(
+                f"Added {len(added)} provider packages to shared mirror -- Duration: {time.perf_counter() - start:.2f}s"
+            )
+        except subprocess.CalledProcessError as e:
+            # packages already within the mirror are still used and the
+            # missing providers are downloaded by Terraform
+            log.error(f"Shared mirror could not be populated: {e}")
+        mirror_paths.append(shared_mirror_path)
+
+    if len(mirror_paths) == 0:
+        log.info("No provider mirror is available")
+        return False
+
+    base_config = ""
+    if os.environ.get("TF_CLI_CONFIG_FILE"):
+        with open(os.environ["TF_CLI_CONFIG_FILE"], "r") as f:
+            base_config = f.read()
+        if "provider_installation" in base_config:
+            log.info(
+                "Existing CLI configuration already configures provider installation"
+            )
+            return False
+
+    os.makedirs(os.path.dirname(os.path.abspath(cli_config_path)), exist_ok=True)
+    with open(cli_config_path, "w") as f:
+        f.write(get_cli_config(mirror_paths, base_config))
+    log.info(f"Provider mirrors: {mirror_paths}")
+
+    return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    action = sys.argv[1]
+    if action == "install":
+        start = time.perf_counter()
+        added = populate(sys.argv[2], parse_providers(sys.argv[3:]))
+        log.info(
+            f"Added {len(added)} provider packages -- Duration: {time.perf_counter() - start:.2f}s"
+        )
+    elif action == "configure":
+        try:
+            if not configure(*sys.argv[2:4]):
+                sys.exit(1)
+        except Exception as e:
+            # entrypoint falls back to downloading providers
+            log.error(e)
+            sys.exit(1)
+    else:
+        log.error(f"Invalid action: {action}")
+        sys.exit(2)
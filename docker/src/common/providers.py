@@ -0,0 +1,154 @@
+import os
+import re
+import json
+import logging
+from typing import List
+
+from .graph import (
+    Block,
+    CONFIG_FILENAME,
+    UnresolvableConfigException,
+    get_include_paths,
+    read_config,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+LOCK_FILENAME = ".terraform.lock.hcl"
+DEFAULT_REGISTRY = "registry.terraform.io"
+DEFAULT_NAMESPACE = "hashicorp"
+
+
+def normalize_source(source: str) -> str:
+    """
+    Returns the fully qualified provider address of the provider source
+    (e.g. `hashicorp/aws` -> `registry.terraform.io/hashicorp/aws`)
+    """
+    parts = source.lower().split("/")
+    if len(parts) == 1:
+        parts = [DEFAULT_REGISTRY, DEFAULT_NAMESPACE] + parts
+    elif len(parts) == 2:
+        parts = [DEFAULT_REGISTRY] + parts
+    return "/".join(parts)
+
+
+def get_required_providers(cfg: Block) -> dict:
+    """
+    Returns a mapping of the configuration's required_providers local names
+    and their provider sources
+
+    Arguments:
+        cfg: Parsed Terraform file
+    """
+    sources = {}
+    for terraform in cfg.get_blocks("terraform"):
+        for required in terraform.get_blocks("required_providers"):
+            for name, expr in required.attributes.items():
+                source = name
+                for i in range(len(expr) - 2):
+                    if (
+                        expr[i] == ("ident", "source")
+                        and expr[i + 1] == ("punct", "=")
+                        and expr[i + 2][0] == "string"
+                    ):
+                        source = expr[i + 2][1]
+                        break
+                sources[name] = normalize_source(source)
+
+    return sources
+
+
+def read_module(path: str) -> List[Block]:
+    """
+    Returns the parsed Terraform files of the Terragrunt directory. Raises UnresolvableConfigException if the Terraform code isn't
+    located within the directory or can't be parsed.
+
+    Arguments:
+        path: Terragrunt directory
+    """
+    cfg = read_config(os.path.join(path, CONFIG_FILENAME))
+    cfg_dir = os.path.abspath(path)
+    for config in [cfg] + [read_config(p) for p in get_include_paths(cfg_dir, cfg)]:
+        for terraform in config.get_blocks("terraform"):
+            if "source" in terraform.attributes:
+                # Terraform code is only available after Terragrunt downloads it
+                raise UnresolvableConfigException(
+                    f"Terraform source is defined for path: {path}"
+                )
+
+    files = []
+    for name in sorted(os.listdir(path)):
+        if name.endswith(".tf.json"):
+            raise UnresolvableConfigException(f"JSON Terraform file found: {name}")
+        if name.endswith(".tf"):
+            files.append(read_config(os.path.join(path, name)))
+
+    return files
+
+
+def get_config_providers(path: str) -> List[str]:
+    """
+    Returns the provider addresses required by the Terraform configuration
+    without running Terraform. Providers are collected from the
+    `required_providers` blocks, the `provider` blocks and the provider local
+    names implied by the resource types. If the configuration calls modules,
+    the `.terraform.lock.hcl` file is also required to collect the modules'
+    providers.
+
+    Arguments:
+        path: Terragrunt directory that contains the Terraform files
+    """
+    files = read_module(path)
+
+    required = {}
+    local_names = set()
+    has_modules = False
+    for cfg in files:
+        required.update(get_required_providers(cfg))
+        local_names.update(block.labels[0] for block in cfg.get_blocks("provider"))
+        for block in cfg.get_blocks("resource") + cfg.get_blocks("data"):
+            if "provider" in block.attributes:
+                # e.g. provider = aws.west
+                local_names.add(block.attributes["provider"][0][1])
+            else:
+                local_names.add(block.labels[0].split("_")[0])
+        has_modules = has_modules or len(cfg.get_blocks("module")) > 0
+
+    providers = set(required.values())
+    providers.update(normalize_source(required.get(name, name)) for name in local_names)
+    # terraform provider is built-in and never installed
+    providers.discard(normalize_source("terraform"))
+
+    lock_path = os.path.join(path, LOCK_FILENAME)
+    if os.path.isfile(lock_path):
+        providers.update(
+            block.labels[0] for block in read_config(lock_path).get_blocks("provider")
+        )
+    elif has_modules:
+        raise UnresolvableConfigException(
+            f"Module providers can't be collected without a lock file: {path}"
+        )
+
+    return sorted(providers)
+
+
+def get_state_providers(state: str) -> List[str]:
+    """
+    Returns the provider addresses of the resources within the Terraform
+    state document
+
+    Arguments:
+        state: Output of the `terraform state pull` command
+    """
+    if state.strip() == "":
+        return []
+
+    return sorted(
+        {
+            m.group(1)
+            for resource in json.loads(state).get("resources", [])
+            for m in [re.match(r'provider\["(.+?)"\]', resource.get("provider", ""))]
+            if m
+        }
+    )
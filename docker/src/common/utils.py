@@ -1,11 +1,14 @@
 import logging
 import subprocess
-import github
 import os
 import requests
 from pprint import pformat
 import re
 import urllib
+from collections import defaultdict
+from typing import List, Tuple, Dict
+
+from .github_client import get_client
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
@@ -36,15 +39,98 @@ def aws_encode(value):
     return re.sub(r"%", "$", urllib.parse.quote_plus(value))
 
 
-def subprocess_run(cmd: str, check=True):
+def to_pg_array(values: List[str]) -> str:
+    """
+    Returns the PostgreSQL array literal of the values that can be passed as a
+    query parameter and casted to TEXT[] (e.g. CAST(:param AS TEXT[]))
+
+    Arguments:
+        values: List of strings
+    """
+    return (
+        "{"
+        + ",".join(
+            '"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values
+        )
+        + "}"
+    )
+
+
+class PathTrie:
+    """
+    Prefix trie of directory paths used to find which of the registered
+    directories contain a file in a single walk of the file's path instead of
+    matching the file against every directory
+    """
+
+    def __init__(self, paths: List[str], extensions: Tuple[str] = (".hcl", ".tf")):
+        """
+        Arguments:
+            paths: Directory paths relative to the root of the repository
+            extensions: File extensions that are matched
+        """
+        self.root = {}
+        self.extensions = extensions
+        for path in paths:
+            node = self.root
+            for part in path.strip("/").split("/"):
+                node = node.setdefault(part, {})
+            # slash is used as the key for the registered path given that it
+            # can't collide with a directory name
+            node["/"] = path
+
+    def match(self, filename: str) -> List[str]:
+        """
+        Returns the registered paths that contain the file. Nested paths are
+        all returned ordered from outermost to innermost.
+
+        Arguments:
+            filename: File path relative to the root of the repository
+        """
+        if not filename.endswith(self.extensions):
+            return []
+
+        matches = []
+        node = self.root
+        for part in filename.split("/")[:-1]:
+            node = node.get(part)
+            if node is None:
+                break
+            if "/" in node:
+                matches.append(node["/"])
+
+        return matches
+
+    def group(self, filenames: List[str]) -> Dict[str, List[str]]:
+        """
+        Returns a mapping of each registered path and the unique parent
+        directories of the files it contains
+
+        Arguments:
+            filenames: File paths relative to the root of the repository
+        """
+        groups = defaultdict(set)
+        for filename in filenames:
+            for path in self.match(filename):
+                groups[path].add(os.path.dirname(filename))
+
+        return {path: list(dirs) for path, dirs in groups.items()}
+
+
+def subprocess_run(cmd: str, check=True, env: dict = None):
     """subprocess.run() wrapper that logs the stdout and raises a subprocess.CalledProcessError exception and logs the stderr if the command fails
     Arguments:
         cmd: Command to run
+        env: Env vars to set for the command in addition to the process's env vars
     """
     log.debug(f"Command: {cmd}")
     try:
         run = subprocess.run(
-            cmd.split(" "), capture_output=True, text=True, check=check
+            cmd.split(" "),
+            capture_output=True,
+            text=True,
+            check=check,
+            env={**os.environ, **env} if env else None,
         )
         log.debug(f"Stdout:\n{run.stdout}")
         return run
@@ -53,6 +139,22 @@ def subprocess_run(cmd: str, check=True):
         raise e
 
 
+def subprocess_popen(cmd: str, env: dict = None) -> subprocess.Popen:
+    """subprocess.Popen() wrapper that logs the command and pipes the stdout and stderr as text
+    Arguments:
+        cmd: Command to run
+        env: Env vars to set for the command in addition to the process's env vars
+    """
+    log.debug(f"Command: {cmd}")
+    return subprocess.Popen(
+        cmd.split(" "),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env={**os.environ, **env} if env else None,
+    )
+
+
 def get_task_log_url():
     metadata = requests.get(os.environ["ECS_CONTAINER_METADATA_URI"] + "/task").json()
     log.debug(f"Container metadata:\n{pformat(metadata)}")
@@ -71,10 +173,8 @@ def send_commit_status(state: str, target_url: str):
         state: Commit status state (e.g. success, failure, pending)
         target_url: URL to link commit status with
     """
-    commit = (
-        github.Github(os.environ["GITHUB_TOKEN"], retry=3)
-        .get_repo(os.environ["REPO_FULL_NAME"])
-        .get_commit(os.environ["COMMIT_ID"])
+    commit = get_client(os.environ["GITHUB_TOKEN"]).get_commit(
+        os.environ["REPO_FULL_NAME"], os.environ["COMMIT_ID"]
     )
     log.info("Sending commit status")
     return commit.create_status(
@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import stat
+import time
+import logging
+import zipfile
+import urllib.request
+from typing import Optional
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+# directory the pre-installed binaries are stored within:
+# <cache_dir>/<tool>/<version>/<tool>
+DEFAULT_CACHE_DIR = "/usr/local/terra-versions"
+# file within the tool's cache directory that contains the version "latest"
+# resolved to when the binaries were installed
+LATEST_FILENAME = "latest"
+
+RELEASE_URLS = {
+    "terraform": "https://releases.hashicorp.com/terraform/{version}/terraform_{version}_linux_amd64.zip",
+    "terragrunt": "https://github.com/gruntwork-io/terragrunt/releases/download/v{version}/terragrunt_linux_amd64",
+}
+
+
+def get_cache_dir() -> str:
+    return os.environ.get("TERRA_VERSION_CACHE", DEFAULT_CACHE_DIR)
+
+
+def resolve(tool: str, version: str, cache_dir: str) -> Optional[str]:
+    """
+    Returns the path to the pre-installed binary of the tool's version or None
+    if the version isn't pre-installed. The `latest` version resolves to the
+    latest version at the time the binaries were installed. No network
+    requests are made.
+
+    Arguments:
+        tool: `terraform` or `terragrunt`
+        version: Version to resolve (e.g. 1.3.0, v0.31.0, latest)
+        cache_dir: Directory the binaries were installed within
+    """
+    version = version.strip().removeprefix("v")
+    if version == "latest":
+        try:
+            with open(os.path.join(cache_dir, tool, LATEST_FILENAME), "r") as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    path = os.path.join(cache_dir, tool, version, tool)
+    if os.path.isfile(path) and os.access(path, os.X_OK):
+        return path
+
+    return None
+
+
+def get_latest_version(tool: str) -> str:
+    """Returns the tool's latest released version"""
+    if tool == "terraform":
+        url = "https://checkpoint-api.hashicorp.com/v1/check/terraform"
+        key = "current_version"
+    else:
+        url = "https://api.github.com/repos/gruntwork-io/terragrunt/releases/latest"
+        key = "tag_name"
+
+    with urllib.request.urlopen(url) as res:
+        return json.loads(res.read())[key].removeprefix("v")
+
+
+def install(tool: str, version: str, cache_dir: str) -> str:
+    """
+    Downloads the tool's version into the cache directory if it isn't already
+    installed and returns the binary's path
+
+    Arguments:
+        tool: `terraform` or `terragrunt`
+        version: Version to install (e.g. 1.3.0, v0.31.0, latest)
+        cache_dir: Directory to install the binary within
+    """
+    version = version.strip().removeprefix("v")
+    if version == "latest":
+        version = get_latest_version(tool)
+        os.makedirs(os.path.join(cache_dir, tool), exist_ok=True)
+        with open(os.path.join(cache_dir, tool, LATEST_FILENAME), "w") as f:
+            f.write(version)
+
+    path = resolve(tool, version, cache_dir)
+    if path:
+        log.info(f"{tool} {version} is already installed")
+        return path
+
+    url = RELEASE_URLS[tool].format(version=version)
+    log.info(f"Downloading {tool} {version}: {url}")
+    version_dir = os.path.join(cache_dir, tool, version)
+    os.makedirs(version_dir, exist_ok=True)
+    path = os.path.join(version_dir, tool)
+
+    download_path, _ = urllib.request.urlretrieve(url)
+    if url.endswith(".zip"):
+        with zipfile.ZipFile(download_path) as zip:
+            zip.extract(tool, version_dir)
+        os.remove(download_path)
+    else:
+        os.replace(download_path, path)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    return path
+
+
+def use(tool: str, version: str, cache_dir: str, bin_dir: str) -> bool:
+    """
+    Links the pre-installed binary of the tool's version within the bin
+    directory and returns True or returns False if the version isn't
+    pre-installed
+
+    Arguments:
+        tool: `terraform` or `terragrunt`
+        version: Version to use (e.g. 1.3.0, v0.31.0, latest)
+        cache_dir: Directory the binaries were installed within
+        bin_dir: Directory within PATH to link the binary within
+    """
+    path = resolve(tool, version, cache_dir)
+    if path is None:
+        return False
+
+    os.makedirs(bin_dir, exist_ok=True)
+    link = os.path.join(bin_dir, tool)
+    tmp_link = f"{link}.{os.getpid()}.tmp"
+    os.symlink(path, tmp_link)
+    os.replace(tmp_link, link)
+
+    return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    action, tool = sys.argv[1:3]
+    if action == "install":
+        for version in sys.argv[3:]:
+            start = time.perf_counter()
+            path = install(tool, version, get_cache_dir())
+            log.info(
+                f"Installed: {path} -- Duration: {time.perf_counter() - start:.2f}s"
+            )
+    elif action == "use":
+        version, bin_dir = sys.argv[3:5]
+        if not use(tool, version, get_cache_dir(), bin_dir):
+            log.info(f"{tool} {version} is not pre-installed")
+            sys.exit(1)
+        log.info(f"Using pre-installed {tool} {version}")
+    else:
+        log.error(f"Invalid action: {action}")
+        sys.exit(2)
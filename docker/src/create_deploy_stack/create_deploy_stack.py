@@ -3,21 +3,38 @@ import sys
 import logging
 import re
 import json
-from typing import List
-from collections import defaultdict
-import fnmatch
+import time
+import queue
+import threading
+from contextlib import contextmanager
+from typing import List, Callable, Any, Iterator
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 
-import github
-import aurora_data_api
 import boto3
 
 sys.path.append(os.path.dirname(__file__) + "/..")
 from common.utils import (
     subprocess_run,
+    subprocess_popen,
     TerragruntException,
     ClientException,
     get_task_log_url,
+    to_pg_array,
+    PathTrie,
 )
+from common.graph import (
+    extract_graph_deps,
+    find_config_dirs,
+    read_node,
+    GraphCache,
+    UnresolvableConfigException,
+)
+from common.plan import stream_plan_diff_paths
+from common.diff import get_diff_files
+from common.providers import get_config_providers, get_state_providers
+from common.github_client import get_client
+from common.metadb import Session
 
 log = logging.getLogger(__name__)
 stream = logging.StreamHandler(sys.stdout)
@@ -30,21 +47,120 @@ lb = boto3.client("lambda", endpoint_url=os.environ.get("LAMBDA_ENDPOINT_URL"))
 rds_data_client = boto3.client(
     "rds-data", endpoint_url=os.environ.get("METADB_ENDPOINT_URL")
 )
+metadb = Session(rds_data_client)
 
 
 class CreateStack:
-    def get_new_providers(self, path: str, role_arn: str) -> List[str]:
+    def __init__(self):
+        self._plugin_cache_dirs = None
+        self._plugin_cache_dirs_lock = threading.Lock()
+
+    def get_path_concurrency(self) -> int:
+        """
+        Returns the CREATE_STACK_PATH_CONCURRENCY env var clamped to at least
+        one so that a misconfigured value never leaves the plugin cache
+        directory queue empty
+        """
+        return max(1, int(os.environ.get("CREATE_STACK_PATH_CONCURRENCY", 4)))
+
+    def get_plugin_cache_dirs(self) -> queue.Queue:
+        """
+        Returns the queue of Terraform provider plugin cache directories
+        that's shared by every account of the task. The queue contains one
+        directory within the TF_PLUGIN_CACHE_DIR env var's directory for each
+        of the CREATE_STACK_PATH_CONCURRENCY concurrent Terragrunt commands.
+        """
+        with self._plugin_cache_dirs_lock:
+            if self._plugin_cache_dirs is None:
+                cache_dir = os.environ.setdefault(
+                    "TF_PLUGIN_CACHE_DIR",
+                    os.path.join(
+                        os.path.expanduser("~"), ".terraform.d", "plugin-cache"
+                    ),
+                )
+                log.debug(f"Terraform plugin cache directory: {cache_dir}")
+
+                self._plugin_cache_dirs = queue.Queue()
+                for i in range(self.get_path_concurrency()):
+                    path = os.path.join(cache_dir, str(i))
+                    os.makedirs(path, exist_ok=True)
+                    self._plugin_cache_dirs.put(path)
+
+            return self._plugin_cache_dirs
+
+    @contextmanager
+    def plugin_cache_env(self) -> Iterator[dict]:
+        """
+        Waits for an unused Terraform plugin cache directory and yields the env
+        vars for running a Terragrunt command with it. The plugin cache isn't
+        safe for concurrent writes so every concurrent Terragrunt command
+        writes to its own directory and the amount of concurrent commands
+        across every account is limited to the amount of directories.
+        """
+        cache_dirs = self.get_plugin_cache_dirs()
+        cache_dir = cache_dirs.get()
+        try:
+            yield {"TF_PLUGIN_CACHE_DIR": cache_dir}
+        finally:
+            cache_dirs.put(cache_dir)
+
+    def get_new_providers(
+        self, path: str, role_arn: str, env: dict = None
+    ) -> List[str]:
         """
         Returns list of Terraform provider sources that are defined within the
-        `path` that are not within the Terraform state
+        `path` that are not within the Terraform state. The configuration's
+        providers are read directly from the Terraform files and compared with
+        the providers within the pulled Terraform state. If the configuration's
+        providers can't be read without Terraform, the `terragrunt providers`
+        command is used instead.
 
         Arguments:
             path: Absolute path to a directory that contains atleast one Terragrunt *.hcl file
             role_arn: Role used for running Terragrunt command
+            env: Env vars to run the Terragrunt command with (e.g. plugin cache directory)
         """
         log.debug(f"Path: {path}")
+        try:
+            cfg_providers = get_config_providers(path)
+        except UnresolvableConfigException as e:
+            log.debug(f"Falling back to Terragrunt providers command: {e}")
+            return self.get_terragrunt_new_providers(path, role_arn, env)
+
+        log.debug(f"Config providers:\n{cfg_providers}")
+        if len(cfg_providers) == 0:
+            return []
+
         run = subprocess_run(
-            f"terragrunt providers --terragrunt-working-dir {path} --terragrunt-iam-role {role_arn}"
+            f"terragrunt state pull --terragrunt-working-dir {path} --terragrunt-iam-role {role_arn}",
+            env=env,
+        )
+        try:
+            state_providers = get_state_providers(run.stdout)
+        except ValueError as e:
+            log.debug(f"Falling back to Terragrunt providers command: {e}")
+            return self.get_terragrunt_new_providers(path, role_arn, env)
+
+        log.debug(f"State providers:\n{state_providers}")
+
+        return list(set(cfg_providers).difference(state_providers))
+
+    def get_terragrunt_new_providers(
+        self, path: str, role_arn: str, env: dict = None
+    ) -> List[str]:
+        """
+        Returns list of Terraform provider sources that are defined within the
+        `path` that are not within the Terraform state using the `terragrunt providers`
+        command
+
+        Arguments:
+            path: Absolute path to a directory that contains atleast one Terragrunt *.hcl file
+            role_arn: Role used for running Terragrunt command
+            env: Env vars to run the Terragrunt command with
+        """
+        run = subprocess_run(
+            f"terragrunt providers --terragrunt-working-dir {path} --terragrunt-iam-role {role_arn}",
+            env=env,
         )
 
         cfg_providers = re.findall(
@@ -59,7 +175,73 @@ class CreateStack:
 
         return list(set(cfg_providers).difference(state_providers))
 
+    def map_paths(self, func: Callable[[str, dict], Any], paths: List[str]) -> dict:
+        """
+        Returns a mapping of each path and the value the function returns for
+        it. The function calls are ran concurrently with the amount of
+        concurrent calls across every account limited by the
+        CREATE_STACK_PATH_CONCURRENCY env var. Each call is passed the env vars
+        of the Terraform plugin cache directory it has to itself for the
+        duration of the call.
+
+        Arguments:
+            func: Function that runs Terragrunt commands for the passed path
+                with the passed env vars
+            paths: List of Terragrunt directories to call the function for
+        """
+        if len(paths) == 0:
+            return {}
+
+        max_workers = self.get_path_concurrency()
+        log.debug(f"Path concurrency: {max_workers}")
+
+        def run(path: str) -> Any:
+            with self.plugin_cache_env() as env:
+                return func(path, env)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(paths, executor.map(run, paths)))
+
+    def get_stack_new_providers(self, paths: List[str], role_arn: str) -> dict:
+        """
+        Returns a mapping of each path and its associated new Terraform provider
+        sources. The get_new_providers() calls are ran concurrently via map_paths().
+
+        Arguments:
+            paths: List of Terragrunt directories to get new providers for
+            role_arn: Role used for running Terragrunt command
+        """
+        return self.map_paths(
+            lambda path, env: self.get_new_providers(path, role_arn, env), paths
+        )
+
     def get_graph_deps(self, path: str, role_arn: str) -> dict:
+        """
+        Returns a Python dictionary version of the `terragrunt graph-dependencies` command.
+        If GRAPH_DEPS_EXTRACTOR is set to `python`, the dependencies are read directly
+        from the Terragrunt configurations and the Terragrunt command is only used if
+        the configurations contain dependency paths that can't be resolved without it.
+        If GRAPH_CACHE_URI is set, the graph nodes of directories with unchanged
+        configurations since they were last cached are reused (see get_cached_graph_deps()).
+
+        Arguments:
+            path: Absolute path to a directory to run the Terragrunt command from
+            role_arn: Role used for running Terragrunt command
+        """
+        if os.environ.get("GRAPH_CACHE_URI"):
+            return self.get_cached_graph_deps(
+                path, role_arn, GraphCache(os.environ["GRAPH_CACHE_URI"])
+            )
+
+        if os.environ.get("GRAPH_DEPS_EXTRACTOR", "terragrunt") == "python":
+            try:
+                return extract_graph_deps(path, os.environ["SOURCE_REPO_PATH"])
+            except UnresolvableConfigException as e:
+                log.info(f"Falling back to Terragrunt graph-dependencies: {e}")
+
+        return self.get_terragrunt_graph_deps(path, role_arn)
+
+    def get_terragrunt_graph_deps(self, path: str, role_arn: str) -> dict:
         """
         Returns a Python dictionary version of the `terragrunt graph-dependencies` command
 
@@ -89,52 +271,146 @@ class CreateStack:
 
         return dict(graph_deps)
 
-    def get_github_diff_paths(self, graph_deps: dict, path: str) -> List[str]:
+    def get_cached_graph_deps(
+        self, path: str, role_arn: str, cache: GraphCache
+    ) -> dict:
+        """
+        Returns a Python dictionary version of the `terragrunt graph-dependencies` command
+        using the cached graph nodes of directories with unchanged configurations. Cache
+        misses are evaluated with the Python extractor if GRAPH_DEPS_EXTRACTOR is set to
+        `python`. Otherwise, any cache miss runs the Terragrunt command for the entire
+        path given it can't be limited to the missed directories. Directories whose
+        included or read files can't be resolved are evaluated on every run.
+
+        Arguments:
+            path: Absolute path to a directory to run the Terragrunt command from
+            role_arn: Role used for running Terragrunt command
+            cache: Cache to read and write the graph nodes with
         """
-        Returns unique list of GitHub diff directories and the directories that
-        are dependent on them. Function uses the graph-dependencies dictionary
-        to find the directories that are dependent on the GitHub diff directories.
+        repo_root = os.environ["SOURCE_REPO_PATH"]
+        nodes = {}
+        misses = {}
+        for cfg_dir in find_config_dirs(path):
+            key = cache.get_key(cfg_dir, repo_root)
+            node = None if key is None else cache.get(key)
+            if node is None:
+                misses[cfg_dir] = key
+            else:
+                nodes[cfg_dir] = node
+
+        unresolved = list(misses)
+        if os.environ.get("GRAPH_DEPS_EXTRACTOR", "terragrunt") == "python":
+            unresolved = []
+            for cfg_dir in misses:
+                try:
+                    is_module, deps = read_node(cfg_dir)
+                    nodes[cfg_dir] = {
+                        "is_module": is_module,
+                        "deps": [os.path.relpath(dep, cfg_dir) for dep in deps],
+                    }
+                except UnresolvableConfigException as e:
+                    log.debug(f"Unresolvable configuration: {e}")
+                    unresolved.append(cfg_dir)
+
+        if len(unresolved) > 0:
+            log.info(
+                f"Running Terragrunt graph-dependencies for uncached directories: {len(unresolved)}"
+            )
+            tg_graph_deps = self.get_terragrunt_graph_deps(path, role_arn)
+            for cfg_dir in unresolved:
+                cfg = os.path.relpath(cfg_dir, repo_root)
+                nodes[cfg_dir] = {
+                    "is_module": cfg in tg_graph_deps,
+                    "deps": [
+                        os.path.relpath(os.path.join(repo_root, dep), cfg_dir)
+                        for dep in tg_graph_deps.get(cfg, [])
+                    ],
+                }
+
+        for cfg_dir, key in misses.items():
+            if key is not None:
+                cache.put(key, nodes[cfg_dir])
+
+        log.info(f"Graph cache hits: {cache.hits} -- misses: {cache.misses}")
+
+        graph_deps = {}
+        for cfg_dir, node in nodes.items():
+            if node["is_module"]:
+                graph_deps[os.path.relpath(cfg_dir, repo_root)] = [
+                    os.path.relpath(
+                        os.path.normpath(os.path.join(cfg_dir, dep)), repo_root
+                    )
+                    for dep in node["deps"]
+                ]
+
+        return graph_deps
+
+    def get_dependent_paths(self, graph_deps: dict, paths: List[str]) -> List[str]:
+        """
+        Returns unique list of the passed paths and the paths that directly or
+        indirectly depend on them. Only paths that are within the
+        graph-dependencies dictionary are returned.
 
         Arguments:
             graph_deps: Terragrunt graph-dependencies Python version dictionary
-            path: Parent directory to search for differences within
+            paths: Paths to search for dependent paths of
         """
+        # reverses the graph dependencies mapping once so that each path's
+        # dependents can be looked up without scanning the entire graph
+        dependents = defaultdict(list)
+        for cfg_path, cfg_deps in graph_deps.items():
+            for dep in cfg_deps:
+                dependents[dep].append(cfg_path)
+
+        # breadth-first search where each path is only visited once even if
+        # multiple paths depend on it (e.g. diamond-shaped graphs)
+        visited = set(paths)
+        queue = deque(visited)
+        while len(queue) > 0:
+            path = queue.popleft()
+            for dependent in dependents.get(path, []):
+                if dependent not in visited:
+                    visited.add(dependent)
+                    queue.append(dependent)
+
+        return [path for path in visited if path in graph_deps]
 
-        repo = github.Github(os.environ["GITHUB_TOKEN"], retry=3).get_repo(
-            os.environ["REPO_FULL_NAME"]
-        )
+    def get_github_diff_paths(self, graph_deps: dict, path: str) -> List[str]:
+        """
+        Returns unique list of git diff directories and the directories that
+        are dependent on them. The git differences are collected from the local
+        clone and falls back to the GitHub API if the clone doesn't contain the
+        commits. Function uses the graph-dependencies dictionary to find the
+        directories that are dependent on the git diff directories.
 
+        Arguments:
+            graph_deps: Terragrunt graph-dependencies Python version dictionary
+            path: Parent directory to search for differences within
+        """
         log.info("Running Graph Scan")
-        target_diff_paths = []
 
         log.debug(
             f"Getting git differences between commits: {os.environ['BASE_COMMIT_ID']} and {os.environ['COMMIT_ID']}"
         )
-        for diff in repo.compare(
+        diff_files = get_diff_files(
             os.environ["BASE_COMMIT_ID"], os.environ["COMMIT_ID"]
-        ).files:
-            # collects directories that contain new, modified and removed .hcl/.tf files
-            if diff.status in ["added", "modified", "removed"]:
-                if fnmatch.fnmatch(diff.filename, f"{path}/**.hcl") or fnmatch.fnmatch(
-                    diff.filename, f"{path}/**.tf"
-                ):
-                    target_diff_paths.append(os.path.dirname(diff.filename))
-        target_diff_paths = list(set(target_diff_paths))
+        )
+        # collects directories that contain new, modified and removed .hcl/.tf files
+        target_diff_paths = (
+            PathTrie([path])
+            .group(
+                [
+                    filename
+                    for filename, status in diff_files.items()
+                    if status in ["added", "modified", "removed"]
+                ]
+            )
+            .get(path, [])
+        )
 
         log.debug(f"Detected differences:\n{target_diff_paths}")
-        diff_paths = []
-        # recursively searches for the diff directories within the graph
-        # dependencies mapping to include chained dependencies
-        while len(target_diff_paths) > 0:
-            log.debug(f"Current diffs list:\n{target_diff_paths}")
-            path = target_diff_paths.pop()
-            for cfg_path, cfg_deps in graph_deps.items():
-                if cfg_path == path:
-                    diff_paths.append(path)
-                if path in cfg_deps:
-                    target_diff_paths.append(cfg_path)
-
-        return list(set(diff_paths))
+
+        return self.get_dependent_paths(graph_deps, target_diff_paths)
 
     def get_plan_diff_paths(self, path, role_arn):
         """
@@ -148,29 +424,75 @@ class CreateStack:
         log.info("Running Plan Scan")
         # use the terraform exitcode for each directory found in the terragrunt
         # run-all plan output to determine what directories to collect
+        diff_paths = []
+        # the account's run-all plan writes to the plugin cache like the
+        # directory level commands of the other accounts
+        with self.plugin_cache_env() as env:
+            process = subprocess_popen(
+                f"terragrunt run-all plan --terragrunt-working-dir {path} --terragrunt-iam-role {role_arn} --terragrunt-non-interactive -detailed-exitcode",
+                env=env,
+            )
+
+            # output is parsed while the command runs instead of loading the
+            # entire output into memory once the command is finished
+            for p in stream_plan_diff_paths(process):
+                diff_path = os.path.relpath(p, os.environ["SOURCE_REPO_PATH"])
+                log.debug(f"Detected difference: {diff_path}")
+                diff_paths.append(diff_path)
 
+        return diff_paths
+
+    def get_plan_exitcode(self, path: str, role_arn: str, env: dict = None) -> int:
+        """
+        Returns the `terraform plan -detailed-exitcode` exitcode of the Terragrunt
+        directory which is 2 if the plan contains differences and 0 if not
+
+        Arguments:
+            path: Terragrunt directory to run the plan within
+            role_arn: Role used for running Terragrunt command
+            env: Env vars to run the Terragrunt command with
+        """
         # set check=False to prevent raising subprocess.CalledProcessError
         # since the -detailed-exitcode flags causes a return code of 2 if diff
         # in Terraform plan
         run = subprocess_run(
-            f"terragrunt run-all plan --terragrunt-working-dir {path} --terragrunt-iam-role {role_arn} --terragrunt-non-interactive -detailed-exitcode",
+            f"terragrunt plan --terragrunt-working-dir {path} --terragrunt-iam-role {role_arn} --terragrunt-non-interactive -detailed-exitcode",
             check=False,
+            env=env,
         )
 
         if run.returncode not in [0, 2]:
             log.error(f"Stderr: {run.stderr}")
             raise TerragruntException(
-                "Terragrunt run-all plan command failed -- Aborting task"
+                f"Terragrunt plan command failed for path: {path} -- Aborting task"
             )
 
-        # selects directories that contains a exitcode of 2 meaning there is a
-        # difference in the terraform plan
-        return [
-            os.path.relpath(p, os.environ["SOURCE_REPO_PATH"])
-            for p in re.findall(
-                r"(?<=exit\sstatus\s2\n\n\sprefix=\[).+?(?=\])", run.stderr, re.DOTALL
-            )
-        ]
+        return run.returncode
+
+    def get_hybrid_diff_paths(
+        self, graph_deps: dict, path: str, role_arn: str
+    ) -> List[str]:
+        """
+        Returns unique list of Terragrunt directories that contain a difference
+        in their respective Terraform state file. Only the directories collected
+        by the graph scan are planned instead of every directory within the
+        parent directory.
+
+        Arguments:
+            graph_deps: Terragrunt graph-dependencies Python version dictionary
+            path: Parent directory to search for differences within
+            role_arn: Role used for running Terragrunt command
+        """
+        log.info("Running Hybrid Scan")
+        candidates = self.get_github_diff_paths(graph_deps, path)
+        log.debug(f"Plan candidates:\n{candidates}")
+
+        exitcodes = self.map_paths(
+            lambda cfg_path, env: self.get_plan_exitcode(cfg_path, role_arn, env),
+            candidates,
+        )
+
+        return [cfg_path for cfg_path in candidates if exitcodes[cfg_path] == 2]
 
     def create_stack(self, path: str, role_arn: str) -> List[map]:
         """
@@ -183,7 +505,8 @@ class CreateStack:
             path: Parent directory to search for differences within. When
                 SCAN_TYPE is `plan`, terragrunt run-all plan will be used
                 to search for differences which means the parent directory must
-                contain a `terragrunt.hcl` file.
+                contain a `terragrunt.hcl` file. When SCAN_TYPE is `hybrid`,
+                only the directories collected by the graph scan are planned.
             role_arn: AWS account role used for running Terragrunt commands
         """
 
@@ -199,6 +522,8 @@ class CreateStack:
             diff_paths = self.get_github_diff_paths(graph_deps, path)
         elif os.environ["SCAN_TYPE"] == "plan":
             diff_paths = self.get_plan_diff_paths(path, role_arn)
+        elif os.environ["SCAN_TYPE"] == "hybrid":
+            diff_paths = self.get_hybrid_diff_paths(graph_deps, path, role_arn)
         else:
             raise ClientException(f"Scan type is invalid: {os.environ['SCAN_TYPE']}")
 
@@ -208,126 +533,240 @@ class CreateStack:
         else:
             log.debug(f"Detected new/modified Terragrunt paths:\n{diff_paths}")
 
+        stack_paths = [cfg_path for cfg_path in graph_deps if cfg_path in diff_paths]
+        new_providers = self.get_stack_new_providers(stack_paths, role_arn)
+
         stack = []
-        for cfg_path, cfg_deps in graph_deps.items():
-            if cfg_path in diff_paths:
-                stack.append(
-                    {
-                        "cfg_path": cfg_path,
-                        # only selects dependencies that contain differences
-                        "cfg_deps": [dep for dep in cfg_deps if dep in diff_paths],
-                        "new_providers": self.get_new_providers(cfg_path, role_arn),
-                    }
-                )
+        for cfg_path in stack_paths:
+            stack.append(
+                {
+                    "cfg_path": cfg_path,
+                    # only selects dependencies that contain differences
+                    "cfg_deps": [
+                        dep for dep in graph_deps[cfg_path] if dep in diff_paths
+                    ],
+                    "new_providers": new_providers[cfg_path],
+                }
+            )
         return stack
 
-    def update_executions_with_new_deploy_stack(self) -> None:
+    def create_account_stack(self, account: dict) -> List[map]:
         """
-        Iterates through every parent account-level directory and insert it's
-        associated deployment stack within the metadb
-        """
-        with aurora_data_api.connect(
-            aurora_cluster_arn=os.environ["AURORA_CLUSTER_ARN"],
-            secret_arn=os.environ["AURORA_SECRET_ARN"],
-            database=os.environ["METADB_NAME"],
-            rds_data_client=rds_data_client,
-        ) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                SELECT
-                    account_name,
-                    account_path,
-                    account_deps::VARCHAR,
-                    min_approval_count,
-                    min_rejection_count,
-                    voters::VARCHAR,
-                    plan_role_arn,
-                    apply_role_arn
-                FROM account_dim
-                ORDER BY account_name
-                """
+        Wrapper around create_stack() that logs how long the account's stack
+        took to create
+
+        Arguments:
+            account: account_dim record of the account to create the stack for
+        """
+        log.info(f'Account path: {account["account_path"]}')
+        log.info(f'Account plan role ARN: {account["plan_role_arn"]}')
+
+        start = time.perf_counter()
+        stack = self.create_stack(account["account_path"], account["plan_role_arn"])
+        log.info(
+            f'Created stack for account: {account["account_name"]} -- Paths: {len(stack)} -- Duration: {time.perf_counter() - start:.2f}s'
+        )
+
+        return stack
+
+    def create_account_stacks(self, accounts: List[dict]) -> List[tuple]:
+        """
+        Creates the deployment stack for every account concurrently and returns
+        a list of (account, stack) tuples in the same order as `accounts`. The
+        amount of accounts processed at once is limited by the
+        CREATE_STACK_ACCOUNT_CONCURRENCY env var. The accounts' Terragrunt
+        commands that use the plugin cache share the
+        CREATE_STACK_PATH_CONCURRENCY limit so the task runs at most the sum of
+        both limits of Terragrunt commands at once.
+
+        Arguments:
+            accounts: List of account_dim records
+        """
+        # at least one account is processed at a time if the env var is
+        # misconfigured
+        max_workers = max(1, int(os.environ.get("CREATE_STACK_ACCOUNT_CONCURRENCY", 4)))
+        log.debug(f"Account concurrency: {max_workers}")
+
+        start = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [
+                executor.submit(self.create_account_stack, account)
+                for account in accounts
+            ]
+            stacks = [future.result() for future in futures]
+        except Exception as e:
+            # prevents queued accounts from running terragrunt commands after
+            # one of the accounts has already failed
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise e
+        executor.shutdown(wait=True)
+
+        log.info(
+            f"Created stacks for {len(accounts)} account(s) -- Duration: {time.perf_counter() - start:.2f}s"
+        )
+        return list(zip(accounts, stacks))
+
+    def filter_changed_accounts(self, accounts: List[dict]) -> List[dict]:
+        """
+        Returns the accounts that contain new, modified or removed .hcl/.tf
+        files or that directly or indirectly depend on an account that does.
+        The git differences are collected once for every account so that
+        accounts without differences don't run any Terragrunt commands.
+
+        Arguments:
+            accounts: List of account_dim records
+        """
+        diff_files = get_diff_files(
+            os.environ["BASE_COMMIT_ID"], os.environ["COMMIT_ID"]
+        )
+        account_diff_paths = PathTrie(
+            [account["account_path"] for account in accounts]
+        ).group(
+            [
+                filename
+                for filename, status in diff_files.items()
+                if status in ["added", "modified", "removed"]
+            ]
+        )
+
+        reasons = {}
+        for account in accounts:
+            if account["account_path"] in account_diff_paths:
+                reasons[account["account_name"]] = "contains differences"
+
+        # adds accounts that depend on accounts with differences until no new
+        # accounts are found
+        added = True
+        while added:
+            added = False
+            for account in accounts:
+                if account["account_name"] in reasons:
+                    continue
+                changed_deps = [
+                    dep for dep in account["account_deps"] if dep in reasons
+                ]
+                if len(changed_deps) > 0:
+                    reason = f"depends on accounts with differences: {changed_deps}"
+                    reasons[account["account_name"]] = reason
+                    added = True
+
+        changed_accounts = []
+        for account in accounts:
+            if account["account_name"] in reasons:
+                log.info(
+                    f'Account: {account["account_name"]} -- {reasons[account["account_name"]]}'
+                )
+                changed_accounts.append(account)
+            else:
+                log.info(
+                    f'Skipping account: {account["account_name"]} -- No .hcl/.tf differences within account path or account dependencies'
                 )
-                cols = [desc[0] for desc in cur.description]
-                res = cur.fetchall()
-                log.debug(f"Raw accounts records:\n{json.dumps(res, indent=4)}")
-                accounts = []
-                for account in res:
-                    record = dict(zip(cols, account))
-                    record["account_deps"] = (
-                        record["account_deps"]
-                        .removeprefix("{")
-                        .removesuffix("}")
-                        .split(",")
-                    )
-                    record["voters"] = (
-                        record["voters"].removeprefix("{").removesuffix("}").split(",")
-                    )
-                    accounts.append(record)
-                log.debug(f"Accounts:\n{json.dumps(accounts, indent=4)}")
 
-                if len(accounts) == 0:
-                    Exception("No account paths are defined in account_dim")
+        return changed_accounts
 
-                try:
-                    log.info("Getting account stacks")
-                    for account in accounts:
-                        log.info(f'Account path: {account["account_path"]}')
-                        log.info(f'Account plan role ARN: {account["plan_role_arn"]}')
-
-                        stack = self.create_stack(
-                            account["account_path"], account["plan_role_arn"]
-                        )
-
-                        log.debug(f"Stack:\n{stack}")
-
-                        if len(stack) == 0:
-                            log.debug("Stack is empty -- skipping")
-                            continue
-
-                        # convert lists to comma-delimitted strings that will
-                        # parsed to TEXT[] within query
-                        stack_values = []
-                        for cfg in stack:
-                            stack_values.append(
-                                str(
-                                    tuple(
-                                        [
-                                            v if type(v) != list else ",".join(v)
-                                            for v in cfg.values()
-                                        ]
-                                    )
-                                )
-                            )
-                        stack_values = ",".join(stack_values)
-                        with open(
-                            f"{os.path.dirname(os.path.realpath(__file__))}/sql/update_executions_with_new_deploy_stack.sql",
-                            "r",
-                        ) as f:
-                            query = f.read().format(
-                                pr_id=os.environ["PR_ID"],
-                                commit_id=os.environ["COMMIT_ID"],
-                                base_ref=os.environ["BASE_REF"],
-                                head_ref=os.environ["HEAD_REF"],
-                                account_name=account["account_name"],
-                                account_path=account["account_path"],
-                                account_deps=",".join(account["account_deps"]),
-                                min_approval_count=account["min_approval_count"],
-                                min_rejection_count=account["min_rejection_count"],
-                                voters=",".join(account["voters"]),
-                                plan_role_arn=account["plan_role_arn"],
-                                apply_role_arn=account["apply_role_arn"],
-                                stack=stack_values,
-                            )
-                        log.debug(f"Query:\n{query}")
-
-                        cur.execute(query)
-                except Exception as e:
-                    log.info("Rolling back execution insertions")
-                    conn.rollback()
-                    raise e
+    def get_accounts(self) -> List[dict]:
+        """Returns every account_dim record within the metadb"""
+        with metadb.transaction() as cur:
+            cur.execute(
+                """
+            SELECT
+                account_name,
+                account_path,
+                account_deps::VARCHAR,
+                min_approval_count,
+                min_rejection_count,
+                voters::VARCHAR,
+                plan_role_arn,
+                apply_role_arn
+            FROM account_dim
+            ORDER BY account_name
+            """
+            )
+            cols = [desc[0] for desc in cur.description]
+            res = cur.fetchall()
+        log.debug(f"Raw accounts records:\n{json.dumps(res, indent=4)}")
+        accounts = []
+        for account in res:
+            record = dict(zip(cols, account))
+            for col in ["account_deps", "voters"]:
+                value = record[col].removeprefix("{").removesuffix("}")
+                # empty arrays are parsed into empty lists rather than [""]
+                record[col] = value.split(",") if value else []
+            accounts.append(record)
+        log.debug(f"Accounts:\n{json.dumps(accounts, indent=4)}")
+
+        return accounts
+
+    def update_executions_with_new_deploy_stack(self) -> None:
+        """
+        Creates every parent account-level directory's deployment stack and
+        inserts the stacks within the metadb in a single transaction
+        """
+        accounts = self.get_accounts()
+
+        if len(accounts) == 0:
+            Exception("No account paths are defined in account_dim")
+
+        # plan scans can detect differences made outside of the repository so
+        # only graph-based scans can skip accounts without git differences
+        if os.environ.get("SCAN_TYPE") in ["graph", "hybrid"]:
+            accounts = self.filter_changed_accounts(accounts)
+
+        # stacks are created before the transaction is opened given that the
+        # terragrunt commands can outlast the Data API transaction timeout
+        log.info("Getting account stacks")
+        account_stacks = self.create_account_stacks(accounts)
+
+        params = []
+        for account, stack in account_stacks:
+            log.info(f'Account path: {account["account_path"]}')
+            log.debug(f"Stack:\n{stack}")
+
+            if len(stack) == 0:
+                log.debug("Stack is empty -- skipping")
+                continue
+
+            for cfg in stack:
+                params.append(
+                    {
+                        "pr_id": int(os.environ["PR_ID"]),
+                        "commit_id": os.environ["COMMIT_ID"],
+                        "base_ref": os.environ["BASE_REF"],
+                        "head_ref": os.environ["HEAD_REF"],
+                        "account_name": account["account_name"],
+                        "account_path": account["account_path"],
+                        "account_deps": to_pg_array(account["account_deps"]),
+                        "min_approval_count": account["min_approval_count"],
+                        "min_rejection_count": account["min_rejection_count"],
+                        "voters": to_pg_array(account["voters"]),
+                        "plan_role_arn": account["plan_role_arn"],
+                        "apply_role_arn": account["apply_role_arn"],
+                        "cfg_path": cfg["cfg_path"],
+                        "cfg_deps": to_pg_array(cfg["cfg_deps"]),
+                        "new_providers": to_pg_array(cfg["new_providers"]),
+                    }
+                )
+
+        if len(params) == 0:
+            log.info("No executions to insert")
             return None
 
+        with open(
+            f"{os.path.dirname(os.path.realpath(__file__))}/sql/update_executions_with_new_deploy_stack.sql",
+            "r",
+        ) as f:
+            query = f.read()
+        log.debug(f"Query:\n{query}")
+
+        # the insertions are rolled back if any of them fail
+        with metadb.transaction() as cur:
+            # inserts every account's executions with a single
+            # BatchExecuteStatement request
+            log.info(f"Inserting executions: {len(params)}")
+            cur.executemany(query, params)
+        metadb.log_timings()
+
     def main(self) -> None:
         """
         When a PR that contains Terragrunt and/or Terraform changes is merged
@@ -378,10 +817,8 @@ class CreateStack:
             f"Commit status config:\n{json.dumps(commit_status_config, indent=4)}"
         )
         if commit_status_config[os.environ["STATUS_CHECK_NAME"]]:
-            commit = (
-                github.Github(os.environ["GITHUB_TOKEN"], retry=3)
-                .get_repo(os.environ["REPO_FULL_NAME"])
-                .get_commit(os.environ["COMMIT_ID"])
+            commit = get_client(os.environ["GITHUB_TOKEN"]).get_commit(
+                os.environ["REPO_FULL_NAME"], os.environ["COMMIT_ID"]
             )
 
             log.info("Sending commit status")
@@ -24,33 +24,30 @@ INSERT INTO executions (
     plan_command,
     apply_command
 )
-SELECT  -- noqa: L034, L036
-    'run-' || {pr_id} || '-' || substring('{commit_id}', 1, 4) || '-' || '{account_name}' || '-' || regexp_replace(stack.cfg_path, '.*/', '') || '-' || substr(md5(random()::text), 0, 4) AS execution_id,
+VALUES (
+    'run-' || :pr_id || '-' || substring(:commit_id, 1, 4) || '-' || :account_name || '-' || regexp_replace(:cfg_path, '.*/', '') || '-' || substr(md5(random()::text), 0, 4),
     FALSE,
-    '{commit_id}',
-    '{base_ref}',
-    '{head_ref}',
-    stack.cfg_path,
-    string_to_array(stack.cfg_deps, ',')::TEXT[],
+    :commit_id,
+    :base_ref,
+    :head_ref,
+    :cfg_path,
+    CAST(:cfg_deps AS TEXT[]),
     'waiting',
-    string_to_array(stack.new_providers, ',')::TEXT[],
+    CAST(:new_providers AS TEXT[]),
     array[]::TEXT[], -- noqa: L027, L019
-    '{account_name}',
-    '{account_path}',
-    string_to_array('{account_deps}', ','),
-    string_to_array('{voters}', ','),
+    :account_name,
+    :account_path,
+    CAST(:account_deps AS TEXT[]),
+    CAST(:voters AS TEXT[]),
     array[]::TEXT[],  -- noqa: L027, L019
-    {min_approval_count},
+    :min_approval_count,
     array[]::TEXT[],  -- noqa: L027, L019
-    {min_rejection_count},
-    '{plan_role_arn}',
-    '{apply_role_arn}',
-    {pr_id},  -- noqa: L019
-    'terragrunt plan --terragrunt-working-dir ' || stack.cfg_path
-    || ' --terragrunt-iam-role ' || '{plan_role_arn}' || ' -no-color',
-    'terragrunt apply --terragrunt-working-dir ' || stack.cfg_path
-    || ' --terragrunt-iam-role ' || '{apply_role_arn}' || ' -no-color -auto-approve'
-FROM (
-    VALUES {stack}
-) stack(cfg_path, cfg_deps, new_providers)  -- noqa: L011, L025
-RETURNING *;
+    :min_rejection_count,
+    :plan_role_arn,
+    :apply_role_arn,
+    :pr_id,
+    'terragrunt plan --terragrunt-working-dir ' || :cfg_path
+    || ' --terragrunt-iam-role ' || :plan_role_arn || ' -no-color',
+    'terragrunt apply --terragrunt-working-dir ' || :cfg_path
+    || ' --terragrunt-iam-role ' || :apply_role_arn || ' -no-color -auto-approve'
+);
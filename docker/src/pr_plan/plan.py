@@ -5,10 +5,9 @@ from pprint import pformat
 import subprocess
 import sys
 
-import github
-
 sys.path.append(os.path.dirname(__file__) + "/..")
 from common.utils import get_task_log_url, get_diff_block
+from common.github_client import get_client
 
 log = logging.getLogger(__name__)
 stream = logging.StreamHandler(sys.stdout)
@@ -28,10 +27,8 @@ def comment_pr_plan(plan: str) -> str:
 {plan_block}
 </details>
 """
-    pr = (
-        github.Github(os.environ["GITHUB_TOKEN"], retry=3)
-        .get_repo(os.environ["REPO_FULL_NAME"])
-        .get_pull(int(os.environ["PR_ID"]))
+    pr = get_client(os.environ["GITHUB_TOKEN"]).get_pull(
+        os.environ["REPO_FULL_NAME"], int(os.environ["PR_ID"])
     )
     pr.create_issue_comment(comment)
 
@@ -61,10 +58,8 @@ def main() -> None:
     commit_status_config = json.loads(os.environ["COMMIT_STATUS_CONFIG"])
     log.debug(f"Commit status config:\n{pformat(commit_status_config)}")
     if commit_status_config["PrPlan"]:
-        commit = (
-            github.Github(os.environ["GITHUB_TOKEN"], retry=3)
-            .get_repo(os.environ["REPO_FULL_NAME"])
-            .get_commit(os.environ["COMMIT_ID"])
+        commit = get_client(os.environ["GITHUB_TOKEN"]).get_commit(
+            os.environ["REPO_FULL_NAME"], os.environ["COMMIT_ID"]
         )
 
         log.info("Sending commit status")
@@ -6,8 +6,6 @@ import json
 import ast
 from typing import List
 
-import aurora_data_api
-import github
 import boto3
 
 sys.path.append(os.path.dirname(__file__) + "/..")
@@ -17,6 +15,8 @@ from common.utils import (
     get_task_log_url,
     get_diff_block,
 )
+from common.github_client import get_client
+from common.metadb import Session
 
 log = logging.getLogger(__name__)
 stream = logging.StreamHandler(sys.stdout)
@@ -68,24 +68,20 @@ def update_new_resources() -> None:
             )
 
             log.info("Adding new provider resources to associated execution record")
-            with aurora_data_api.connect(
-                aurora_cluster_arn=os.environ["AURORA_CLUSTER_ARN"],
-                secret_arn=os.environ["AURORA_SECRET_ARN"],
-                database=os.environ["METADB_NAME"],
-                rds_data_client=rds_data_client,
-            ) as conn:
-                with conn.cursor() as cur:
-                    resources = ",".join(resources)
-                    cur.execute(
-                        f"""
-                    UPDATE executions
-                    SET new_resources = string_to_array('{resources}', ',')
-                    WHERE execution_id = '{os.environ["EXECUTION_ID"]}'
-                    RETURNING new_resources
-                    """
-                    )
-
-                    log.debug(cur.fetchone())
+            metadb = Session(rds_data_client)
+            with metadb.transaction() as cur:
+                resources = ",".join(resources)
+                cur.execute(
+                    f"""
+                UPDATE executions
+                SET new_resources = string_to_array('{resources}', ',')
+                WHERE execution_id = '{os.environ["EXECUTION_ID"]}'
+                RETURNING new_resources
+                """
+                )
+
+                log.debug(cur.fetchone())
+            metadb.log_timings()
         else:
             log.info("New provider resources were not created -- skipping")
     else:
@@ -105,10 +101,8 @@ def comment_terra_run_plan(plan) -> str:
 {plan_block}
 </details>
 """
-    pr = (
-        github.Github(os.environ["GITHUB_TOKEN"], retry=3)
-        .get_repo(os.environ["REPO_FULL_NAME"])
-        .get_pull(int(os.environ["PR_ID"]))
+    pr = get_client(os.environ["GITHUB_TOKEN"]).get_pull(
+        os.environ["REPO_FULL_NAME"], int(os.environ["PR_ID"])
     )
     pr.create_issue_comment(comment)
 
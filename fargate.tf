@@ -70,8 +70,42 @@ locals {
       name  = "TF_INPUT"
       value = "false"
     },
+    {
+      name  = "SOURCE_CLONE_MODE"
+      value = var.ecs_tasks_source_clone_mode
+    },
+    {
+      name  = "SOURCE_MIRROR_PATH"
+      value = var.ecs_tasks_source_mirror_efs != null ? local.source_mirror_container_path : ""
+    },
+    {
+      name  = "PROVIDER_MIRROR_PATH"
+      value = var.ecs_tasks_source_mirror_efs != null ? "${local.source_mirror_container_path}/providers" : ""
+    },
   ]
 
+  source_mirror_volume_name    = "source-mirror"
+  source_mirror_container_path = "/mnt/source-mirror"
+  source_mirror_mount_points = var.ecs_tasks_source_mirror_efs != null ? [
+    {
+      sourceVolume  = local.source_mirror_volume_name
+      containerPath = local.source_mirror_container_path
+      readOnly      = false
+    }
+  ] : []
+
+  # pre-installs the task's Terraform/Terragrunt versions and providers within the image
+  ecs_tasks_build_args = {
+    TERRAFORM_VERSIONS  = join(" ", distinct(compact(concat([var.terraform_version], var.ecs_image_preinstalled_versions.terraform))))
+    TERRAGRUNT_VERSIONS = join(" ", distinct(compact(concat([var.terragrunt_version], var.ecs_image_preinstalled_versions.terragrunt))))
+    # <address>=<version> of every provider selected within the lock files
+    TERRAFORM_PROVIDERS = join(" ", sort(distinct(flatten([
+      for path in var.ecs_image_provider_lock_files : [
+        for m in regexall("provider \"([^\"]+)\" \\{\\s*version\\s*=\\s*\"([^\"]+)\"", file(path)) : "${m[0]}=${m[1]}"
+      ]
+    ]))))
+  }
+
   ecs_image_address      = try(docker_registry_image.ecr_ecs_tasks[0].name, var.ecs_image_address)
   repository_credentials = local.private_registry_secret_manager_arn != null ? { credentialsParameter = local.private_registry_secret_manager_arn } : null
 }
@@ -107,11 +141,12 @@ resource "docker_image" "ecr_ecs_tasks" {
   name         = "${module.ecr_ecs_tasks[0].repository_url}:${local.module_docker_img_tag}"
   keep_locally = true
   build {
-    path     = local.ecs_tasks_context
-    no_cache = true
+    path      = local.ecs_tasks_context
+    no_cache  = true
+    build_arg = local.ecs_tasks_build_args
   }
-  triggers = { for f in fileset(local.ecs_tasks_context, "**") :
-  f => filesha256(format("${local.ecs_tasks_context}/%s", f)) }
+  triggers = merge({ for f in fileset(local.ecs_tasks_context, "**") :
+  f => filesha256(format("${local.ecs_tasks_context}/%s", f)) }, local.ecs_tasks_build_args)
 }
 
 resource "docker_tag" "ecr_ecs_tasks" {
@@ -209,6 +244,7 @@ resource "aws_ecs_task_definition" "pr_plan" {
       image                 = local.ecs_image_address
       command               = ["python", "/src/pr_plan/plan.py"]
       repositoryCredentials = local.repository_credentials
+      mountPoints           = local.source_mirror_mount_points
       portMappings = [
         {
           containerPort = 80
@@ -264,6 +300,17 @@ resource "aws_ecs_task_definition" "pr_plan" {
   task_role_arn            = module.pr_plan_role.role_arn
   network_mode             = "awsvpc"
   requires_compatibilities = ["FARGATE"]
+  dynamic "volume" {
+    for_each = var.ecs_tasks_source_mirror_efs != null ? [var.ecs_tasks_source_mirror_efs] : []
+    content {
+      name = local.source_mirror_volume_name
+      efs_volume_configuration {
+        file_system_id     = volume.value.file_system_id
+        root_directory     = volume.value.root_directory
+        transit_encryption = "ENABLED"
+      }
+    }
+  }
   runtime_platform {
     operating_system_family = "LINUX"
     cpu_architecture        = "X86_64"
@@ -281,7 +328,7 @@ module "create_deploy_stack_role" {
     aws_iam_policy.ecs_plan.arn,
     var.tf_state_read_access_policy
   ]
-  statements = [
+  statements = concat([
     {
       sid       = "CrossAccountTerraformPlanAccess"
       effect    = "Allow"
@@ -294,7 +341,20 @@ module "create_deploy_stack_role" {
       actions   = ["lambda:InvokeFunction"]
       resources = [module.lambda_trigger_sf.lambda_function_arn]
     }
-  ]
+    ], var.create_deploy_stack_graph_cache_bucket != null ? [
+    {
+      sid       = "GraphCacheAccess"
+      effect    = "Allow"
+      actions   = ["s3:GetObject", "s3:PutObject"]
+      resources = ["arn:aws:s3:::${var.create_deploy_stack_graph_cache_bucket}/graph-cache/*"]
+    },
+    {
+      sid       = "GraphCacheListAccess"
+      effect    = "Allow"
+      actions   = ["s3:ListBucket"]
+      resources = ["arn:aws:s3:::${var.create_deploy_stack_graph_cache_bucket}"]
+    }
+  ] : [])
   trusted_services = ["ecs-tasks.amazonaws.com"]
 }
 
@@ -307,6 +367,7 @@ resource "aws_ecs_task_definition" "create_deploy_stack" {
       image                 = local.ecs_image_address
       command               = ["python", "/src/create_deploy_stack/create_deploy_stack.py"]
       repositoryCredentials = local.repository_credentials
+      mountPoints           = local.source_mirror_mount_points
       portMappings = [
         {
           containerPort = 80
@@ -377,6 +438,22 @@ resource "aws_ecs_task_definition" "create_deploy_stack" {
         {
           name  = "LOG_STREAM_PREFIX"
           value = local.create_deploy_stack_log_stream_prefix
+        },
+        {
+          name  = "CREATE_STACK_ACCOUNT_CONCURRENCY"
+          value = tostring(var.create_deploy_stack_account_concurrency)
+        },
+        {
+          name  = "CREATE_STACK_PATH_CONCURRENCY"
+          value = tostring(var.create_deploy_stack_path_concurrency)
+        },
+        {
+          name  = "GRAPH_DEPS_EXTRACTOR"
+          value = var.create_deploy_stack_graph_deps_extractor
+        },
+        {
+          name  = "GRAPH_CACHE_URI"
+          value = var.create_deploy_stack_graph_cache_bucket != null ? "s3://${var.create_deploy_stack_graph_cache_bucket}/graph-cache" : ""
         }
       ])
     }
@@ -387,6 +464,17 @@ resource "aws_ecs_task_definition" "create_deploy_stack" {
   task_role_arn            = module.create_deploy_stack_role.role_arn
   network_mode             = "awsvpc"
   requires_compatibilities = ["FARGATE"]
+  dynamic "volume" {
+    for_each = var.ecs_tasks_source_mirror_efs != null ? [var.ecs_tasks_source_mirror_efs] : []
+    content {
+      name = local.source_mirror_volume_name
+      efs_volume_configuration {
+        file_system_id     = volume.value.file_system_id
+        root_directory     = volume.value.root_directory
+        transit_encryption = "ENABLED"
+      }
+    }
+  }
   runtime_platform {
     operating_system_family = "LINUX"
     cpu_architecture        = "X86_64"
@@ -444,6 +532,7 @@ resource "aws_ecs_task_definition" "terra_run" {
       image                 = local.ecs_image_address
       command               = ["python", "/src/terra_run/run.py"]
       repositoryCredentials = local.repository_credentials
+      mountPoints           = local.source_mirror_mount_points
       portMappings = [
         {
           containerPort = 80
@@ -507,6 +596,17 @@ resource "aws_ecs_task_definition" "terra_run" {
   execution_role_arn       = module.ecs_execution_role.role_arn
   network_mode             = "awsvpc"
   requires_compatibilities = ["FARGATE"]
+  dynamic "volume" {
+    for_each = var.ecs_tasks_source_mirror_efs != null ? [var.ecs_tasks_source_mirror_efs] : []
+    content {
+      name = local.source_mirror_volume_name
+      efs_volume_configuration {
+        file_system_id     = volume.value.file_system_id
+        root_directory     = volume.value.root_directory
+        transit_encryption = "ENABLED"
+      }
+    }
+  }
   runtime_platform {
     operating_system_family = "LINUX"
     cpu_architecture        = "X86_64"
@@ -11,11 +11,14 @@ from utils import (
     get_email_approval_sig,
     voter_actions,
 )  # noqa : E402
+from ssm_cache import ParameterCache  # noqa : E402
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
 ssm = boto3.client("ssm")
+# reused across the approval requests sent by the warm Lambda container
+parameters = ParameterCache(ssm, [os.environ.get("EMAIL_APPROVAL_SECRET_SSM_KEY")])
 
 
 def get_ses_urls(msg: dict, secret: str, recipient: str) -> dict:
@@ -129,10 +132,9 @@ def lambda_handler(event, context):
     msg = json.loads(event["Records"][0]["Sns"]["Message"])
 
     # secret used for generating signature query param
-    secret = ssm.get_parameter(
-        Name=os.environ["EMAIL_APPROVAL_SECRET_SSM_KEY"], WithDecryption=True
-    )["Parameter"]["Value"]
+    secret = parameters.get(os.environ["EMAIL_APPROVAL_SECRET_SSM_KEY"])
 
     res = send_approval(msg, secret)
+    parameters.log_metrics()
 
     return res
@@ -0,0 +1,114 @@
+import os
+import time
+import logging
+from typing import Dict, List
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+# maximum amount of names a SSM GetParameters call accepts
+MAX_BATCH_SIZE = 10
+DEFAULT_TTL = 300
+
+
+class ParameterCache:
+    """
+    SSM Parameter Store cache that keeps parameter values for the lifetime of
+    the warm Lambda container. The container's parameters are fetched together
+    within batched GetParameters calls (e.g. at cold start) and are refreshed
+    once their TTL expires.
+    """
+
+    def __init__(
+        self,
+        ssm_client,
+        names: List[str] = None,
+        ttl: int = None,
+        ttls: Dict[str, int] = None,
+    ):
+        """
+        Arguments:
+            ssm_client: Boto3 SSM client
+            names: Parameter names that are fetched together once any of them
+                is requested and missing or expired. Undefined names (e.g.
+                unset env vars) are ignored.
+            ttl: Seconds a parameter value is cached for. Defaults to the
+                SSM_CACHE_TTL env var or 300 seconds.
+            ttls: Mapping of parameter names and TTLs that override `ttl`.
+                Parameters with a TTL of 0 are fetched every time they are
+                requested (e.g. merge lock).
+        """
+        self.ssm = ssm_client
+        self.names = [name for name in names or [] if name]
+        self.ttl = (
+            ttl
+            if ttl is not None
+            else int(os.environ.get("SSM_CACHE_TTL", DEFAULT_TTL))
+        )
+        self.ttls = {name: ttl for name, ttl in (ttls or {}).items() if name}
+        self.hits = 0
+        self.misses = 0
+        self._values = {}
+
+    def get_ttl(self, name: str) -> int:
+        """Returns the parameter's TTL in seconds"""
+        return self.ttls.get(name, self.ttl)
+
+    def _is_expired(self, name: str, now: float) -> bool:
+        if name not in self._values:
+            return True
+        return now - self._values[name][1] >= self.get_ttl(name)
+
+    def fetch(self, names: List[str]) -> None:
+        """
+        Fetches and caches the decrypted parameter values
+
+        Arguments:
+            names: Parameter names
+        """
+        for i in range(0, len(names), MAX_BATCH_SIZE):
+            res = self.ssm.get_parameters(
+                Names=names[i : i + MAX_BATCH_SIZE], WithDecryption=True
+            )
+            fetched_at = time.monotonic()
+            for param in res["Parameters"]:
+                self._values[param["Name"]] = (param["Value"], fetched_at)
+
+            if len(res.get("InvalidParameters", [])) > 0:
+                log.error(f"Invalid SSM parameters: {res['InvalidParameters']}")
+
+    def get(self, name: str) -> str:
+        """
+        Returns the parameter's value from the cache. If the value is missing
+        or expired, the value is fetched along with every other missing or
+        expired parameter of the cache.
+
+        Arguments:
+            name: Parameter name
+        """
+        now = time.monotonic()
+        if not self._is_expired(name, now):
+            self.hits += 1
+            return self._values[name][0]
+
+        self.misses += 1
+        self.fetch(
+            [name]
+            + [
+                other
+                for other in self.names
+                if other != name
+                and self.get_ttl(other) > 0
+                and self._is_expired(other, now)
+            ]
+        )
+        if name not in self._values:
+            raise KeyError(f"SSM parameter does not exist: {name}")
+
+        return self._values[name][0]
+
+    def log_metrics(self) -> None:
+        """Logs the cache hits and misses and resets them"""
+        log.info(f"SSM parameter cache -- Hits: {self.hits} -- Misses: {self.misses}")
+        self.hits = 0
+        self.misses = 0
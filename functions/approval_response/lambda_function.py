@@ -10,7 +10,7 @@ from mangum import Mangum
 sys.path.append(os.path.dirname(__file__))
 from app import update_vote
 from exceptions import InvalidSignatureError, ExpiredVote
-from models import SESEvent
+from models import SESEvent, parameters
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
@@ -67,6 +67,7 @@ async def log_exchange(request: Request, call_next):
     log.debug(f"Method: {request.method} Path: {request.url.path}")
     response = await call_next(request)
     log.debug(f"Status Code: {response.status_code}")
+    parameters.log_metrics()
 
     return response
 
@@ -9,8 +9,11 @@ from pydantic import BaseModel, Field, Extra, Json, root_validator, validator
 sys.path.append(os.path.dirname(__file__))
 from exceptions import InvalidSignatureError, ExpiredVote
 from utils import aws_decode, get_email_approval_sig
+from ssm_cache import ParameterCache
 
 ssm = boto3.client("ssm", endpoint_url=os.environ.get("SSM_ENDPOINT_URL"))
+# reused across the votes handled by the warm Lambda container
+parameters = ParameterCache(ssm, [os.environ.get("EMAIL_APPROVAL_SECRET_SSM_KEY")])
 sf = boto3.client("stepfunctions", endpoint_url=os.environ.get("SF_ENDPOINT_URL"))
 
 
@@ -33,9 +36,7 @@ class QueryStringParameters(BaseModel):
         if not values["X-SES-Signature-256"].startswith("sha256="):
             raise InvalidSignatureError("Signature is not a valid sha256 value")
 
-        secret = ssm.get_parameter(
-            Name=os.environ["EMAIL_APPROVAL_SECRET_SSM_KEY"], WithDecryption=True
-        )["Parameter"]["Value"]
+        secret = parameters.get(os.environ["EMAIL_APPROVAL_SECRET_SSM_KEY"])
 
         expected_sig = get_email_approval_sig(
             secret, values["ex"], aws_decode(values["recipient"]), values["action"]
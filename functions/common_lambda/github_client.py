@@ -0,0 +1,337 @@
+import time
+import logging
+import threading
+from collections import deque, OrderedDict
+from functools import lru_cache
+from types import SimpleNamespace
+
+import github
+from github.Commit import Commit
+from github.PullRequest import PullRequest
+from github.Repository import Repository
+from github.Requester import (
+    HTTPRequestsConnectionClass,
+    HTTPSRequestsConnectionClass,
+    RequestsResponse,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+DEFAULT_BASE_URL = "https://api.github.com"
+# remaining primary rate limit requests at which requests wait for the reset
+DEFAULT_MIN_REMAINING = 50
+# GitHub's secondary rate limits restrict concurrent requests and content
+# creating requests (e.g. commit statuses, comments) per minute
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_MAX_MUTATIONS_PER_MINUTE = 60
+# maximum seconds a request waits for a rate limit
+DEFAULT_MAX_WAIT = 60
+# maximum amount of GET responses kept for ETag revalidation
+DEFAULT_MAX_CACHED_RESPONSES = 256
+MUTATING_VERBS = ["POST", "PATCH", "PUT", "DELETE"]
+# PyGithub version whose private requester attributes the client patches
+PYGITHUB_VERSION = "1.54.1"
+
+
+class _Connection:
+    """
+    PyGithub connection that sends its requests through the client. PyGithub
+    shares one connection per requester so the pending request is kept per
+    thread.
+    """
+
+    client = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+
+    def request(self, verb, url, input, headers):
+        self._local.request = (verb, url, input, headers)
+
+    def getresponse(self):
+        verb, url, input, headers = self._local.request
+        return self.client.send(
+            self.session,
+            verb,
+            f"{self.protocol}://{self.host}:{self.port}{url}",
+            input,
+            headers,
+            timeout=self.timeout,
+            verify=self.verify,
+        )
+
+
+class GitHubClient:
+    """
+    PyGithub client that's shared by the GitHub calls of the process. The
+    client keeps one HTTP session, memoizes repository, commit and pull request
+    handles, revalidates GET responses with their ETags and throttles requests
+    before the primary and secondary rate limits are hit.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = DEFAULT_BASE_URL,
+        min_remaining: int = DEFAULT_MIN_REMAINING,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_mutations_per_minute: int = DEFAULT_MAX_MUTATIONS_PER_MINUTE,
+        max_wait: int = DEFAULT_MAX_WAIT,
+        retry: int = 3,
+        max_cached_responses: int = DEFAULT_MAX_CACHED_RESPONSES,
+    ):
+        """
+        Arguments:
+            token: GitHub token
+            base_url: GitHub API URL
+            min_remaining: Remaining primary rate limit requests at which
+                requests wait until the rate limit resets
+            max_concurrency: Maximum amount of concurrent requests
+            max_mutations_per_minute: Maximum amount of POST, PATCH, PUT and
+                DELETE requests within a minute
+            max_wait: Maximum seconds a request waits for a rate limit
+            retry: Amount of retries for failed connections
+            max_cached_responses: Maximum amount of GET responses that are
+                cached for ETag revalidation. The least recently used
+                responses are evicted first.
+        """
+        self.gh = github.Github(login_or_token=token, base_url=base_url, retry=retry)
+        self.min_remaining = min_remaining
+        self.max_mutations_per_minute = max_mutations_per_minute
+        self.max_wait = max_wait
+        self.max_cached_responses = max_cached_responses
+
+        self.rate_remaining = None
+        self.rate_reset = 0
+        self.metrics = {"requests": 0, "not_modified": 0, "throttled": 0}
+
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._mutations = deque()
+        self._etags = OrderedDict()
+        self._repos = {}
+        self._commits = {}
+        self._pulls = {}
+
+        # PyGithub creates one connection for the requester from the
+        # requester's connection class. The attributes are private and name
+        # mangled so PyGithub is pinned to 1.54.1 within every requirements
+        # file that installs it and the client fails loudly instead of
+        # silently sending requests without its throttling if they're missing.
+        self._requester = getattr(self.gh, "_Github__requester", None)
+        if not hasattr(self._requester, "_Requester__connectionClass"):
+            raise RuntimeError(
+                f"PyGithub requester attributes are missing -- GitHubClient requires PyGithub=={PYGITHUB_VERSION}"
+            )
+        base = (
+            HTTPSRequestsConnectionClass
+            if base_url.startswith("https")
+            else HTTPRequestsConnectionClass
+        )
+        self._requester._Requester__connectionClass = type(
+            "Connection", (_Connection, base), {"client": self}
+        )
+
+    def _wait(self, seconds: float, reason: str) -> None:
+        seconds = min(seconds, self.max_wait)
+        log.warning(f"Waiting {seconds:.1f}s for GitHub {reason}")
+        with self._lock:
+            self.metrics["throttled"] += 1
+        time.sleep(seconds)
+
+    def _throttle(self, verb: str) -> None:
+        now = time.time()
+        wait = 0
+        with self._lock:
+            if (
+                self.rate_remaining is not None
+                and self.rate_remaining <= self.min_remaining
+                and self.rate_reset > now
+            ):
+                wait = self.rate_reset - now
+
+            if verb in MUTATING_VERBS:
+                while len(self._mutations) > 0 and now - self._mutations[0] >= 60:
+                    self._mutations.popleft()
+                if len(self._mutations) >= self.max_mutations_per_minute:
+                    wait = max(wait, 60 - (now - self._mutations[0]))
+                self._mutations.append(now + wait)
+
+        if wait > 0:
+            self._wait(wait, "rate limit")
+
+    def _update_rate_limit(self, headers) -> None:
+        with self._lock:
+            self.metrics["requests"] += 1
+            if "x-ratelimit-remaining" in headers:
+                self.rate_remaining = int(headers["x-ratelimit-remaining"])
+            if "x-ratelimit-reset" in headers:
+                self.rate_reset = int(headers["x-ratelimit-reset"])
+
+    def send(self, session, verb: str, url: str, input, headers: dict, **kwargs):
+        """
+        Sends the PyGithub request and returns the response. GET requests
+        with a cached ETag are sent as conditional requests which don't count
+        against the primary rate limit if the resource is unchanged.
+
+        Arguments:
+            session: Requests session of the PyGithub connection
+            verb: HTTP method
+            url: Absolute request URL
+            input: Encoded request body
+            headers: Request headers
+            kwargs: Additional requests arguments
+        """
+        key = (url, headers.get("Accept"))
+        cached = None
+        if verb == "GET":
+            with self._lock:
+                cached = self._etags.get(key)
+                if cached:
+                    self._etags.move_to_end(key)
+        if cached:
+            headers = {**headers, "If-None-Match": cached[0]}
+
+        for attempt in range(2):
+            self._throttle(verb)
+            with self._semaphore:
+                res = session.request(
+                    verb,
+                    url,
+                    headers=headers,
+                    data=input,
+                    allow_redirects=False,
+                    **kwargs,
+                )
+            self._update_rate_limit(res.headers)
+
+            # secondary rate limit responses define when to retry
+            if (
+                res.status_code in [403, 429]
+                and "retry-after" in res.headers
+                and attempt == 0
+            ):
+                self._wait(int(res.headers["retry-after"]), "secondary rate limit")
+                continue
+            break
+
+        if res.status_code == 304 and cached:
+            with self._lock:
+                self.metrics["not_modified"] += 1
+            cached_headers = {**cached[1]}
+            cached_headers.update(
+                {
+                    k.lower(): v
+                    for k, v in res.headers.items()
+                    if k.lower().startswith("x-ratelimit")
+                }
+            )
+            return RequestsResponse(
+                SimpleNamespace(status_code=200, headers=cached_headers, text=cached[2])
+            )
+
+        if verb == "GET" and res.status_code == 200 and "etag" in res.headers:
+            with self._lock:
+                self._etags[key] = (
+                    res.headers["etag"],
+                    {k.lower(): v for k, v in res.headers.items()},
+                    res.text,
+                )
+                self._etags.move_to_end(key)
+                # bounds the memory of the cache that lives as long as the
+                # warm Lambda container
+                while len(self._etags) > self.max_cached_responses:
+                    self._etags.popitem(last=False)
+
+        return RequestsResponse(res)
+
+    def get_repo(self, full_name: str) -> Repository:
+        """
+        Returns the repository's handle without requesting the repository
+
+        Arguments:
+            full_name: Full name of the repository (e.g. user/repo)
+        """
+        if full_name not in self._repos:
+            self._repos[full_name] = self.gh.get_repo(full_name, lazy=True)
+        return self._repos[full_name]
+
+    def get_commit(self, full_name: str, sha: str) -> Commit:
+        """
+        Returns the commit's handle without requesting the commit. The handle
+        can be used for creating commit statuses.
+
+        Arguments:
+            full_name: Full name of the repository
+            sha: Commit ID
+        """
+        key = (full_name, sha)
+        if key not in self._commits:
+            self._commits[key] = Commit(
+                self._requester,
+                {},
+                {"sha": sha, "url": f"{self.get_repo(full_name).url}/commits/{sha}"},
+                completed=False,
+            )
+        return self._commits[key]
+
+    def get_branch_commit(self, full_name: str, branch: str) -> Commit:
+        """
+        Returns the handle of the branch's head commit. The branch is
+        requested every time given its head can change but is revalidated
+        with its ETag.
+
+        Arguments:
+            full_name: Full name of the repository
+            branch: Branch name
+        """
+        sha = self.get_repo(full_name).get_branch(branch).commit.sha
+        return self.get_commit(full_name, sha)
+
+    def get_pull(self, full_name: str, number: int) -> PullRequest:
+        """
+        Returns the pull request's handle without requesting the pull request.
+        The handle can be used for listing the pull request's files and
+        creating comments.
+
+        Arguments:
+            full_name: Full name of the repository
+            number: Pull request number
+        """
+        key = (full_name, number)
+        if key not in self._pulls:
+            url = self.get_repo(full_name).url
+            self._pulls[key] = PullRequest(
+                self._requester,
+                {},
+                {
+                    "number": number,
+                    "url": f"{url}/pulls/{number}",
+                    "issue_url": f"{url}/issues/{number}",
+                },
+                completed=False,
+            )
+        return self._pulls[key]
+
+    def log_metrics(self) -> None:
+        """Logs the request metrics and resets them"""
+        with self._lock:
+            log.info(
+                f"GitHub requests: {self.metrics['requests']} -- Not modified: {self.metrics['not_modified']} -- Throttled: {self.metrics['throttled']} -- Rate limit remaining: {self.rate_remaining}"
+            )
+            self.metrics = {"requests": 0, "not_modified": 0, "throttled": 0}
+
+
+@lru_cache(maxsize=None)
+def get_client(token: str, base_url: str = DEFAULT_BASE_URL) -> GitHubClient:
+    """
+    Returns the client that's shared by the process's GitHub calls for the
+    token
+
+    Arguments:
+        token: GitHub token
+        base_url: GitHub API URL
+    """
+    return GitHubClient(token, base_url)
@@ -0,0 +1,193 @@
+import os
+import re
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, List, Tuple
+
+import aurora_data_api
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+# advisory lock that prevents concurrent cold starts from applying the same
+# migrations at once
+MIGRATION_LOCK_ID = 7260154
+
+
+class TimedCursor:
+    """Aurora Data API cursor wrapper that records the duration of every statement"""
+
+    def __init__(self, cursor, timings: List[dict]):
+        """
+        Arguments:
+            cursor: Aurora Data API cursor
+            timings: List to append each statement's timing to
+        """
+        self._cursor = cursor
+        self._timings = timings
+
+    def _record(self, operation: str, start: float) -> None:
+        duration = (time.perf_counter() - start) * 1000
+        statement = " ".join(operation.split())[:100]
+        self._timings.append({"statement": statement, "duration_ms": duration})
+        log.debug(f"Statement duration: {duration:.1f}ms -- {statement}")
+
+    def execute(self, operation: str, parameters: Any = None):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, parameters)
+        finally:
+            self._record(operation, start)
+
+    def executemany(self, operation: str, seq_of_parameters: List[Any]):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_of_parameters)
+        finally:
+            self._record(operation, start)
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+
+def get_migrations(migrations_dir: str) -> List[Tuple[int, str, str]]:
+    """
+    Returns the version, name and path of every migration within the directory
+    sorted by version. Migration files are named <version>_<name>.sql
+    (e.g. 0001_get_target_execution_ids.sql).
+
+    Arguments:
+        migrations_dir: Directory that contains the migration files
+    """
+    migrations = []
+    for filename in os.listdir(migrations_dir):
+        match = re.match(r"^(\d+)_(.+)\.sql$", filename)
+        if match:
+            migrations.append(
+                (
+                    int(match.group(1)),
+                    match.group(2),
+                    os.path.join(migrations_dir, filename),
+                )
+            )
+
+    return sorted(migrations)
+
+
+def get_schema_version(cur) -> int:
+    """Returns the latest applied migration version"""
+    cur.execute('SELECT COALESCE(MAX("version"), 0) FROM schema_migrations')
+    return cur.fetchone()[0]
+
+
+def migrate(conn, migrations_dir: str) -> List[int]:
+    """
+    Applies the migrations that are newer than the metadb's schema version
+    within one transaction and returns the applied versions. If the schema is
+    up to date, only the schema version is read.
+
+    Arguments:
+        conn: Aurora Data API connection
+        migrations_dir: Directory that contains the migration files
+    """
+    migrations = get_migrations(migrations_dir)
+    applied = []
+    try:
+        with conn.cursor() as cur:
+            version = get_schema_version(cur)
+            if len(migrations) > 0 and migrations[-1][0] > version:
+                cur.execute(f"SELECT pg_advisory_xact_lock({MIGRATION_LOCK_ID})")
+                # another container may have applied the migrations while
+                # the lock was being acquired
+                version = get_schema_version(cur)
+                for migration_version, name, path in migrations:
+                    if migration_version <= version:
+                        continue
+                    log.info(f"Applying metadb migration: {migration_version}_{name}")
+                    with open(path, "r") as f:
+                        cur.execute(f.read())
+                    cur.execute(
+                        'INSERT INTO schema_migrations ("version", "name") VALUES (:version, :name)',
+                        {"version": migration_version, "name": name},
+                    )
+                    applied.append(migration_version)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    log.debug(f"Metadb schema version: {max([version] + applied)}")
+    return applied
+
+
+class Session:
+    """
+    Metadb session that keeps one Aurora Data API connection for the lifetime
+    of the warm Lambda container instead of connecting within every function
+    """
+
+    def __init__(self, rds_data_client, migrations_dir: str = None, **connect_kwargs):
+        """
+        Arguments:
+            rds_data_client: Boto3 RDS Data API client
+            migrations_dir: Directory that contains the migrations that are
+                applied once the session first connects (cold start)
+            connect_kwargs: Additional aurora_data_api.connect() arguments
+                (e.g. aurora_cluster_arn, secret_arn). The database defaults
+                to the METADB_NAME env var.
+        """
+        self.rds_data_client = rds_data_client
+        self.migrations_dir = migrations_dir
+        self.connect_kwargs = connect_kwargs
+        self.timings = []
+        self._conn = None
+        self._cur = None
+
+    def connect(self):
+        """Returns the session's connection and connects if it isn't connected"""
+        if self._conn is None:
+            log.debug("Connecting to metadb")
+            conn = aurora_data_api.connect(
+                rds_data_client=self.rds_data_client,
+                **{"database": os.environ["METADB_NAME"], **self.connect_kwargs},
+            )
+            if self.migrations_dir:
+                migrate(conn, self.migrations_dir)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yields a cursor within a transaction that's committed once the
+        outermost transaction() block exits or rolled back if it raises.
+        Nested transaction() blocks join the outermost transaction so a
+        handler can run the work of multiple functions within one transaction.
+        """
+        if self._cur is not None:
+            yield self._cur
+            return
+
+        conn = self.connect()
+        self._cur = TimedCursor(conn.cursor(), self.timings)
+        try:
+            yield self._cur
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception as e:
+                # reconnects within the next transaction given the
+                # connection's state is unknown
+                log.error(f"Transaction rollback failed: {e}")
+                self._conn = None
+            raise
+        finally:
+            self._cur = None
+
+    def log_timings(self) -> None:
+        """Logs the recorded statement timings and resets them"""
+        total = sum(timing["duration_ms"] for timing in self.timings)
+        log.info(f"Metadb statements: {len(self.timings)} -- Total: {total:.1f}ms")
+        self.timings.clear()
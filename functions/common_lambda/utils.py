@@ -1,8 +1,11 @@
+import os
 import hashlib
 import hmac
 import re
 import urllib.parse
 import urllib
+from collections import defaultdict
+from typing import List, Tuple, Dict
 
 
 class ClientException(Exception):
@@ -51,3 +54,81 @@ def get_email_approval_sig(
     ).hexdigest()
 
     return sig
+
+
+class PathTrie:
+    """
+    Prefix trie of directory paths used to find which of the registered
+    directories contain a file in a single walk of the file's path instead of
+    matching the file against every directory
+    """
+
+    def __init__(self, paths: List[str], extensions: Tuple[str] = (".hcl", ".tf")):
+        """
+        Arguments:
+            paths: Directory paths relative to the root of the repository
+            extensions: File extensions that are matched
+        """
+        self.root = {}
+        self.extensions = extensions
+        for path in paths:
+            node = self.root
+            for part in path.strip("/").split("/"):
+                node = node.setdefault(part, {})
+            # slash is used as the key for the registered path given that it
+            # can't collide with a directory name
+            node["/"] = path
+
+    def match(self, filename: str) -> List[str]:
+        """
+        Returns the registered paths that contain the file. Nested paths are
+        all returned ordered from outermost to innermost.
+
+        Arguments:
+            filename: File path relative to the root of the repository
+        """
+        if not filename.endswith(self.extensions):
+            return []
+
+        matches = []
+        node = self.root
+        for part in filename.split("/")[:-1]:
+            node = node.get(part)
+            if node is None:
+                break
+            if "/" in node:
+                matches.append(node["/"])
+
+        return matches
+
+    def group(self, filenames: List[str]) -> Dict[str, List[str]]:
+        """
+        Returns a mapping of each registered path and the unique parent
+        directories of the files it contains
+
+        Arguments:
+            filenames: File paths relative to the root of the repository
+        """
+        groups = defaultdict(set)
+        for filename in filenames:
+            for path in self.match(filename):
+                groups[path].add(os.path.dirname(filename))
+
+        return {path: list(dirs) for path, dirs in groups.items()}
+
+
+def to_pg_array(values: List[str]) -> str:
+    """
+    Returns the PostgreSQL array literal of the values that can be passed as a
+    query parameter and casted to TEXT[] (e.g. CAST(:param AS TEXT[]))
+
+    Arguments:
+        values: List of strings
+    """
+    return (
+        "{"
+        + ",".join(
+            '"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values
+        )
+        + "}"
+    )
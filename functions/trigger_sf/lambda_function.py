@@ -2,23 +2,53 @@ import os
 import sys
 import logging
 import json
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
 import boto3
 import aurora_data_api
-import github
 
 sys.path.append(os.path.dirname(__file__))
-from utils import ClientException
+from utils import ClientException, ServerException, to_pg_array
+from metadb import Session
+from ssm_cache import ParameterCache
+from github_client import get_client
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
 sf = boto3.client("stepfunctions")
 ssm = boto3.client("ssm")
+# the merge lock is updated by this function and the webhook receiver so its
+# value isn't cached
+parameters = ParameterCache(
+    ssm,
+    [os.environ.get("GITHUB_TOKEN_SSM_KEY")],
+    ttls={os.environ.get("GITHUB_MERGE_LOCK_SSM_KEY"): 0},
+)
 rds_data_client = boto3.client(
     "rds-data", endpoint_url=os.environ.get("METADB_ENDPOINT_URL")
 )
+# reused across invocations of the warm Lambda container and installs the
+# scheduler's SQL functions once the container first connects
+metadb = Session(
+    rds_data_client,
+    migrations_dir=f"{os.path.dirname(os.path.realpath(__file__))}/sql/migrations",
+)
+
+
+def get_execution_arn(execution_id: str) -> str:
+    """
+    Returns the ARN of the Step Function execution that's named after the
+    execution ID
+
+    Arguments:
+        execution_id: Execution ID used as the Step Function execution name
+    """
+    return (
+        os.environ["STATE_MACHINE_ARN"].replace(":stateMachine:", ":execution:", 1)
+        + f":{execution_id}"
+    )
 
 
 class ExecutionFinished:
@@ -52,9 +82,7 @@ class ExecutionFinished:
 
     def update_status(self) -> None:
         """Updates finished Step Function execution's associated metadb record status"""
-        with aurora_data_api.connect(
-            database=os.environ["METADB_NAME"], rds_data_client=rds_data_client
-        ) as conn, conn.cursor() as cur:
+        with metadb.transaction() as cur:
             log.info("Updating execution record status")
             cur.execute(
                 f"""
@@ -66,18 +94,15 @@ class ExecutionFinished:
 
     def send_commit_status(self) -> None:
         """Sends a GitHub commit status to the execution's associated commit"""
-        token = ssm.get_parameter(
-            Name=os.environ["GITHUB_TOKEN_SSM_KEY"], WithDecryption=True
-        )["Parameter"]["Value"]
+        token = parameters.get(os.environ["GITHUB_TOKEN_SSM_KEY"])
 
         if self.status in ["failed", "aborted"]:
             state = "failure"
         else:
             state = "success"
 
-        gh = github.Github(token)
-        gh.get_repo(os.environ["REPO_FULL_NAME"]).get_commit(
-            self.commit_id
+        get_client(token).get_commit(
+            os.environ["REPO_FULL_NAME"], self.commit_id
         ).create_status(
             state=state,
             description="Step Function Execution",
@@ -86,9 +111,7 @@ class ExecutionFinished:
         )
 
     def create_rollback_records(self) -> None:
-        with aurora_data_api.connect(
-            database=os.environ["METADB_NAME"], rds_data_client=rds_data_client
-        ) as conn, conn.cursor() as cur:
+        with metadb.transaction() as cur:
             with open(
                 f"{os.path.dirname(os.path.realpath(__file__))}/sql/update_executions_with_new_rollback_stack.sql",
                 "r",
@@ -103,38 +126,45 @@ class ExecutionFinished:
                     ]
                     log.debug(f"Rollback records:\n{rollback_records}")
 
-    def abort_sf_executions(self, ids):
-        """Aborts running Step Function executions with passed id"""
-        sf = boto3.client("stepfunctions")
+    def abort_sf_executions(self, ids: List[str]) -> None:
+        """
+        Aborts running Step Function executions with passed id. The execution
+        ARNs are built from the state machine ARN and the execution IDs given
+        the execution IDs are used as the execution names so no executions
+        need to be listed. The executions are stopped concurrently with the
+        amount of concurrent calls limited by the SF_STOP_CONCURRENCY env var
+        (at least one).
+
+        Arguments:
+            ids: Execution IDs to abort
+        """
+        if len(ids) == 0:
+            return
+
         log.info("Aborting Step Function executions")
-        for _id in ids:
-            log.debug(f"Execution ID: {_id}")
+
+        def stop(_id):
+            execution_arn = get_execution_arn(_id)
+            log.debug(f"Execution ARN: {execution_arn}")
             try:
-                execution_arn = [
-                    execution["executionArn"]
-                    for execution in sf.list_executions(
-                        stateMachineArn=os.environ["STATE_MACHINE_ARN"]
-                    )["executions"]
-                    if execution["name"] == _id
-                ][0]
-            except IndexError:
+                sf.stop_execution(
+                    executionArn=execution_arn,
+                    error="DependencyError",
+                    cause=f"cfg_path dependency failed: {self.cfg_path}",
+                )
+            except sf.exceptions.ExecutionDoesNotExist:
                 log.debug(
                     f"Step Function execution for execution ID does not exist: {_id}"
                 )
-                continue
-            log.debug(f"Execution ARN: {execution_arn}")
 
-            sf.stop_execution(
-                executionArn=execution_arn,
-                error="DependencyError",
-                cause=f"cfg_path dependency failed: {self.cfg_path}",
-            )
+        max_workers = max(1, int(os.environ.get("SF_STOP_CONCURRENCY", 10)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # consumes the results to raise any unexpected exceptions
+            list(executor.map(stop, ids))
 
     def abort_commit_records(self) -> List[str]:
         """Sets metadb record status value to "aborted" for all records with specified commit ID"""
-        with aurora_data_api.connect(
-            database=os.environ["METADB_NAME"], rds_data_client=rds_data_client
-        ) as conn, conn.cursor() as cur:
+        with metadb.transaction() as cur:
             cur.execute(
                 f"""
             UPDATE executions
@@ -151,21 +181,23 @@ class ExecutionFinished:
         log.debug(f"Results: {results}")
         return [r[0] for r in results if r[0] is not None]
 
-    def handle_failed_execution(self) -> None:
+    def handle_failed_execution(self) -> List[str]:
         """
         Updates the Step Function's associated metadb record status and handles
-        the case where the Step Function execution fails or is aborted
+        the case where the Step Function execution fails or is aborted. Returns
+        the execution IDs of the aborted records whose Step Function executions
+        need to be stopped once the metadb changes are committed.
         """
         if self.status in ["failed", "aborted"]:
             if not self.is_rollback:
                 log.info("Aborting all deployments for commit")
                 aborted_ids = self.abort_commit_records()
 
-                self.abort_sf_executions(aborted_ids)
-
                 log.info("Creating rollback executions if needed")
                 self.create_rollback_records()
 
+                return aborted_ids
+
             elif self.is_rollback:
                 # not aborting waiting and running rollback executions to allow CI flow
                 # to continue after admin intervention since future PR deployments
@@ -174,17 +206,19 @@ class ExecutionFinished:
                     "Rollback execution failed -- User with administrative privileges will need to manually fix configuration"
                 )
 
+        return []
+
 
 def check_executions_running() -> bool:
     """
     Returns True if any execution records have a status of waiting or running
     and False otherwise
     """
-    with aurora_data_api.connect(
-        database=os.environ["METADB_NAME"], rds_data_client=rds_data_client
-    ) as conn, conn.cursor() as cur:
+    with metadb.transaction() as cur:
         log.info("Checking if commit executions are in progress")
-        cur.execute("SELECT 1 FROM executions WHERE status IN ('waiting', 'running')")
+        cur.execute(
+            "SELECT 1 FROM executions WHERE status IN ('waiting', 'running') LIMIT 1"
+        )
 
         if cur.rowcount > 0:
             return True
@@ -192,26 +226,42 @@ def check_executions_running() -> bool:
         return False
 
 
+def archive_executions() -> int:
+    """
+    Moves the executions of commits that finished before the retention period
+    defined by METADB_EXECUTIONS_RETENTION_DAYS into the executions_archive
+    table and returns the amount of archived executions. Executions are not
+    archived if the retention period isn't defined.
+    """
+    retention_days = os.environ.get("METADB_EXECUTIONS_RETENTION_DAYS")
+    if not retention_days:
+        return 0
+
+    with metadb.transaction() as cur:
+        cur.execute(
+            "SELECT archive_executions(CAST(:retention_days AS INT))",
+            {"retention_days": int(retention_days)},
+        )
+        archived = cur.fetchone()[0]
+
+    log.info(f"Archived executions: {archived}")
+    return archived
+
+
 def get_target_execution_ids() -> List[str]:
     """
     Returns list of execution IDs that have all account dependencies and
     terragrunt dependencies met
     """
     try:
-        with aurora_data_api.connect(
-            database=os.environ["METADB_NAME"], rds_data_client=rds_data_client
-        ) as conn, conn.cursor() as cur:
-            with open(
-                f"{os.path.dirname(os.path.realpath(__file__))}/sql/select_target_execution_ids.sql"
-            ) as f:
-                cur.execute(f.read())
-                cur.execute("SELECT get_target_execution_ids()")
-                results = cur.fetchone()
+        with metadb.transaction() as cur:
+            cur.execute("SELECT get_target_execution_ids()")
+            results = cur.fetchone()
 
     except aurora_data_api.exceptions.DatabaseError as e:
         log.error(e, exc_info=True)
         log.error(
-            f'Merge lock value: {ssm.get_parameter(Name=os.environ["GITHUB_MERGE_LOCK_SSM_KEY"])["Parameter"]["Value"]}'
+            f'Merge lock value: {parameters.get(os.environ["GITHUB_MERGE_LOCK_SSM_KEY"])}'
         )
         raise e
 
@@ -221,46 +271,108 @@ def get_target_execution_ids() -> List[str]:
     return results[0]
 
 
-def start_sf_executions() -> None:
-    """Sets metadb record statuses to "running" and starts Step Function executions for each record"""
+def start_sf_execution(execution: dict) -> Optional[Exception]:
+    """
+    Starts the Step Function execution for the execution record and returns
+    the exception raised if the execution couldn't be started
+
+    Arguments:
+        execution: Execution record used as the Step Function execution input
+    """
+    sf_input = json.dumps(execution)
+    log.debug(f"SF input:\n{sf_input}")
+    try:
+        sf.start_execution(
+            stateMachineArn=os.environ["STATE_MACHINE_ARN"],
+            name=execution["execution_id"],
+            input=sf_input,
+        )
+    except sf.exceptions.ExecutionAlreadyExists:
+        # execution was already started by a concurrent invocation
+        log.info(f"Execution already exists: {execution['execution_id']}")
+    except Exception as e:
+        log.error(f"Execution ID: {execution['execution_id']} -- {e}")
+        return e
+
+
+def claim_sf_executions() -> List[dict]:
+    """
+    Sets the statuses of the metadb records that are ready to "running"
+    within one statement and returns the updated records
+    """
     ids = get_target_execution_ids()
     log.debug(f"IDs: {ids}")
     log.debug(f"Count: {len(ids)}")
 
     if len(ids) == 0:
         log.info("No executions are ready")
-        return
+        return []
 
     if "DRY_RUN" in os.environ:
         log.info("DRY_RUN was set -- skip starting sf executions")
-    else:
-        with aurora_data_api.connect(
-            database=os.environ["METADB_NAME"], rds_data_client=rds_data_client
-        ) as conn, conn.cursor() as cur:
-            for _id in ids:
-                log.info(f"Execution ID: {_id}")
-
-                log.debug("Updating execution status to running")
-                cur.execute(
-                    f"""
-                    UPDATE executions
-                    SET status = 'running'
-                    WHERE execution_id = '{_id}'
-                    RETURNING *
-                """
-                )
+        return []
 
-                sf_input = json.dumps(
-                    dict(zip([desc.name for desc in cur.description], cur.fetchone()))
-                )
-                log.debug(f"SF input:\n{sf_input}")
+    with metadb.transaction() as cur:
+        log.debug("Updating execution statuses to running")
+        cur.execute(
+            """
+            UPDATE executions
+            SET status = 'running'
+            WHERE execution_id = ANY(CAST(:ids AS TEXT[]))
+            AND status = 'waiting'
+            RETURNING *
+            """,
+            {"ids": to_pg_array(ids)},
+        )
+        return [
+            dict(zip([desc.name for desc in cur.description], record))
+            for record in cur.fetchall()
+        ]
 
-                log.info("Starting sf execution")
-                sf.start_execution(
-                    stateMachineArn=os.environ["STATE_MACHINE_ARN"],
-                    name=_id,
-                    input=sf_input,
-                )
+
+def start_sf_executions(executions: List[dict] = None) -> None:
+    """
+    Starts Step Function executions for each record. The executions are
+    started concurrently with the amount of concurrent starts limited by the
+    SF_START_CONCURRENCY env var (at least one). Records whose execution
+    couldn't be started are set back to "waiting".
+
+    Arguments:
+        executions: Records returned by claim_sf_executions(). If not set,
+            the records that are ready are claimed.
+    """
+    if executions is None:
+        executions = claim_sf_executions()
+    if len(executions) == 0:
+        return
+
+    max_workers = max(1, int(os.environ.get("SF_START_CONCURRENCY", 10)))
+    log.info(f"Starting {len(executions)} sf executions")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        errors = dict(
+            zip(
+                [execution["execution_id"] for execution in executions],
+                executor.map(start_sf_execution, executions),
+            )
+        )
+    failed_ids = [_id for _id, error in errors.items() if error is not None]
+
+    if len(failed_ids) > 0:
+        log.info(f"Setting execution statuses back to waiting: {failed_ids}")
+        with metadb.transaction() as cur:
+            cur.execute(
+                """
+                UPDATE executions
+                SET status = 'waiting'
+                WHERE execution_id = ANY(CAST(:ids AS TEXT[]))
+                AND status = 'running'
+                """,
+                {"ids": to_pg_array(failed_ids)},
+            )
+
+        raise ServerException(
+            f"Step Function executions could not be started: {failed_ids}"
+        )
 
 
 def lambda_handler(event, context):
@@ -270,6 +382,7 @@ def lambda_handler(event, context):
     lock value if deployment stack is empty.
     """
     log.debug(f"Event:\n{json.dumps(event, indent=4)}")
+    execution = None
     try:
         if event.get("execution"):
             output = event["execution"].get("output")
@@ -294,15 +407,37 @@ def lambda_handler(event, context):
                 account_id=context.invoked_function_arn.split(":")[4],
             )
 
-            execution.update_status()
+        if execution:
+            # the finished execution's status and any aborted executions are
+            # committed on their own so a failure while scheduling the next
+            # executions never rolls them back and wedges the pipeline
+            error = None
+            aborted_ids = []
+            with metadb.transaction():
+                execution.update_status()
+                try:
+                    aborted_ids = execution.handle_failed_execution()
+                except ClientException as e:
+                    # commits the finished execution's status before raising
+                    error = e
+
+            # stopped once the aborted statuses are committed so a rolled back
+            # transaction never leaves stopped executions that are still
+            # running within the metadb
+            execution.abort_sf_executions(aborted_ids)
             execution.send_commit_status()
-            execution.handle_failed_execution()
+            if error:
+                raise error
 
-        running = check_executions_running()
+        # claimed executions are committed before they're started
+        with metadb.transaction():
+            running = check_executions_running()
+            if running:
+                executions = claim_sf_executions()
 
         if running:
             log.info("Starting Step Function Deployment Flow")
-            start_sf_executions()
+            start_sf_executions(executions)
         else:
             log.info("Unlocking merge action within target branch")
             ssm.put_parameter(
@@ -311,8 +446,16 @@ def lambda_handler(event, context):
                 Type="String",
                 Overwrite=True,
             )
+            try:
+                archive_executions()
+            except Exception as e:
+                # archiving is retried once the next deployment finishes
+                log.error(f"Executions could not be archived: {e}", exc_info=True)
 
         return {"statusCode": 200, "message": "Invocation was successful"}
     except Exception as e:
         log.error(e, exc_info=True)
         return {"statusCode": 500, "message": "Invocation was unsuccessful"}
+    finally:
+        metadb.log_timings()
+        parameters.log_metrics()
@@ -0,0 +1,13 @@
+-- noqa: disable=PRS
+CREATE OR REPLACE FUNCTION target_resources(TEXT[]) RETURNS TEXT AS $$
+    DECLARE
+        flags TEXT := '';
+        "resource" TEXT;
+    BEGIN
+        FOREACH "resource" IN ARRAY $1
+        LOOP
+            flags := flags || ' -target ' || "resource";
+        END LOOP;
+        RETURN flags;
+    END;
+$$ LANGUAGE plpgsql;  -- noqa: L016
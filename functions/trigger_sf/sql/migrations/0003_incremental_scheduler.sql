@@ -0,0 +1,174 @@
+-- noqa: disable=PRS
+-- Schedules executions with Kahn's algorithm. Every execution tracks the
+-- amount of its dependencies that have unfinished executions (unmet_deps) so
+-- that a succeeded execution only updates the executions that depend on it
+-- instead of every waiting execution being compared with the entire commit.
+
+ALTER TABLE executions ADD COLUMN IF NOT EXISTS unmet_deps INT;
+
+-- amount of unfinished executions for each cfg_path and account_name of a
+-- commit's executions that other executions can depend on
+CREATE TABLE IF NOT EXISTS execution_dep_groups (
+    commit_id VARCHAR,
+    is_rollback BOOL,
+    dep_type VARCHAR,
+    dep_name VARCHAR,
+    remaining INT,
+    PRIMARY KEY (commit_id, is_rollback, dep_type, dep_name)
+);
+
+CREATE INDEX IF NOT EXISTS executions_ready_idx
+ON executions (unmet_deps) WHERE "status" = 'waiting';
+
+CREATE INDEX IF NOT EXISTS executions_uninitialized_idx
+ON executions (commit_id, is_rollback) WHERE unmet_deps IS NULL AND "status" = 'waiting';
+
+CREATE INDEX IF NOT EXISTS executions_cfg_deps_idx ON executions USING GIN (cfg_deps);
+
+CREATE INDEX IF NOT EXISTS executions_account_deps_idx ON executions USING GIN (account_deps);
+
+-- builds the dependency counts of the commit's executions from their current
+-- statuses in one pass
+CREATE OR REPLACE FUNCTION init_execution_deps(target_commit_id VARCHAR, target_is_rollback BOOL) RETURNS VOID AS $$
+    BEGIN
+        DELETE FROM execution_dep_groups
+        WHERE commit_id = target_commit_id
+        AND is_rollback = target_is_rollback;
+
+        INSERT INTO execution_dep_groups (commit_id, is_rollback, dep_type, dep_name, remaining)
+        SELECT
+            target_commit_id,
+            target_is_rollback,
+            d.dep_type,
+            d.dep_name,
+            count(*) FILTER (WHERE e."status" = ANY(ARRAY['waiting', 'running', 'aborted', 'failed']))
+        FROM executions e
+        CROSS JOIN LATERAL (
+            VALUES ('cfg', e.cfg_path), ('account', e.account_name)
+        ) AS d (dep_type, dep_name)
+        WHERE e.commit_id = target_commit_id
+        AND e.is_rollback = target_is_rollback
+        AND d.dep_name IS NOT NULL
+        GROUP BY d.dep_type, d.dep_name;
+
+        UPDATE executions
+        SET unmet_deps = 0
+        WHERE commit_id = target_commit_id
+        AND is_rollback = target_is_rollback;
+
+        UPDATE executions e
+        SET unmet_deps = c.unmet_deps
+        FROM (
+            SELECT d.execution_id, count(*) AS unmet_deps
+            FROM (
+                -- UNION removes duplicate dependencies
+                SELECT execution_id, 'cfg' AS dep_type, unnest(cfg_deps) AS dep_name
+                FROM executions
+                WHERE commit_id = target_commit_id
+                AND is_rollback = target_is_rollback
+                UNION
+                SELECT execution_id, 'account' AS dep_type, unnest(account_deps) AS dep_name
+                FROM executions
+                WHERE commit_id = target_commit_id
+                AND is_rollback = target_is_rollback
+            ) d
+            JOIN execution_dep_groups g
+            ON g.commit_id = target_commit_id
+            AND g.is_rollback = target_is_rollback
+            AND g.dep_type = d.dep_type
+            AND g.dep_name = d.dep_name
+            WHERE g.remaining > 0
+            GROUP BY d.execution_id
+        ) c
+        WHERE e.execution_id = c.execution_id;
+    END;
+$$ LANGUAGE plpgsql;  -- noqa: L016
+
+-- decrements the finished execution's dependency groups and the unmet
+-- dependency counts of the executions that depend on the groups that no
+-- longer have unfinished executions
+CREATE OR REPLACE FUNCTION trig_execution_finished() RETURNS TRIGGER AS $$
+    DECLARE
+        met RECORD;
+    BEGIN
+        FOR met IN
+            UPDATE execution_dep_groups
+            SET remaining = remaining - 1
+            WHERE commit_id = NEW.commit_id
+            AND is_rollback = NEW.is_rollback
+            AND remaining > 0
+            AND (
+                (dep_type = 'cfg' AND dep_name = NEW.cfg_path)
+                OR (dep_type = 'account' AND dep_name = NEW.account_name)
+            )
+            RETURNING dep_type, dep_name, remaining
+        LOOP
+            CONTINUE WHEN met.remaining > 0;
+
+            IF met.dep_type = 'cfg' THEN
+                UPDATE executions
+                SET unmet_deps = unmet_deps - 1
+                WHERE cfg_deps @> ARRAY[met.dep_name::TEXT]
+                AND commit_id = NEW.commit_id
+                AND is_rollback = NEW.is_rollback;
+            ELSE
+                UPDATE executions
+                SET unmet_deps = unmet_deps - 1
+                WHERE account_deps @> ARRAY[met.dep_name::TEXT]
+                AND commit_id = NEW.commit_id
+                AND is_rollback = NEW.is_rollback;
+            END IF;
+        END LOOP;
+
+        RETURN NULL;
+    END;
+$$ LANGUAGE plpgsql;  -- noqa: L016
+
+DROP TRIGGER IF EXISTS execution_finished ON executions;
+
+CREATE TRIGGER execution_finished
+AFTER UPDATE OF "status" ON executions
+FOR EACH ROW
+WHEN (
+    OLD."status" = ANY(ARRAY['waiting', 'running', 'aborted', 'failed'])
+    AND NEW."status" <> ALL(ARRAY['waiting', 'running', 'aborted', 'failed'])
+)
+EXECUTE PROCEDURE trig_execution_finished();
+
+CREATE OR REPLACE FUNCTION get_target_execution_ids() RETURNS TEXT[] AS $$
+    DECLARE
+        target RECORD;
+    BEGIN
+        -- initializes the commits whose executions were inserted since the
+        -- last call (e.g. new deploy or rollback stack)
+        FOR target IN
+            SELECT DISTINCT commit_id, is_rollback
+            FROM executions
+            WHERE unmet_deps IS NULL
+            AND "status" = 'waiting'
+        LOOP
+            PERFORM init_execution_deps(target.commit_id, target.is_rollback);
+        END LOOP;
+
+        IF (
+            SELECT count(DISTINCT (commit_id, is_rollback))
+            FROM executions
+            WHERE "status" = 'waiting'
+            AND unmet_deps = 0
+        ) > 1 THEN
+            RAISE EXCEPTION 'More than one commit ID is waiting: %', (
+                SELECT array_agg(DISTINCT commit_id)
+                FROM executions
+                WHERE "status" = 'waiting'
+                AND unmet_deps = 0
+            );
+        END IF;
+
+        RETURN (
+            SELECT array_agg(execution_id::TEXT)
+            FROM executions
+            WHERE "status" = 'waiting'
+            AND unmet_deps = 0
+        );
+    END;
+$$ LANGUAGE plpgsql;  -- noqa: L016
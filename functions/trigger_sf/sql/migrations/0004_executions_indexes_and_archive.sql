@@ -0,0 +1,84 @@
+-- noqa: disable=PRS
+-- Indexes the executions table for the scheduling queries and moves the
+-- executions of commits that finished before the retention period into
+-- executions_archive so the scheduling queries only scan recent executions.
+
+ALTER TABLE executions ADD COLUMN IF NOT EXISTS finished_at TIMESTAMP;
+
+UPDATE executions
+SET finished_at = CURRENT_TIMESTAMP
+WHERE finished_at IS NULL
+AND "status" NOT IN ('waiting', 'running');
+
+-- check_executions_running() and abort_commit_records()
+CREATE INDEX IF NOT EXISTS executions_active_idx
+ON executions (commit_id, is_rollback) WHERE "status" IN ('waiting', 'running');
+
+-- rollback stack and dependency count queries that are scoped to a commit
+CREATE INDEX IF NOT EXISTS executions_commit_idx
+ON executions (commit_id, is_rollback);
+
+CREATE OR REPLACE FUNCTION trig_execution_finished_at() RETURNS TRIGGER AS $$
+    BEGIN
+        NEW.finished_at := CURRENT_TIMESTAMP;
+        RETURN NEW;
+    END;
+$$ LANGUAGE plpgsql;  -- noqa: L016
+
+DROP TRIGGER IF EXISTS execution_finished_at ON executions;
+
+CREATE TRIGGER execution_finished_at
+BEFORE UPDATE OF "status" ON executions
+FOR EACH ROW
+WHEN (
+    NEW."status" NOT IN ('waiting', 'running')
+    AND OLD."status" IS DISTINCT FROM NEW."status"
+)
+EXECUTE PROCEDURE trig_execution_finished_at();
+
+-- columns of executions_archive match executions at the time of this
+-- migration so later migrations that add executions columns must also add
+-- them to executions_archive
+CREATE TABLE IF NOT EXISTS executions_archive (LIKE executions);
+
+CREATE INDEX IF NOT EXISTS executions_archive_commit_idx
+ON executions_archive (commit_id, is_rollback);
+
+CREATE INDEX IF NOT EXISTS executions_archive_finished_at_idx
+ON executions_archive (finished_at);
+
+-- moves the executions of commits that have no waiting or running executions
+-- and finished before the retention period into executions_archive and
+-- returns the amount of archived executions
+CREATE OR REPLACE FUNCTION archive_executions(retention_days INT) RETURNS INT AS $$
+    DECLARE
+        archived INT;
+    BEGIN
+        WITH finished_commits AS (
+            SELECT commit_id
+            FROM executions
+            GROUP BY commit_id
+            HAVING count(*) FILTER (WHERE "status" IN ('waiting', 'running')) = 0
+            AND max(finished_at) < CURRENT_TIMESTAMP - make_interval(days => retention_days)
+        ),
+        moved AS (
+            DELETE FROM executions
+            WHERE commit_id IN (SELECT commit_id FROM finished_commits)
+            RETURNING *
+        )
+        INSERT INTO executions_archive
+        SELECT * FROM moved;
+
+        GET DIAGNOSTICS archived = ROW_COUNT;
+
+        DELETE FROM execution_dep_groups g
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM executions e
+            WHERE e.commit_id = g.commit_id
+            AND e.is_rollback = g.is_rollback
+        );
+
+        RETURN archived;
+    END;
+$$ LANGUAGE plpgsql;  -- noqa: L016
@@ -0,0 +1,45 @@
+-- noqa: disable=PRS
+-- Restores the original check that errors if executions of more than one
+-- commit are waiting. Migration 0003 only compared the commits of the
+-- executions that are ready which silently stopped the check from erroring
+-- when the other commit's waiting executions still had unmet dependencies.
+
+CREATE OR REPLACE FUNCTION get_target_execution_ids() RETURNS TEXT[] AS $$
+    DECLARE
+        target RECORD;
+    BEGIN
+        -- initializes the commits whose executions were inserted since the
+        -- last call (e.g. new deploy or rollback stack)
+        FOR target IN
+            SELECT DISTINCT commit_id, is_rollback
+            FROM executions
+            WHERE unmet_deps IS NULL
+            AND "status" = 'waiting'
+        LOOP
+            PERFORM init_execution_deps(target.commit_id, target.is_rollback);
+        END LOOP;
+
+        -- intentionally errors if there are more than one unique commit_id
+        -- and/or is_rollback value within the waiting executions
+        IF (
+            SELECT count(DISTINCT (commit_id, is_rollback))
+            FROM executions
+            WHERE "status" = 'waiting'
+        ) > 1 THEN
+            RAISE EXCEPTION 'More than one commit ID is waiting: %', (
+                SELECT array_agg(commit_id) FROM (
+                    SELECT DISTINCT commit_id, is_rollback
+                    FROM executions
+                    WHERE "status" = 'waiting'
+                ) ids
+            );
+        END IF;
+
+        RETURN (
+            SELECT array_agg(execution_id::TEXT)
+            FROM executions
+            WHERE "status" = 'waiting'
+            AND unmet_deps = 0
+        );
+    END;
+$$ LANGUAGE plpgsql;  -- noqa: L016
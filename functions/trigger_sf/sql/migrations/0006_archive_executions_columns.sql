@@ -0,0 +1,116 @@
+-- noqa: disable=PRS
+-- Redefines archive_executions() with an explicit column list. Migration 0004
+-- copied the moved executions with SELECT * which depends on executions and
+-- executions_archive having the same column order and breaks once a column is
+-- added to executions only. Later migrations that add executions columns must
+-- add them to executions_archive and to the column lists below.
+
+CREATE OR REPLACE FUNCTION archive_executions(retention_days INT) RETURNS INT AS $$
+    DECLARE
+        archived INT;
+    BEGIN
+        WITH finished_commits AS (
+            SELECT commit_id
+            FROM executions
+            GROUP BY commit_id
+            HAVING count(*) FILTER (WHERE "status" IN ('waiting', 'running')) = 0
+            AND max(finished_at) < CURRENT_TIMESTAMP - make_interval(days => retention_days)
+        ),
+        moved AS (
+            DELETE FROM executions
+            WHERE commit_id IN (SELECT commit_id FROM finished_commits)
+            RETURNING
+                execution_id,
+                is_rollback,
+                pr_id,
+                commit_id,
+                base_ref,
+                head_ref,
+                cfg_path,
+                cfg_deps,
+                "status",
+                plan_command,
+                apply_command,
+                new_providers,
+                new_resources,
+                account_name,
+                account_path,
+                account_deps,
+                voters,
+                approval_voters,
+                min_approval_count,
+                rejection_voters,
+                min_rejection_count,
+                plan_role_arn,
+                apply_role_arn,
+                unmet_deps,
+                finished_at
+        )
+        INSERT INTO executions_archive (
+            execution_id,
+            is_rollback,
+            pr_id,
+            commit_id,
+            base_ref,
+            head_ref,
+            cfg_path,
+            cfg_deps,
+            "status",
+            plan_command,
+            apply_command,
+            new_providers,
+            new_resources,
+            account_name,
+            account_path,
+            account_deps,
+            voters,
+            approval_voters,
+            min_approval_count,
+            rejection_voters,
+            min_rejection_count,
+            plan_role_arn,
+            apply_role_arn,
+            unmet_deps,
+            finished_at
+        )
+        SELECT
+            execution_id,
+            is_rollback,
+            pr_id,
+            commit_id,
+            base_ref,
+            head_ref,
+            cfg_path,
+            cfg_deps,
+            "status",
+            plan_command,
+            apply_command,
+            new_providers,
+            new_resources,
+            account_name,
+            account_path,
+            account_deps,
+            voters,
+            approval_voters,
+            min_approval_count,
+            rejection_voters,
+            min_rejection_count,
+            plan_role_arn,
+            apply_role_arn,
+            unmet_deps,
+            finished_at
+        FROM moved;
+
+        GET DIAGNOSTICS archived = ROW_COUNT;
+
+        DELETE FROM execution_dep_groups g
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM executions e
+            WHERE e.commit_id = g.commit_id
+            AND e.is_rollback = g.is_rollback
+        );
+
+        RETURN archived;
+    END;
+$$ LANGUAGE plpgsql;  -- noqa: L016
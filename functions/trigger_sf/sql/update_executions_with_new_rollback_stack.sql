@@ -1,17 +1,3 @@
--- noqa: disable=PRS
-CREATE OR REPLACE FUNCTION target_resources(TEXT[]) RETURNS TEXT AS $$
-    DECLARE
-        flags TEXT := '';
-        "resource" TEXT;
-    BEGIN
-        FOREACH "resource" IN ARRAY $1
-        LOOP
-            flags := flags || ' -target ' || "resource";
-        END LOOP;
-        RETURN flags;
-    END;
-$$ LANGUAGE plpgsql;  -- noqa: L016
-
 INSERT INTO executions (
     execution_id,
     is_rollback,
@@ -65,7 +51,8 @@ SELECT
     array(
         SELECT cfg_path  -- noqa: L028
         FROM executions
-        WHERE d.cfg_path = any(cfg_deps)  -- noqa: L028, L026
+        -- containment instead of any() allows the GIN index to be used
+        WHERE cfg_deps @> ARRAY[d.cfg_path::TEXT]  -- noqa: L028, L026
             AND commit_id = '{commit_id}'  -- noqa: L028
             AND cardinality(new_resources) > 0  -- noqa: L028
     ) AS cfg_deps
@@ -1,37 +1,52 @@
 import os
 import logging
-import fnmatch
 import json
 from pprint import pformat
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Tuple
 
 import boto3
-import github
 
 sys.path.append(os.path.dirname(__file__))
-from utils import aws_encode, ServerException  # noqa E402
+from utils import aws_encode, ServerException, PathTrie  # noqa E402
+from github_client import get_client  # noqa E402
+from models import parameters  # noqa E402
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
-ssm = boto3.client("ssm", endpoint_url=os.environ.get("SSM_ENDPOINT_URL"))
 ecs = boto3.client("ecs", endpoint_url=os.environ.get("ECS_ENDPOINT_URL"))
 
 
+@lru_cache(maxsize=None)
+def get_accounts(account_dim: str) -> Tuple[List[dict], PathTrie]:
+    """
+    Returns the parsed account records and a trie of their account paths. The
+    results are cached so that the records are only parsed once per Lambda
+    container.
+
+    Arguments:
+        account_dim: JSON encoded list of account records (ACCOUNT_DIM env var)
+    """
+    accounts = json.loads(account_dim)
+    return accounts, PathTrie([account["path"] for account in accounts])
+
+
 def merge_lock(repo_full_name, head_ref, logs_url):
     """Creates a PR commit status that shows the current merge lock status"""
 
-    merge_lock = ssm.get_parameter(Name=os.environ["MERGE_LOCK_SSM_KEY"])["Parameter"][
-        "Value"
-    ]
+    merge_lock = parameters.get(os.environ["MERGE_LOCK_SSM_KEY"])
     log.info(f"Merge lock value: {merge_lock}")
-    gh = github.Github(login_or_token=os.environ["GITHUB_TOKEN"])
-
-    head = gh.get_repo(repo_full_name).get_branch(head_ref)
+    head = get_client(os.environ["GITHUB_TOKEN"]).get_branch_commit(
+        repo_full_name, head_ref
+    )
 
     if merge_lock != "none":
         log.info("Merge lock status: locked")
-        head.commit.create_status(
+        head.create_status(
             state="pending",
             description=f"Locked -- In Progress PR #{merge_lock}",
             context=os.environ["MERGE_LOCK_STATUS_CHECK_NAME"],
@@ -40,7 +55,7 @@ def merge_lock(repo_full_name, head_ref, logs_url):
 
     elif merge_lock == "none":
         log.info("Merge lock status: unlocked")
-        head.commit.create_status(
+        head.create_status(
             state="success",
             description="Unlocked",
             context=os.environ["MERGE_LOCK_STATUS_CHECK_NAME"],
@@ -51,6 +66,98 @@ def merge_lock(repo_full_name, head_ref, logs_url):
         raise ServerException(f"Invalid merge lock value: {merge_lock}")
 
 
+@lru_cache(maxsize=None)
+def get_log_options(task_definition_arn: str) -> dict:
+    """
+    Returns the log configuration options of the task definition's container.
+    The options are cached given the task definition revision is fixed within
+    the ARN.
+
+    Arguments:
+        task_definition_arn: ECS task definition ARN
+    """
+    return ecs.describe_task_definition(taskDefinition=task_definition_arn)[
+        "taskDefinition"
+    ]["containerDefinitions"][0]["logConfiguration"]["options"]
+
+
+def run_pr_plan_task(
+    path: str,
+    plan_role_arn: str,
+    head_ref: str,
+    head_sha: str,
+    pr_id: int,
+    logs_url: str,
+) -> dict:
+    """
+    Runs the PR plan ECS task for the Terragrunt directory and returns the
+    directory's commit status data. Each directory's task has its own
+    container overrides so the task is launched on its own.
+
+    Arguments:
+        path: Terragrunt directory
+        plan_role_arn: IAM role ARN used for the directory's plan
+        head_ref: Pull request head ref name
+        head_sha: Pull request head sha value
+        pr_id: Pull request number
+        logs_url: CloudWatch log stream URL of the Lambda Function used for
+            failed launches
+    """
+    status_check_name = f"Plan: {path}"
+    start = time.perf_counter()
+    try:
+        log_options = get_log_options(os.environ["PR_PLAN_TASK_DEFINITION_ARN"])
+        task = ecs.run_task(
+            cluster=os.environ["ECS_CLUSTER_ARN"],
+            count=1,
+            launchType="FARGATE",
+            taskDefinition=os.environ["PR_PLAN_TASK_DEFINITION_ARN"],
+            networkConfiguration=json.loads(os.environ["ECS_NETWORK_CONFIG"]),
+            startedBy=head_sha,
+            overrides={
+                "containerOverrides": [
+                    {
+                        "name": os.environ["PR_PLAN_TASK_CONTAINER_NAME"],
+                        "command": [
+                            "python",
+                            "/src/pr_plan/plan.py",
+                        ],
+                        "environment": [
+                            {"name": "SOURCE_VERSION", "value": head_ref},
+                            {"name": "COMMIT_ID", "value": head_sha},
+                            {"name": "PR_ID", "value": str(pr_id)},
+                            {"name": "CFG_PATH", "value": path},
+                            {"name": "ROLE_ARN", "value": plan_role_arn},
+                            {"name": "STATUS_CHECK_NAME", "value": status_check_name},
+                        ],
+                    }
+                ]
+            },
+        )
+        log.debug(f"Run task response:\n{pformat(task)}")
+
+        task_id = task["tasks"][0]["taskArn"].split("/")[-1]
+        status_data = {
+            "state": "pending",
+            "description": "Terraform Plan",
+            "context": status_check_name,
+            "target_url": f'https://{os.environ["AWS_REGION"]}.console.aws.amazon.com/cloudwatch/home?region={os.environ["AWS_REGION"]}#logsV2:log-groups/log-group/{aws_encode(log_options["awslogs-group"])}/log-events/{aws_encode(log_options["awslogs-stream-prefix"] + "/" + os.environ["PR_PLAN_TASK_CONTAINER_NAME"] + "/" + task_id)}',
+        }
+    except Exception as e:
+        log.error(e, exc_info=True)
+        status_data = {
+            "state": "failure",
+            "description": "Terraform Plan",
+            "context": status_check_name,
+            "target_url": logs_url,
+        }
+
+    log.info(
+        f"Directory: {path} -- Launch state: {status_data['state']} -- Duration: {time.perf_counter() - start:.2f}s"
+    )
+    return status_data
+
+
 def trigger_pr_plan(
     repo_full_name: str,
     base_ref: str,
@@ -59,43 +166,45 @@ def trigger_pr_plan(
     pr_id: int,
     logs_url: str,
     send_commit_status: bool,
+    changed_files: int = None,
 ) -> None:
     """
     Runs the PR Terragrunt plan ECS task for every added or modified Terragrunt
-    directory
+    directory. The tasks are launched concurrently with at most
+    PR_PLAN_LAUNCH_CONCURRENCY launches at once.
 
     Arguments:
         send_commit_status: Send a pending commit status for each of the
             PR plan ECS task
+        changed_files: Amount of files changed within the PR according to the
+            webhook event used to detect files the GitHub API didn't return
     """
 
-    gh = github.Github(login_or_token=os.environ["GITHUB_TOKEN"])
+    gh = get_client(os.environ["GITHUB_TOKEN"])
 
     log.info("Getting diff files")
-    diff_paths = list(
-        set(
-            [
-                f.filename
-                for f in gh.get_repo(repo_full_name).compare(base_ref, head_ref).files
-                if f.status in ["added", "modified"]
-            ]
+    # the pull request files are paginated unlike the compare API files
+    # which are truncated after the first 300 files but the pull request
+    # files are still limited to the first 3000 files
+    files = list(gh.get_pull(repo_full_name, pr_id).get_files())
+    if changed_files is not None and changed_files > len(files):
+        log.warning(
+            f"Only {len(files)} of the PR's {changed_files} files were returned -- Directories of the remaining files won't be planned"
         )
+
+    diff_paths = list(
+        set([f.filename for f in files if f.status in ["added", "modified"]])
     )
     log.debug(f"Added or modified files within PR:\n{pformat(diff_paths)}")
 
-    for account in json.loads(os.environ["ACCOUNT_DIM"]):
+    accounts, account_trie = get_accounts(os.environ["ACCOUNT_DIM"])
+    # sorts the diff files into their account paths within a single pass
+    account_diff_paths_map = account_trie.group(diff_paths)
+    launches = []
+    for account in accounts:
         log.debug(f"Account Record:\n{account}")
 
-        account_diff_paths = list(
-            set(
-                [
-                    os.path.dirname(filename)
-                    for filename in diff_paths
-                    if fnmatch.fnmatch(filename, f'{account["path"]}/**.hcl')
-                    or fnmatch.fnmatch(filename, f'{account["path"]}/**.tf')
-                ]
-            )
-        )
+        account_diff_paths = account_diff_paths_map.get(account["path"], [])
 
         if len(account_diff_paths) > 0:
             log.debug(
@@ -103,87 +212,45 @@ def trigger_pr_plan(
             )
             log.info(f"Count: {len(account_diff_paths)}")
             log.info(f'Plan Role ARN: {account["plan_role_arn"]}')
-
-            log_options = ecs.describe_task_definition(
-                taskDefinition=os.environ["PR_PLAN_TASK_DEFINITION_ARN"]
-            )["taskDefinition"]["containerDefinitions"][0]["logConfiguration"][
-                "options"
-            ]
-
-            log.info("Running ECS tasks")
-            for path in account_diff_paths:
-                log.info(f"Directory: {path}")
-                status_check_name = f"Plan: {path}"
-                try:
-                    task = ecs.run_task(
-                        cluster=os.environ["ECS_CLUSTER_ARN"],
-                        count=1,
-                        launchType="FARGATE",
-                        taskDefinition=os.environ["PR_PLAN_TASK_DEFINITION_ARN"],
-                        networkConfiguration=json.loads(
-                            os.environ["ECS_NETWORK_CONFIG"]
-                        ),
-                        startedBy=head_sha,
-                        overrides={
-                            "containerOverrides": [
-                                {
-                                    "name": os.environ["PR_PLAN_TASK_CONTAINER_NAME"],
-                                    "command": [
-                                        "python",
-                                        "/src/pr_plan/plan.py",
-                                    ],
-                                    "environment": [
-                                        {
-                                            "name": "SOURCE_VERSION",
-                                            "value": head_ref,
-                                        },
-                                        {
-                                            "name": "COMMIT_ID",
-                                            "value": head_sha,
-                                        },
-                                        {"name": "PR_ID", "value": str(pr_id)},
-                                        {"name": "CFG_PATH", "value": path},
-                                        {
-                                            "name": "ROLE_ARN",
-                                            "value": account["plan_role_arn"],
-                                        },
-                                        {
-                                            "name": "STATUS_CHECK_NAME",
-                                            "value": status_check_name,
-                                        },
-                                    ],
-                                }
-                            ]
-                        },
-                    )
-                    log.debug(f"Run task response:\n{pformat(task)}")
-
-                    task_id = task["tasks"][0]["taskArn"].split("/")[-1]
-                    status_data = {
-                        "state": "pending",
-                        "description": "Terraform Plan",
-                        "context": status_check_name,
-                        "target_url": f'https://{os.environ["AWS_REGION"]}.console.aws.amazon.com/cloudwatch/home?region={os.environ["AWS_REGION"]}#logsV2:log-groups/log-group/{aws_encode(log_options["awslogs-group"])}/log-events/{aws_encode(log_options["awslogs-stream-prefix"] + "/" + os.environ["PR_PLAN_TASK_CONTAINER_NAME"] + "/" + task_id)}',
-                    }
-                except Exception as e:
-                    log.error(e, exc_info=True)
-                    status_data = {
-                        "state": "failure",
-                        "description": "Terraform Plan",
-                        "context": status_check_name,
-                        "target_url": logs_url,
-                    }
-
-                log.info("Sending commit status for Terraform plan")
-                log.debug(f"Status data:\n{pformat(status_data)}")
-                if send_commit_status:
-                    head = gh.get_repo(repo_full_name).get_branch(head_ref)
-                    log.debug(head.commit.create_status(**status_data))
+            launches.extend(
+                (path, account["plan_role_arn"]) for path in account_diff_paths
+            )
         else:
             log.info(
                 "No New/Modified Terragrunt/Terraform configurations within account -- skipping plan"
             )
 
+    if len(launches) == 0:
+        return
+
+    # the statuses are created on the planned commit instead of the branch's
+    # head which can change while the tasks are launched
+    head = gh.get_commit(repo_full_name, head_sha) if send_commit_status else None
+
+    def launch(path: str, plan_role_arn: str) -> None:
+        status_data = run_pr_plan_task(
+            path, plan_role_arn, head_ref, head_sha, pr_id, logs_url
+        )
+        if send_commit_status:
+            log.info("Sending commit status for Terraform plan")
+            log.debug(f"Status data:\n{pformat(status_data)}")
+            log.debug(head.create_status(**status_data))
+
+    log.info("Running ECS tasks")
+    start = time.perf_counter()
+    # at least one launch runs at a time if the env var is misconfigured
+    max_workers = max(1, int(os.environ.get("PR_PLAN_LAUNCH_CONCURRENCY", 10)))
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(launches))) as executor:
+        futures = [executor.submit(launch, *args) for args in launches]
+    log.info(
+        f"PR plan tasks: {len(launches)} -- Duration: {time.perf_counter() - start:.2f}s"
+    )
+
+    # raises after every task is launched so that one failed commit status
+    # doesn't prevent the other directories' plans
+    for future in futures:
+        future.result()
+
 
 def trigger_create_deploy_stack(
     repo_full_name: str,
@@ -209,9 +276,7 @@ def trigger_create_deploy_stack(
         send_commit_status: If True, sends a pending commit status for Create Deploy Stack ECS task
     """
 
-    log_options = ecs.describe_task_definition(
-        taskDefinition=os.environ["CREATE_DEPLOY_STACK_TASK_DEFINITION_ARN"]
-    )["taskDefinition"]["containerDefinitions"][0]["logConfiguration"]["options"]
+    log_options = get_log_options(os.environ["CREATE_DEPLOY_STACK_TASK_DEFINITION_ARN"])
 
     try:
         task = ecs.run_task(
@@ -256,6 +321,7 @@ def trigger_create_deploy_stack(
     if send_commit_status:
         log.info("Sending commit status")
         log.debug(f"Status data:\n{json.dumps(status_data, indent=4)}")
-        gh = github.Github(login_or_token=os.environ["GITHUB_TOKEN"])
-        head = gh.get_repo(repo_full_name).get_branch(head_ref)
-        head.commit.create_status(**status_data)
+        head = get_client(os.environ["GITHUB_TOKEN"]).get_branch_commit(
+            repo_full_name, head_ref
+        )
+        head.create_status(**status_data)
@@ -8,9 +8,10 @@ from fastapi import FastAPI
 from mangum import Mangum
 
 sys.path.append(os.path.dirname(__file__))
-from models import Event, Context
+from models import Event, Context, parameters
 from invoker import merge_lock, trigger_pr_plan, trigger_create_deploy_stack
 from exceptions import InvalidSignatureError, FilePathsNotMatched
+from github_client import get_client
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
@@ -37,6 +38,7 @@ def open_pr(request: Request):
         pr_id=event.body.pull_request.number,
         logs_url=context.logs_url,
         send_commit_status=event.body.commit_status_config.get("PrPlan"),
+        changed_files=event.body.pull_request.changed_files,
     )
 
     return JSONResponse(
@@ -110,6 +112,9 @@ async def add_resource_path(request: Request, call_next):
     log.debug(f"Resource Path: {request.scope['path']}")
 
     response = await call_next(request)
+    parameters.log_metrics()
+    if os.environ.get("GITHUB_TOKEN"):
+        get_client(os.environ["GITHUB_TOKEN"]).log_metrics()
     return response
 
 
@@ -5,8 +5,8 @@ from typing import Any
 import hmac
 import hashlib
 import re
+import logging
 
-import github
 import boto3
 from pydantic import (
     BaseModel,
@@ -20,8 +20,24 @@ from pydantic import (
 sys.path.append(os.path.dirname(__file__))
 from exceptions import InvalidSignatureError, FilePathsNotMatched
 from utils import aws_encode
+from ssm_cache import ParameterCache
+from github_client import get_client
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
 
 ssm = boto3.client("ssm", endpoint_url=os.environ.get("SSM_ENDPOINT_URL"))
+# fetched together at cold start and reused across invocations of the warm
+# Lambda container except for the merge lock that changes between deployments
+parameters = ParameterCache(
+    ssm,
+    [
+        os.environ.get("GITHUB_WEBHOOK_SECRET_SSM_KEY"),
+        os.environ.get("GITHUB_TOKEN_SSM_KEY"),
+        os.environ.get("COMMIT_STATUS_CONFIG_SSM_KEY"),
+    ],
+    ttls={os.environ.get("MERGE_LOCK_SSM_KEY"): 0},
+)
 
 
 class Headers(BaseModel):
@@ -73,6 +89,7 @@ class PullRequest(BaseModel):
     base: Base
     head: Head
     number: int
+    changed_files: int = None
 
     class Config:
         extra = Extra.ignore
@@ -91,36 +108,36 @@ class Body(BaseModel):
     @root_validator(skip_on_failure=True)
     def validate_file_path(cls, values):
         # sets token env var so downstream github clients can use it
-        os.environ["GITHUB_TOKEN"] = ssm.get_parameter(
-            Name=os.environ["GITHUB_TOKEN_SSM_KEY"], WithDecryption=True
-        )["Parameter"]["Value"]
+        os.environ["GITHUB_TOKEN"] = parameters.get(os.environ["GITHUB_TOKEN_SSM_KEY"])
 
-        gh = github.Github(login_or_token=os.environ["GITHUB_TOKEN"])
-        repo = gh.get_repo(values["repository"].full_name)
+        pr = get_client(os.environ["GITHUB_TOKEN"]).get_pull(
+            values["repository"].full_name, values["pull_request"].number
+        )
 
-        diff_filepaths = [
-            path.filename
-            for path in repo.compare(
-                values["pull_request"].base.sha,
-                values["pull_request"].head.sha,
-            ).files
-        ]
+        # the pull request files are paginated unlike the compare API files
+        # which are truncated after the first 300 files but the pull request
+        # files are still limited to the first 3000 files
+        diff_filepaths = [path.filename for path in pr.get_files()]
 
         for path in diff_filepaths:
             if re.search(os.environ["FILE_PATH_PATTERN"], path):
                 return values
 
+        changed_files = values["pull_request"].changed_files
+        if changed_files is not None and changed_files > len(diff_filepaths):
+            # the files that weren't returned could match the pattern
+            log.warning(
+                f"Only {len(diff_filepaths)} of the PR's {changed_files} files were returned -- Skipping file path filter"
+            )
+            return values
+
         raise FilePathsNotMatched(
             f"No diff filepath was matched within pattern: {os.environ['FILE_PATH_PATTERN']}"
         )
 
     @validator("commit_status_config", pre=True, always=True)
     def set_commit_status_config(cls, val):
-        return json.loads(
-            ssm.get_parameter(Name=os.environ["COMMIT_STATUS_CONFIG_SSM_KEY"])[
-                "Parameter"
-            ]["Value"]
-        )
+        return json.loads(parameters.get(os.environ["COMMIT_STATUS_CONFIG_SSM_KEY"]))
 
 
 class Event(BaseModel):
@@ -133,9 +150,7 @@ class Event(BaseModel):
         if not actual_sig.startswith("sha256="):
             raise InvalidSignatureError("Signature is not a valid sha256 value")
 
-        secret = ssm.get_parameter(
-            Name=os.environ["GITHUB_WEBHOOK_SECRET_SSM_KEY"], WithDecryption=True
-        )["Parameter"]["Value"]
+        secret = parameters.get(os.environ["GITHUB_WEBHOOK_SECRET_SSM_KEY"])
         expected_sig = hmac.new(
             bytes(str(secret), "utf-8"),
             bytes(str(values.get("body")), "utf-8"),
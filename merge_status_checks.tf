@@ -54,7 +54,7 @@ data "aws_iam_policy_document" "webhook_receiver" {
   statement {
     sid     = "SSMParamAccess"
     effect  = "Allow"
-    actions = ["ssm:GetParameter"]
+    actions = ["ssm:GetParameter", "ssm:GetParameters"]
     resources = [
       aws_ssm_parameter.merge_lock.arn,
       aws_ssm_parameter.github_webhook_secret.arn
@@ -173,6 +173,7 @@ module "lambda_webhook_receiver" {
     GITHUB_TOKEN_SSM_KEY          = local.github_token_ssm_key
     GITHUB_WEBHOOK_SECRET_SSM_KEY = aws_ssm_parameter.github_webhook_secret.name
     COMMIT_STATUS_CONFIG_SSM_KEY  = local.commit_status_config_ssm_key
+    SSM_CACHE_TTL                 = tostring(var.lambda_ssm_cache_ttl)
     FILE_PATH_PATTERN             = trimspace(var.file_path_pattern)
     BASE_BRANCH                   = var.base_branch
 
@@ -187,6 +188,7 @@ module "lambda_webhook_receiver" {
     PR_PLAN_TASK_DEFINITION_ARN = aws_ecs_task_definition.pr_plan.arn
     PR_PLAN_TASK_CONTAINER_NAME = local.pr_plan_container_name
     PR_PLAN_LOG_STREAM_PREFIX   = local.pr_plan_log_stream_prefix
+    PR_PLAN_LAUNCH_CONCURRENCY  = tostring(var.pr_plan_launch_concurrency)
 
     CREATE_DEPLOY_STACK_TASK_DEFINITION_ARN   = aws_ecs_task_definition.create_deploy_stack.arn
     CREATE_DEPLOY_STACK_COMMIT_STATUS_CONTEXT = var.create_deploy_stack_status_check_name
@@ -40,3 +40,11 @@ CREATE TABLE IF NOT EXISTS account_dim (
     plan_role_arn VARCHAR,
     apply_role_arn VARCHAR
 );
+
+-- versions of the migrations within functions/trigger_sf/sql/migrations that
+-- have been applied by the trigger Step Function Lambda
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    "version" INT PRIMARY KEY,  -- noqa: L059
+    "name" VARCHAR,  -- noqa: L059
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -14,6 +14,7 @@ BEGIN
         GRANT USAGE ON SCHEMA ${metadb_schema} TO ${metadb_ci_username};
         GRANT SELECT, INSERT, UPDATE, REFERENCES, TRIGGER ON executions TO ${metadb_ci_username};
         GRANT SELECT ON account_dim TO ${metadb_ci_username};
+        GRANT SELECT, INSERT ON schema_migrations TO ${metadb_ci_username};
         ALTER ROLE ${metadb_ci_username} SET search_path TO ${metadb_schema};
    END IF;
 END
@@ -0,0 +1,135 @@
+import re
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGitHub:
+    """
+    Local GitHub API server that implements the endpoints used by the GitHub
+    client and records every request it receives. GET responses include ETags
+    and unchanged resources are returned as 304 responses that don't count
+    against the rate limit like the GitHub API.
+    """
+
+    def __init__(self, rate_limit: int = 5000):
+        """
+        Arguments:
+            rate_limit: Amount of requests within the rate limit
+        """
+        self.rate_remaining = rate_limit
+        self.rate_limit = rate_limit
+        self.branches = {}
+        self.pull_files = {}
+        self.statuses = []
+        self.comments = []
+        self.requests = []
+        self.delay = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def count(self, method: str = None, pattern: str = ".*") -> int:
+        """
+        Returns the amount of received requests that match the method and path pattern
+
+        Arguments:
+            method: HTTP method (e.g. GET)
+            pattern: Regex pattern the request path must fully match
+        """
+        return len(
+            [
+                r
+                for r in self.requests
+                if (method is None or r[0] == method) and re.fullmatch(pattern, r[1])
+            ]
+        )
+
+    def _route(self, method: str, path: str, body: dict):
+        repo = r"/repos/(?P<repo>[^/]+/[^/]+)"
+        match = re.fullmatch(f"{repo}/branches/(?P<branch>.+)", path)
+        if method == "GET" and match:
+            sha = self.branches[(match["repo"], match["branch"])]
+            return 200, {
+                "name": match["branch"],
+                "commit": {
+                    "sha": sha,
+                    "url": f"{self.url}/repos/{match['repo']}/commits/{sha}",
+                },
+            }
+
+        match = re.fullmatch(f"{repo}/pulls/(?P<number>\\d+)/files", path.split("?")[0])
+        if method == "GET" and match:
+            return 200, [
+                {"filename": filename, "status": "modified"}
+                for filename in self.pull_files[(match["repo"], int(match["number"]))]
+            ]
+
+        match = re.fullmatch(f"{repo}/statuses/(?P<sha>\\w+)", path)
+        if method == "POST" and match:
+            self.statuses.append({"repo": match["repo"], "sha": match["sha"], **body})
+            return 201, {"state": body["state"], "context": body.get("context")}
+
+        match = re.fullmatch(f"{repo}/issues/(?P<number>\\d+)/comments", path)
+        if method == "POST" and match:
+            self.comments.append({"number": int(match["number"]), **body})
+            return 201, {"id": len(self.comments), "body": body["body"]}
+
+        return 404, {"message": "Not Found"}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _respond(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or "{}")
+                if fake.delay:
+                    time.sleep(fake.delay)
+                with fake._lock:
+                    fake.requests.append((method, self.path))
+                    status, data = fake._route(method, self.path, body)
+                    output = json.dumps(data)
+                    etag = f'"{hash(output)}"'
+                    if (
+                        method == "GET"
+                        and status == 200
+                        and self.headers.get("If-None-Match") == etag
+                    ):
+                        status = 304
+                    else:
+                        fake.rate_remaining -= 1
+
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("ETag", etag)
+                    self.send_header("X-RateLimit-Limit", str(fake.rate_limit))
+                    self.send_header("X-RateLimit-Remaining", str(fake.rate_remaining))
+                    self.send_header("X-RateLimit-Reset", str(int(time.time()) + 1))
+                    if status == 304:
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    self.send_header("Content-Length", str(len(output)))
+                    self.end_headers()
+                    self.wfile.write(output.encode())
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+        return Handler
@@ -37,7 +37,9 @@ def setup_metadb():
     with aurora_data_api.connect(
         database=os.environ["METADB_NAME"], rds_data_client=rds_data_client
     ) as conn, conn.cursor() as cur:
-        cur.execute("DROP TABLE IF EXISTS executions, account_dim")
+        cur.execute(
+            "DROP TABLE IF EXISTS executions, account_dim, schema_migrations, execution_dep_groups, executions_archive"
+        )
 
 
 @pytest.fixture(scope="function")
@@ -50,4 +52,6 @@ def truncate_executions(setup_metadb):
     with aurora_data_api.connect(
         database=os.environ["METADB_NAME"], rds_data_client=rds_data_client
     ) as conn, conn.cursor() as cur:
-        cur.execute("TRUNCATE executions")
+        # truncates the scheduler's dependency groups along with the
+        # executions so that groups of previous tests don't leak into others
+        cur.execute("TRUNCATE executions, execution_dep_groups")
@@ -3,7 +3,7 @@ import os
 import logging
 import git
 import re
-from docker.src.common.utils import subprocess_run
+from docker.src.common.utils import subprocess_run, subprocess_popen
 import aurora_data_api
 
 from tests.helpers.utils import rds_data_client, insert_records, terra_version
@@ -12,13 +12,19 @@ log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
 
-def mock_subprocess_run(cmd: str, check=True):
+def mock_subprocess_run(cmd: str, check=True, env: dict = None):
     """
     Mock wrapper that removes --terragrunt-iam-role flag from all Terragrunt related commands passed to subprocess_run().
     Given tests are provisioning terraform resources locally, assuming IAM roles are not needed.
     """
     cmd = re.sub(r"\s--terragrunt-iam-role\s+.+?(?=\s|$)", "", cmd)
-    return subprocess_run(cmd, check)
+    return subprocess_run(cmd, check, env)
+
+
+def mock_subprocess_popen(cmd: str, env: dict = None):
+    """Mock wrapper that removes --terragrunt-iam-role flag from all Terragrunt related commands passed to subprocess_popen()."""
+    cmd = re.sub(r"\s--terragrunt-iam-role\s+.+?(?=\s|$)", "", cmd)
+    return subprocess_popen(cmd, env)
 
 
 @pytest.fixture(scope="module")
@@ -0,0 +1,162 @@
+import os
+import logging
+import subprocess
+
+import pytest
+
+from docker.src.common.checkout import sparse_clone, get_sparse_patterns
+from docker.src.common.graph import UnresolvableConfigException
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+repo_files = {
+    "terragrunt.hcl": "",
+    "dev/account.hcl": "",
+    "dev/foo/terragrunt.hcl": """
+include {
+  path = find_in_parent_folders()
+}
+
+locals {
+  account = read_terragrunt_config(find_in_parent_folders("account.hcl"))
+}
+
+terraform {
+  source = "../../modules//vpc"
+}
+
+dependency "bar" {
+  config_path = "../bar"
+}
+""",
+    "dev/bar/terragrunt.hcl": """
+include {
+  path = find_in_parent_folders()
+}
+""",
+    "dev/bar/main.tf": """
+module "this" {
+  source = "../../shared/this"
+}
+
+module "remote" {
+  source = "terraform-aws-modules/vpc/aws"
+}
+""",
+    "dev/baz/terragrunt.hcl": "",
+    "dev/baz/main.tf": "",
+    "modules/vpc/main.tf": "",
+    "modules/subnet/main.tf": "",
+    "shared/this/main.tf": "",
+    "shared/other/main.tf": "",
+}
+
+
+@pytest.fixture
+def clone_url(tmp_path):
+    """Creates local git repository containing the test repository files"""
+    repo_path = str(tmp_path / "remote")
+    for path, content in repo_files.items():
+        abs_path = os.path.join(repo_path, path)
+        os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+        with open(abs_path, "w") as f:
+            f.write(content)
+
+    for cmd in [
+        ["init", "-q", "-b", "master"],
+        ["config", "uploadpack.allowFilter", "true"],
+        ["add", "-A"],
+        [
+            "-c",
+            "user.name=test",
+            "-c",
+            "user.email=test@test.com",
+            "commit",
+            "-m",
+            "test",
+        ],
+    ]:
+        subprocess.run(["git", "-C", repo_path, *cmd], check=True)
+
+    return f"file://{repo_path}"
+
+
+def get_files(repo_path):
+    """Returns the relative paths of the files within the working tree"""
+    files = []
+    for root, dirs, filenames in os.walk(repo_path):
+        dirs[:] = [d for d in dirs if d != ".git"]
+        files.extend(
+            os.path.relpath(os.path.join(root, name), repo_path) for name in filenames
+        )
+    return sorted(files)
+
+
+def test_sparse_clone(clone_url, tmp_path):
+    """
+    Ensures sparse_clone() only checks out the Terragrunt directory, its
+    parent directory files, its dependencies and the local modules they use
+    """
+    repo_path = str(tmp_path / "local")
+
+    sparse_clone(clone_url, "master", repo_path, "dev/foo")
+
+    assert get_files(repo_path) == sorted(
+        [
+            "terragrunt.hcl",
+            "dev/account.hcl",
+            "dev/foo/terragrunt.hcl",
+            "dev/bar/terragrunt.hcl",
+            "dev/bar/main.tf",
+            "modules/vpc/main.tf",
+            "modules/subnet/main.tf",
+            "shared/this/main.tf",
+        ]
+    )
+
+
+def test_sparse_clone_unresolvable(clone_url, tmp_path):
+    """
+    Ensures sparse_clone() raises an exception if the Terragrunt
+    configuration reads paths that can't be resolved without Terragrunt
+    """
+    repo_path = str(tmp_path / "local")
+    remote_path = clone_url.replace("file://", "")
+    with open(os.path.join(remote_path, "dev/baz/terragrunt.hcl"), "w") as f:
+        f.write('terraform {\n  source = "${get_parent_terragrunt_dir()}/modules"\n}')
+    subprocess.run(
+        [
+            "git",
+            "-C",
+            remote_path,
+            "-c",
+            "user.name=test",
+            "-c",
+            "user.email=test@test.com",
+            "commit",
+            "-am",
+            "test",
+        ],
+        check=True,
+    )
+
+    with pytest.raises(UnresolvableConfigException):
+        sparse_clone(clone_url, "master", repo_path, "dev/baz")
+
+
+def test_get_sparse_patterns():
+    """
+    Ensures get_sparse_patterns() includes the parent directory files without
+    their subdirectories and drops directories within other directories
+    """
+    actual = get_sparse_patterns(["dev/foo", "dev/foo/nested", "dev-other"])
+
+    assert actual == [
+        "/*",
+        "!/*/",
+        "/dev/",
+        "!/dev/*/",
+        "/dev-other/",
+        "/dev/foo/",
+    ]
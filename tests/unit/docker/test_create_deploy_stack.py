@@ -1,6 +1,9 @@
 import pytest
 import os
 import logging
+import time
+import json
+import threading
 from unittest.mock import patch
 import uuid
 import git
@@ -10,7 +13,9 @@ from tests.helpers.utils import (
     rds_data_client,
     push,
 )
-from tests.unit.docker.conftest import mock_subprocess_run
+from tests.unit.docker.conftest import mock_subprocess_run, mock_subprocess_popen
+from docker.src.common.utils import ClientException
+from docker.src.common.graph import GraphCache
 from docker.src.create_deploy_stack.create_deploy_stack import CreateStack  # noqa: E402
 
 log = logging.getLogger(__name__)
@@ -55,6 +60,74 @@ def test_get_new_providers(mock_run, repo, tmp_path_factory):
     assert actual == ["registry.terraform.io/marshall7m/dummy"]
 
 
+@pytest.mark.parametrize(
+    "tf,expected_cmd",
+    [
+        pytest.param(
+            'resource "dummy_resource" "this" {}', "state pull", id="config_files"
+        ),
+        pytest.param(
+            'module "this" {\n  source = "./foo"\n}', "providers", id="fallback"
+        ),
+    ],
+)
+def test_get_new_providers_state(tmp_path, tf, expected_cmd):
+    """
+    Ensures get_new_providers() compares the configuration providers with the
+    pulled state providers and falls back to the `terragrunt providers` command
+    if the configuration providers can't be collected from the Terraform files
+    """
+    (tmp_path / "terragrunt.hcl").write_text("")
+    (tmp_path / "main.tf").write_text(tf)
+    state = {
+        "resources": [
+            {"provider": 'provider["registry.terraform.io/hashicorp/null"]'},
+        ]
+    }
+
+    with patch(
+        "docker.src.create_deploy_stack.create_deploy_stack.subprocess_run"
+    ) as mock_run:
+        mock_run.return_value.stdout = json.dumps(state)
+        task.get_new_providers(str(tmp_path), "mock-role-arn")
+
+    assert expected_cmd in mock_run.call_args.args[0]
+
+
+@pytest.mark.parametrize(
+    "concurrency,expected_cache_dirs",
+    [
+        pytest.param("2", 2, id="concurrent"),
+        pytest.param("0", 1, id="misconfigured"),
+    ],
+)
+@patch.dict(os.environ, {})
+def test_get_stack_new_providers(tmp_path, concurrency, expected_cache_dirs):
+    """
+    Ensures get_stack_new_providers() maps every path to its new providers and
+    that the paths use plugin cache directories within TF_PLUGIN_CACHE_DIR
+    """
+    cache_dir = str(tmp_path / "plugin-cache")
+    os.environ["TF_PLUGIN_CACHE_DIR"] = cache_dir
+    os.environ["CREATE_STACK_PATH_CONCURRENCY"] = concurrency
+    create_stack = CreateStack()
+    paths = [f"dev/path-{i}" for i in range(5)]
+
+    def get_new_providers(path, role_arn, env):
+        assert os.path.dirname(env["TF_PLUGIN_CACHE_DIR"]) == cache_dir
+        assert os.path.isdir(env["TF_PLUGIN_CACHE_DIR"])
+        return [f"registry.terraform.io/hashicorp/{os.path.basename(path)}"]
+
+    with patch.object(create_stack, "get_new_providers", side_effect=get_new_providers):
+        actual = create_stack.get_stack_new_providers(paths, "mock-role-arn")
+
+    assert len(os.listdir(cache_dir)) == expected_cache_dirs
+    assert actual == {
+        path: [f"registry.terraform.io/hashicorp/{os.path.basename(path)}"]
+        for path in paths
+    }
+
+
 @patch.dict(os.environ, {"TG_BACKEND": "local"})
 @pytest.mark.usefixtures("terraform_version", "terragrunt_version")
 def test_get_graph_deps(tmp_path_factory, repo):
@@ -85,6 +158,154 @@ def test_get_graph_deps(tmp_path_factory, repo):
     }
 
 
+def test_get_hybrid_diff_paths(tmp_path):
+    """
+    Ensures get_hybrid_diff_paths() only plans the graph scan directories and
+    returns the directories with plan differences
+    """
+    candidates = ["global", "foo", "bar", "baz"]
+    exitcodes = {"global": 2, "foo": 0, "bar": 2, "baz": 0}
+
+    create_stack = CreateStack()
+    with patch.dict(
+        os.environ, {"TF_PLUGIN_CACHE_DIR": str(tmp_path / "plugin-cache")}
+    ), patch.object(
+        create_stack, "get_github_diff_paths", return_value=candidates
+    ), patch.object(
+        create_stack,
+        "get_plan_exitcode",
+        side_effect=lambda path, role, env: exitcodes[path],
+    ) as mock_plan:
+        actual = create_stack.get_hybrid_diff_paths({}, "mock-path", "mock-role-arn")
+
+    assert sorted(call.args[0] for call in mock_plan.call_args_list) == sorted(
+        candidates
+    )
+    assert actual == ["global", "bar"]
+
+
+def test_get_cached_graph_deps(tmp_path):
+    """
+    Ensures get_cached_graph_deps() only evaluates directories that have
+    changed configurations since the previous call
+    """
+    repo_root = tmp_path / "repo"
+    for path, content in {
+        "global/terragrunt.hcl": "",
+        "foo/terragrunt.hcl": 'dependency "global" {\n  config_path = "../global"\n}',
+        "bar/terragrunt.hcl": 'dependency "foo" {\n  config_path = local.foo\n}',
+    }.items():
+        (repo_root / path).parent.mkdir(parents=True, exist_ok=True)
+        (repo_root / path).write_text(content)
+        (repo_root / path).with_name("main.tf").write_text("")
+
+    tg_graph_deps = {"global": [], "foo": ["global"], "bar": ["foo"]}
+    with patch.dict(
+        os.environ,
+        {"SOURCE_REPO_PATH": str(repo_root), "GRAPH_DEPS_EXTRACTOR": "python"},
+    ), patch.object(
+        task, "get_terragrunt_graph_deps", return_value=tg_graph_deps
+    ) as mock_tg:
+        cache = GraphCache(str(tmp_path / "cache"))
+        actual = task.get_cached_graph_deps(str(repo_root), "mock-role-arn", cache)
+        assert actual == tg_graph_deps
+        assert (cache.hits, cache.misses) == (0, 3)
+        # only unresolvable configuration requires Terragrunt
+        assert mock_tg.call_count == 1
+
+        cache = GraphCache(str(tmp_path / "cache"))
+        actual = task.get_cached_graph_deps(str(repo_root), "mock-role-arn", cache)
+        assert actual == tg_graph_deps
+        assert (cache.hits, cache.misses) == (3, 0)
+        assert mock_tg.call_count == 1
+
+        (repo_root / "foo/terragrunt.hcl").write_text("")
+        cache = GraphCache(str(tmp_path / "cache"))
+        actual = task.get_cached_graph_deps(str(repo_root), "mock-role-arn", cache)
+        assert actual == {**tg_graph_deps, "foo": []}
+        assert (cache.hits, cache.misses) == (2, 1)
+        assert mock_tg.call_count == 1
+
+
+def chain_graph(size: int) -> dict:
+    """Returns graph where each path depends on the previous path"""
+    graph = {"path-0": []}
+    for i in range(1, size):
+        graph[f"path-{i}"] = [f"path-{i - 1}"]
+    return graph
+
+
+def diamond_graph(size: int) -> dict:
+    """
+    Returns graph of stacked diamonds where each diamond's left and right paths
+    depend on the previous diamond's bottom path
+    """
+    graph = {"path-0": []}
+    for i in range(1, size // 3):
+        top = f"path-{(i - 1) * 3}"
+        graph[f"path-{i * 3 - 2}"] = [top]
+        graph[f"path-{i * 3 - 1}"] = [top]
+        graph[f"path-{i * 3}"] = [f"path-{i * 3 - 2}", f"path-{i * 3 - 1}"]
+    return graph
+
+
+def fan_out_graph(size: int) -> dict:
+    """Returns graph where every path depends on the root path"""
+    graph = {"path-0": []}
+    for i in range(1, size):
+        graph[f"path-{i}"] = ["path-0"]
+    return graph
+
+
+@pytest.mark.parametrize(
+    "graph_fn",
+    [
+        pytest.param(chain_graph, id="chain"),
+        pytest.param(diamond_graph, id="diamond"),
+        pytest.param(fan_out_graph, id="fan_out"),
+    ],
+)
+@pytest.mark.parametrize("size", [100, 1000, 10000, 30000])
+def test_get_dependent_paths_benchmark(graph_fn, size):
+    """
+    Benchmarks get_dependent_paths() on synthetic graphs to ensure the
+    traversal stays linear in the size of the graph
+    """
+    graph_deps = graph_fn(size)
+
+    start = time.perf_counter()
+    actual = task.get_dependent_paths(graph_deps, ["path-0"])
+    duration = time.perf_counter() - start
+    log.info(f"Paths: {len(graph_deps)} -- Duration: {duration:.4f}s")
+
+    assert sorted(actual) == sorted(graph_deps.keys())
+    # a scan of the entire graph for every visited path would take minutes
+    # for the larger graphs
+    assert duration < 1
+
+
+def test_get_dependent_paths():
+    """
+    Ensures get_dependent_paths() only returns the changed paths and their
+    direct and indirect dependents that are within the graph
+    """
+    graph_deps = {
+        "global": [],
+        "us-west-2/env-one/bar": ["us-west-2/env-one/baz", "global"],
+        "us-west-2/env-one/baz": ["global"],
+        "us-west-2/env-one/doo": ["global"],
+        "us-west-2/env-one/foo": ["us-west-2/env-one/bar"],
+    }
+
+    actual = task.get_dependent_paths(graph_deps, ["us-west-2/env-one/baz", "other"])
+
+    assert sorted(actual) == [
+        "us-west-2/env-one/bar",
+        "us-west-2/env-one/baz",
+        "us-west-2/env-one/foo",
+    ]
+
+
 @patch.dict(
     os.environ,
     {"TG_BACKEND": "local"},
@@ -137,8 +358,8 @@ def test_get_github_diff_paths(repo, tmp_path_factory):
     {"TG_BACKEND": "local"},
 )
 @patch(
-    "docker.src.create_deploy_stack.create_deploy_stack.subprocess_run",
-    side_effect=mock_subprocess_run,
+    "docker.src.create_deploy_stack.create_deploy_stack.subprocess_popen",
+    side_effect=mock_subprocess_popen,
 )
 @pytest.mark.usefixtures("terraform_version", "terragrunt_version")
 def test_get_plan_diff_paths(mock_run, repo, tmp_path_factory):
@@ -181,6 +402,99 @@ def test_get_plan_diff_paths(mock_run, repo, tmp_path_factory):
     )
 
 
+@pytest.mark.parametrize("concurrency", ["2", "0"])
+def test_create_account_stacks(concurrency):
+    """
+    Ensures create_account_stacks() returns each account's stack in the same
+    order as the passed accounts even if later accounts finish first
+    """
+    accounts = [
+        {
+            "account_name": f"account-{i}",
+            "account_path": f"account-{i}",
+            "plan_role_arn": "mock-role-arn",
+        }
+        for i in range(4)
+    ]
+
+    def create_stack(path, role_arn):
+        time.sleep(0.1 * (4 - int(path.split("-")[-1])))
+        return [{"cfg_path": f"{path}/foo", "cfg_deps": [], "new_providers": []}]
+
+    with patch.dict(
+        os.environ, {"CREATE_STACK_ACCOUNT_CONCURRENCY": concurrency}
+    ), patch.object(task, "create_stack", side_effect=create_stack):
+        actual = task.create_account_stacks(accounts)
+
+    assert [account["account_name"] for account, _ in actual] == [
+        account["account_name"] for account in accounts
+    ]
+    assert [stack[0]["cfg_path"] for _, stack in actual] == [
+        f'{account["account_path"]}/foo' for account in accounts
+    ]
+
+
+@patch.dict(os.environ, {"CREATE_STACK_ACCOUNT_CONCURRENCY": "1"})
+def test_create_account_stacks_failure():
+    """
+    Ensures create_account_stacks() raises the account's exception and
+    cancels the accounts that are still queued
+    """
+    accounts = [
+        {
+            "account_name": f"account-{i}",
+            "account_path": f"account-{i}",
+            "plan_role_arn": "mock-role-arn",
+        }
+        for i in range(4)
+    ]
+
+    def create_stack(path, role_arn):
+        time.sleep(0.2)
+        raise ClientException("mock error")
+
+    with patch.object(
+        task, "create_stack", side_effect=create_stack
+    ) as mock_create_stack:
+        with pytest.raises(ClientException):
+            task.create_account_stacks(accounts)
+
+    assert mock_create_stack.call_count < len(accounts)
+
+
+@patch.dict(
+    os.environ, {"BASE_COMMIT_ID": "mock-base-sha", "COMMIT_ID": "mock-head-sha"}
+)
+def test_filter_changed_accounts():
+    """
+    Ensures filter_changed_accounts() only returns the accounts that contain
+    .hcl/.tf differences or depend on accounts that do
+    """
+    accounts = [
+        {"account_name": "shared", "account_path": "shared", "account_deps": []},
+        {"account_name": "dev", "account_path": "dev", "account_deps": ["shared"]},
+        {"account_name": "prod", "account_path": "prod", "account_deps": ["dev"]},
+        {"account_name": "other", "account_path": "other", "account_deps": []},
+        {"account_name": "docs", "account_path": "docs", "account_deps": []},
+    ]
+    diff_files = {
+        "shared/foo/terragrunt.hcl": "modified",
+        "docs/README.md": "modified",
+    }
+
+    with patch(
+        "docker.src.create_deploy_stack.create_deploy_stack.get_diff_files",
+        return_value=diff_files,
+    ):
+        actual = task.filter_changed_accounts(accounts)
+
+    assert [account["account_name"] for account in actual] == [
+        "shared",
+        "dev",
+        "prod",
+    ]
+
+
 @patch.dict(
     os.environ,
     {
@@ -198,8 +512,19 @@ def test_get_plan_diff_paths(mock_run, repo, tmp_path_factory):
             [
                 [{"cfg_path": "foo", "cfg_deps": ["bar"], "new_providers": ["baz"]}],
                 [{"cfg_path": "foo", "cfg_deps": ["bar"], "new_providers": ["baz"]}],
-            ]
-        )
+            ],
+            id="multiple_accounts",
+        ),
+        pytest.param(
+            [
+                [
+                    {"cfg_path": "foo's", "cfg_deps": ['b"ar'], "new_providers": []},
+                    {"cfg_path": "bar,baz", "cfg_deps": [], "new_providers": []},
+                ],
+                [],
+            ],
+            id="quoted_values",
+        ),
     ],
 )
 def test_update_executions_with_new_deploy_stack_query(create_stack):
@@ -219,4 +544,100 @@ def test_update_executions_with_new_deploy_stack_query(create_stack):
             cur.execute("SELECT COUNT(*) FROM executions")
             count = cur.fetchone()[0]
 
-        assert count == len(create_stack)
+        assert count == sum(len(stack) for stack in create_stack)
+
+
+@patch.dict(
+    os.environ,
+    {"CREATE_STACK_ACCOUNT_CONCURRENCY": "4", "CREATE_STACK_PATH_CONCURRENCY": "3"},
+)
+def test_create_account_stacks_path_concurrency(tmp_path):
+    """
+    Ensures the directory level calls of accounts that are processed at once
+    share the path concurrency limit instead of multiplying it
+    """
+    os.environ["TF_PLUGIN_CACHE_DIR"] = str(tmp_path / "plugin-cache")
+    create_stack = CreateStack()
+    accounts = [
+        {
+            "account_name": f"account-{i}",
+            "account_path": f"account-{i}",
+            "plan_role_arn": "mock-role-arn",
+        }
+        for i in range(4)
+    ]
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def get_new_providers(path, env):
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return []
+
+    def mock_create_stack(path, role_arn):
+        return create_stack.map_paths(
+            get_new_providers, [f"{path}/dir-{i}" for i in range(4)]
+        )
+
+    with patch.object(create_stack, "create_stack", side_effect=mock_create_stack):
+        actual = create_stack.create_account_stacks(accounts)
+
+    assert len(actual) == len(accounts)
+    assert 1 < max_active <= 3
+
+
+@patch.dict(
+    os.environ,
+    {"CREATE_STACK_ACCOUNT_CONCURRENCY": "2", "CREATE_STACK_PATH_CONCURRENCY": "2"},
+)
+def test_create_account_stacks_plugin_cache(tmp_path):
+    """
+    Ensures accounts that are processed at once against the same
+    TF_PLUGIN_CACHE_DIR never run Terragrunt commands that write to the same
+    plugin cache directory at the same time
+    """
+    cache_dir = str(tmp_path / "plugin-cache")
+    os.environ["TF_PLUGIN_CACHE_DIR"] = cache_dir
+    create_stack = CreateStack()
+    accounts = [
+        {
+            "account_name": f"account-{i}",
+            "account_path": f"account-{i}",
+            "plan_role_arn": "mock-role-arn",
+        }
+        for i in range(2)
+    ]
+    in_use = set()
+    used = set()
+    lock = threading.Lock()
+
+    def get_new_providers(path, role_arn, env):
+        with lock:
+            assert env["TF_PLUGIN_CACHE_DIR"] not in in_use
+            in_use.add(env["TF_PLUGIN_CACHE_DIR"])
+            used.add(env["TF_PLUGIN_CACHE_DIR"])
+        time.sleep(0.05)
+        with lock:
+            in_use.remove(env["TF_PLUGIN_CACHE_DIR"])
+        return []
+
+    def mock_create_stack(path, role_arn):
+        return create_stack.get_stack_new_providers(
+            [f"{path}/dir-{i}" for i in range(4)], role_arn
+        )
+
+    with patch.object(
+        create_stack, "get_new_providers", side_effect=get_new_providers
+    ) as mock_get_new_providers, patch.object(
+        create_stack, "create_stack", side_effect=mock_create_stack
+    ):
+        create_stack.create_account_stacks(accounts)
+
+    assert mock_get_new_providers.call_count == 8
+    assert sorted(used) == [os.path.join(cache_dir, str(i)) for i in range(2)]
@@ -0,0 +1,107 @@
+import os
+import logging
+import subprocess
+from unittest.mock import patch
+from docker.src.common.diff import get_git_diff_files, get_diff_files
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+def git(repo_path, *args) -> str:
+    """Runs the git command within the repo and returns the stdout"""
+    return subprocess.run(
+        ["git", "-C", repo_path, *args], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def commit(repo_path, changes: dict) -> str:
+    """
+    Writes the changes within the repo and returns the commit ID
+
+    Arguments:
+        changes: Map keys consisting of filepaths that are relative to the
+            root directory of the repo and string content to write to the
+            filepath. If the content is None, the filepath is removed.
+    """
+    for path, content in changes.items():
+        abs_path = os.path.join(repo_path, path)
+        if content is None:
+            os.remove(abs_path)
+            continue
+        os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+        with open(abs_path, "w") as f:
+            f.write(content)
+    git(repo_path, "add", "-A")
+    git(
+        repo_path,
+        "-c",
+        "user.name=test",
+        "-c",
+        "user.email=test@test.com",
+        "commit",
+        "-m",
+        "test",
+    )
+    return git(repo_path, "rev-parse", "HEAD")
+
+
+def test_get_git_diff_files(tmp_path):
+    """
+    Ensures get_git_diff_files() returns the GitHub file statuses of the local
+    differences including renamed files and paths with special characters
+    """
+    repo_path = str(tmp_path)
+    git(repo_path, "init")
+    base = commit(
+        repo_path,
+        {
+            "dev/foo/terragrunt.hcl": "",
+            "dev/bar/main.tf": "",
+            "dev/baz/main.tf": "",
+        },
+    )
+    head = commit(
+        repo_path,
+        {
+            "dev/foo/terragrunt.hcl": "inputs = {}",
+            "dev/bar/main.tf": None,
+            "dev/doo/main.tf": "",
+            "dev/baz/main.tf": None,
+            "dev/baz new/main.tf": "",
+            'dev/"zoo"/main.tf': "",
+        },
+    )
+
+    actual = get_git_diff_files(repo_path, base, head)
+
+    assert actual == {
+        "dev/foo/terragrunt.hcl": "modified",
+        "dev/bar/main.tf": "removed",
+        "dev/doo/main.tf": "added",
+        "dev/baz/main.tf": "removed",
+        "dev/baz new/main.tf": "added",
+        'dev/"zoo"/main.tf': "added",
+    }
+
+
+def test_get_diff_files_fallback(tmp_path):
+    """
+    Ensures get_diff_files() uses the GitHub API if the commits are not
+    within the local repo
+    """
+    repo_path = str(tmp_path)
+    git(repo_path, "init")
+    commit(repo_path, {"dev/foo/main.tf": ""})
+
+    with patch.dict(
+        os.environ,
+        {"SOURCE_REPO_PATH": repo_path, "REPO_FULL_NAME": "user/repo"},
+    ), patch(
+        "docker.src.common.diff.get_github_diff_files",
+        return_value={"dev/foo/main.tf": "added"},
+    ) as mock_github:
+        actual = get_diff_files("mock-base-sha", "mock-head-sha")
+
+    mock_github.assert_called_once_with("user/repo", "mock-base-sha", "mock-head-sha")
+    assert actual == {"dev/foo/main.tf": "added"}
@@ -0,0 +1,157 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import github
+import pytest
+from github.Requester import HTTPSRequestsConnectionClass
+
+from docker.src.common.github_client import GitHubClient
+from tests.helpers.github_server import FakeGitHub
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+def test_github_client_request_counts():
+    """
+    Ensures the client doesn't request the repository or commit before
+    creating commit statuses and comments and revalidates unchanged branches
+    with their ETags
+    """
+    with FakeGitHub() as server:
+        server.branches[("user/repo", "feature")] = "abc123"
+        server.pull_files[("user/repo", 1)] = ["dev/foo/main.tf", "dev/bar/main.tf"]
+        client = GitHubClient("mock-token", base_url=server.url)
+
+        for _ in range(3):
+            commit = client.get_branch_commit("user/repo", "feature")
+            commit.create_status(state="pending", context="Merge Lock")
+        client.get_commit("user/repo", "def456").create_status(
+            state="success", context="Plan: dev/foo"
+        )
+
+        pr = client.get_pull("user/repo", 1)
+        assert [f.filename for f in pr.get_files()] == [
+            "dev/foo/main.tf",
+            "dev/bar/main.tf",
+        ]
+        pr.create_issue_comment("mock-comment")
+
+        assert client.get_repo("user/repo") is client.get_repo("user/repo")
+        assert client.get_commit("user/repo", "abc123") is commit
+
+    log.debug(f"Requests: {server.requests}")
+    assert server.count("GET", "/repos/user/repo") == 0
+    assert server.count("GET", "/repos/user/repo/commits/.+") == 0
+    assert server.count("GET", "/repos/user/repo/pulls/1") == 0
+    assert server.count("GET", "/repos/user/repo/branches/feature") == 3
+    assert server.count("POST") == 5
+    assert len(server.statuses) == 4
+    assert server.comments == [{"number": 1, "body": "mock-comment"}]
+
+    # the revalidated branch requests don't count against the rate limit
+    assert client.metrics["not_modified"] == 2
+    assert client.rate_remaining == server.rate_limit - 7
+    assert client.metrics["requests"] == len(server.requests)
+
+    client.log_metrics()
+    assert client.metrics["requests"] == 0
+
+
+def test_github_client_throttle():
+    """
+    Ensures the client waits for the rate limit reset once the remaining
+    requests are low and limits the amount of mutating requests per minute
+    """
+    with FakeGitHub(rate_limit=3) as server, patch(
+        "docker.src.common.github_client.time.sleep"
+    ) as mock_sleep:
+        client = GitHubClient(
+            "mock-token",
+            base_url=server.url,
+            min_remaining=1,
+            max_mutations_per_minute=2,
+        )
+        commit = client.get_commit("user/repo", "abc123")
+        commit.create_status(state="pending", context="foo")
+        assert mock_sleep.call_count == 0
+
+        commit.create_status(state="pending", context="bar")
+        # remaining rate limit is at the minimum and the mutation limit is met
+        commit.create_status(state="pending", context="baz")
+
+    assert len(server.statuses) == 3
+    assert mock_sleep.call_count == 1
+    assert 0 < mock_sleep.call_args.args[0] <= 60
+    assert client.metrics["throttled"] == 1
+
+
+def test_github_client_concurrent_statuses():
+    """Ensures concurrent commit statuses share the client's connection"""
+    with FakeGitHub() as server:
+        server.delay = 0.01
+        client = GitHubClient("mock-token", base_url=server.url, max_concurrency=5)
+        commit = client.get_commit("user/repo", "abc123")
+        contexts = [f"Plan: dev/dir-{i}" for i in range(20)]
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            list(
+                executor.map(
+                    lambda context: commit.create_status(
+                        state="pending", context=context
+                    ),
+                    contexts,
+                )
+            )
+
+    assert sorted(status["context"] for status in server.statuses) == sorted(contexts)
+    assert server.count() == 20
+
+
+def test_github_client_etag_cache_size():
+    """
+    Ensures the client only keeps the most recently used responses for ETag
+    revalidation
+    """
+    with FakeGitHub() as server:
+        for branch in ["foo", "bar", "baz"]:
+            server.branches[("user/repo", branch)] = "abc123"
+        client = GitHubClient("mock-token", base_url=server.url, max_cached_responses=2)
+
+        for branch in ["foo", "bar", "baz"]:
+            client.get_branch_commit("user/repo", branch)
+        assert len(client._etags) == 2
+
+        # the least recently used branch response was evicted
+        client.get_branch_commit("user/repo", "foo")
+        assert client.metrics["not_modified"] == 0
+
+        client.get_branch_commit("user/repo", "foo")
+        assert client.metrics["not_modified"] == 1
+        assert len(client._etags) == 2
+
+
+def test_github_client_pygithub_attributes():
+    """
+    Ensures the private PyGithub attributes the client patches still exist so
+    that a PyGithub upgrade fails loudly instead of silently bypassing the
+    client's throttling and ETag cache
+    """
+    gh = github.Github(login_or_token="mock-token")
+    requester = getattr(gh, "_Github__requester", None)
+    assert requester is not None, "Github._Github__requester is missing"
+    assert hasattr(
+        requester, "_Requester__connectionClass"
+    ), "Requester._Requester__connectionClass is missing"
+
+    conn = HTTPSRequestsConnectionClass("api.github.com")
+    for attr in ["session", "protocol", "host", "port", "timeout", "verify"]:
+        assert hasattr(conn, attr), f"PyGithub connection attribute is missing: {attr}"
+
+    client = GitHubClient("mock-token")
+    assert client._requester._Requester__connectionClass.client is client
+
+    # PyGithub client without the private requester attribute
+    with patch("docker.src.common.github_client.github.Github", return_value=object()):
+        with pytest.raises(RuntimeError, match="PyGithub=="):
+            GitHubClient("mock-token")
@@ -0,0 +1,239 @@
+import os
+import json
+import pytest
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from docker.src.common import graph
+from docker.src.common.graph import (
+    extract_graph_deps,
+    GraphCache,
+    UnresolvableConfigException,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+def write_configs(root, configs: dict) -> None:
+    """Writes the Terragrunt configuration content to the mapped paths"""
+    for path, content in configs.items():
+        path = root / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def test_extract_graph_deps(tmp_path):
+    """
+    Ensures extract_graph_deps() returns the same mapping as the
+    `terragrunt graph-dependencies` command for string literal dependency paths
+    """
+    write_configs(
+        tmp_path,
+        {
+            "terragrunt.hcl": """
+remote_state {
+  backend = "local"
+  config = {}
+}
+""",
+            "account/global/terragrunt.hcl": """
+include {
+  path = find_in_parent_folders()
+}
+
+terraform {
+  source = "../../modules//global"
+}
+""",
+            "account/us-west-2/baz/main.tf": "",
+            "account/us-west-2/baz/terragrunt.hcl": """
+# dependency "foo" { config_path = "../foo" }
+dependency "global" {
+  config_path = "../../global" // inline comment
+  mock_outputs = {
+    config_path = "ignored"
+    nested = { value = "}" }
+  }
+}
+""",
+            "account/us-west-2/bar/main.tf": "",
+            "account/us-west-2/bar/terragrunt.hcl": """
+/*
+dependency "doo" {
+  config_path = "../doo"
+}
+*/
+dependency "baz" { config_path = "../baz" }
+
+dependencies {
+  paths = [
+    "../../global",
+    "../baz",
+  ]
+}
+
+inputs = {
+  foo = <<EOF
+dependency "doo" {
+  config_path = "../doo"
+}
+EOF
+}
+""",
+            "account/us-west-2/bar/.terragrunt-cache/foo/terragrunt.hcl": "",
+        },
+    )
+
+    actual = extract_graph_deps(str(tmp_path), str(tmp_path))
+
+    # parent configuration isn't a module
+    assert actual == {
+        "account/global": [],
+        "account/us-west-2/bar": ["account/us-west-2/baz", "account/global"],
+        "account/us-west-2/baz": ["account/global"],
+    }
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        pytest.param(
+            'dependency "foo" {\n  config_path = "${get_terragrunt_dir()}/../foo"\n}',
+            id="template",
+        ),
+        pytest.param(
+            'dependency "foo" {\n  config_path = local.foo_path\n}',
+            id="reference",
+        ),
+        pytest.param(
+            'dependencies {\n  paths = concat(["../foo"], local.paths)\n}',
+            id="function",
+        ),
+        pytest.param('dependency "foo" {\n  config_path = "../foo"\n', id="invalid"),
+    ],
+)
+def test_extract_graph_deps_unresolvable(tmp_path, content):
+    """
+    Ensures extract_graph_deps() raises an exception for dependency paths that
+    can't be resolved without evaluating the configuration
+    """
+    write_configs(tmp_path, {"bar/terragrunt.hcl": content})
+
+    with pytest.raises(UnresolvableConfigException):
+        extract_graph_deps(str(tmp_path), str(tmp_path))
+
+
+def test_extract_graph_deps_included_dependencies(tmp_path):
+    """
+    Ensures extract_graph_deps() raises an exception for configurations that
+    include configurations defining dependencies
+    """
+    write_configs(
+        tmp_path,
+        {
+            "common.hcl": 'dependency "foo" {\n  config_path = "../foo"\n}',
+            "account/bar/terragrunt.hcl": 'include {\n  path = find_in_parent_folders("common.hcl")\n}',
+        },
+    )
+
+    with pytest.raises(UnresolvableConfigException):
+        extract_graph_deps(str(tmp_path / "account"), str(tmp_path))
+
+
+def test_extract_graph_deps_cache(tmp_path):
+    """Ensures configurations with the same content are only parsed once"""
+    content = 'dependency "global" {\n  config_path = "../global"\n}'
+    configs = {f"{i}/terragrunt.hcl": content for i in range(10)}
+    configs.update({f"{i}/main.tf": "" for i in range(10)})
+    write_configs(tmp_path, configs)
+    graph._parse_cache.clear()
+
+    with patch.object(graph, "tokenize", wraps=graph.tokenize) as mock_tokenize:
+        actual = extract_graph_deps(str(tmp_path), str(tmp_path))
+
+    assert mock_tokenize.call_count == 1
+    assert actual == {str(i): ["global"] for i in range(10)}
+
+
+def test_graph_cache(tmp_path):
+    """
+    Ensures GraphCache keys only change for directories with changed HCL files
+    within themselves or their parent directories
+    """
+    write_configs(
+        tmp_path,
+        {
+            "repo/terragrunt.hcl": "",
+            "repo/foo/terragrunt.hcl": "",
+            "repo/bar/terragrunt.hcl": "",
+        },
+    )
+    repo = tmp_path / "repo"
+    cache = GraphCache(str(tmp_path / "cache"))
+
+    keys = {d: cache.get_key(str(repo / d), str(repo)) for d in ["foo", "bar"]}
+    assert cache.get(keys["foo"]) is None
+
+    cache.put(keys["foo"], {"is_module": True, "deps": ["../bar"]})
+    assert cache.get(keys["foo"]) == {"is_module": True, "deps": ["../bar"]}
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+    (repo / "foo" / "terragrunt.hcl").write_text('dependency "bar" {}')
+    cache = GraphCache(str(tmp_path / "cache"))
+    assert cache.get_key(str(repo / "foo"), str(repo)) != keys["foo"]
+    assert cache.get_key(str(repo / "bar"), str(repo)) == keys["bar"]
+
+    (repo / "terragrunt.hcl").write_text("inputs = {}")
+    cache = GraphCache(str(tmp_path / "cache"))
+    assert cache.get_key(str(repo / "bar"), str(repo)) != keys["bar"]
+
+
+def test_graph_cache_read_files(tmp_path):
+    """
+    Ensures GraphCache keys change when files read by the configuration change
+    and directories with unresolvable file reads aren't cached
+    """
+    write_configs(
+        tmp_path,
+        {
+            "repo/account.yaml": "id: 1",
+            "repo/terragrunt.hcl": 'locals {\n  account = yamldecode(file(find_in_parent_folders("account.yaml")))\n}',
+            "repo/common/env.hcl": 'locals {\n  region = file("region.txt")\n}',
+            "repo/common/region.txt": "us-west-2",
+            "repo/foo/terragrunt.hcl": 'include {\n  path = find_in_parent_folders()\n}\nlocals {\n  env = read_terragrunt_config("../common/env.hcl")\n}',
+            "repo/bar/terragrunt.hcl": 'locals {\n  env = read_terragrunt_config("${get_terragrunt_dir()}/env.hcl")\n}',
+        },
+    )
+    repo = tmp_path / "repo"
+    cache = GraphCache(str(tmp_path / "cache"))
+
+    key = cache.get_key(str(repo / "foo"), str(repo))
+    assert key is not None
+    assert cache.get_key(str(repo / "bar"), str(repo)) is None
+
+    (repo / "account.yaml").write_text("id: 2")
+    cache = GraphCache(str(tmp_path / "cache"))
+    assert cache.get_key(str(repo / "foo"), str(repo)) != key
+    key = cache.get_key(str(repo / "foo"), str(repo))
+
+    (repo / "common" / "region.txt").write_text("us-east-1")
+    cache = GraphCache(str(tmp_path / "cache"))
+    assert cache.get_key(str(repo / "foo"), str(repo)) != key
+
+
+def test_graph_cache_concurrent_put(tmp_path):
+    """
+    Ensures threads that put the same key at once never corrupt the entry or
+    leave temporary files behind
+    """
+    cache = GraphCache(str(tmp_path / "cache"))
+    nodes = [{"is_module": False, "deps": [f"../dep-{i}"] * 1000} for i in range(20)]
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        list(executor.map(lambda node: cache.put("mock-key", node), nodes))
+
+    assert os.listdir(tmp_path / "cache") == ["mock-key.json"]
+    with open(tmp_path / "cache" / "mock-key.json") as f:
+        assert json.load(f) in nodes
@@ -0,0 +1,69 @@
+import os
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from docker.src.common.mirror import mirror_clone, get_mirror_repo_path
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+def git(repo_path, *args) -> str:
+    """Runs the git command within the repo and returns the stdout"""
+    return subprocess.run(
+        [
+            "git",
+            "-C",
+            repo_path,
+            "-c",
+            "user.name=test",
+            "-c",
+            "user.email=test@test.com",
+            *args,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+
+def test_mirror_clone(tmp_path):
+    """
+    Ensures mirror_clone() creates the mirror on the first clone, fetches new
+    commits into it on later clones and that the clones don't depend on the
+    mirror's objects
+    """
+    remote = str(tmp_path / "remote")
+    mirror_path = str(tmp_path / "mirror")
+    os.makedirs(remote)
+    git(remote, "init", "-q", "-b", "master")
+    git(remote, "commit", "-q", "--allow-empty", "-m", "first")
+    clone_url = f"file://{remote}"
+
+    mirror_clone(clone_url, "master", str(tmp_path / "clone-1"), mirror_path)
+    mirror_repo = get_mirror_repo_path(clone_url, mirror_path)
+    assert os.path.isdir(mirror_repo)
+
+    git(remote, "commit", "-q", "--allow-empty", "-m", "second")
+    expected = git(remote, "rev-parse", "HEAD")
+
+    # concurrent clones share the mirror
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(
+            executor.map(
+                lambda i: mirror_clone(
+                    clone_url, "master", str(tmp_path / f"clone-{i}"), mirror_path
+                ),
+                range(2, 5),
+            )
+        )
+
+    assert git(mirror_repo, "rev-parse", "master") == expected
+    for i in range(2, 5):
+        clone = str(tmp_path / f"clone-{i}")
+        assert git(clone, "rev-parse", "HEAD") == expected
+        # dissociated clones don't reference the mirror's objects
+        assert not os.path.exists(
+            os.path.join(clone, ".git", "objects", "info", "alternates")
+        )
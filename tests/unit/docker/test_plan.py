@@ -0,0 +1,99 @@
+import pytest
+import sys
+import logging
+import subprocess
+from docker.src.common.plan import PlanDiffParser, stream_plan_diff_paths
+from docker.src.common.utils import TerragruntException
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+stderr = """
+time=2022-01-01T00:00:00Z level=info msg=Executing hook prefix=[/src/foo]
+time=2022-01-01T00:00:00Z level=error msg=Module /src/foo has finished with an error: exit status 2
+
+ prefix=[/src/foo]
+time=2022-01-01T00:00:00Z level=error msg=Module /src/bar has finished with an error: exit status 1
+
+ prefix=[/src/bar]
+time=2022-01-01T00:00:00Z level=error msg=Module /src/baz has finished with an error: exit status 2
+ prefix=[/src/baz]
+time=2022-01-01T00:00:00Z level=error msg=Module /src/doo has finished with an error: exit status 2
+
+ prefix=[/src/doo
+/nested]
+time=2022-01-01T00:00:00Z level=error msg=Module /src/zoo has finished with an error: exit status 2
+
+ prefix=[/src/zoo]
+"""
+
+
+def test_plan_diff_parser():
+    """
+    Ensures PlanDiffParser only detects directories with an exit status of 2
+    that are followed by a blank line and the directory's prefix
+    """
+    parser = PlanDiffParser()
+    actual = [parser.feed(line) for line in stderr.splitlines(keepends=True)]
+
+    assert [path for path in actual if path] == [
+        "/src/foo",
+        "/src/doo\n/nested",
+        "/src/zoo",
+    ]
+
+
+no_diff_stderr = """
+time=2022-01-01T00:00:00Z level=info msg=Executing hook prefix=[/src/foo]
+time=2022-01-01T00:00:00Z level=info msg=Executing hook prefix=[/src/bar]
+"""
+
+
+@pytest.mark.parametrize(
+    "returncode,output,expected_paths,raises",
+    [
+        pytest.param(
+            2,
+            stderr,
+            ["/src/foo", "/src/doo\n/nested", "/src/zoo"],
+            False,
+            id="diff",
+        ),
+        pytest.param(0, no_diff_stderr, [], False, id="no_diff"),
+        pytest.param(
+            1,
+            stderr,
+            ["/src/foo", "/src/doo\n/nested", "/src/zoo"],
+            True,
+            id="error",
+        ),
+    ],
+)
+def test_stream_plan_diff_paths(returncode, output, expected_paths, raises):
+    """
+    Ensures stream_plan_diff_paths() yields the diff directories while the
+    process is running, yields no directories if the plans have no
+    differences and raises an exception if the process fails
+    """
+    script = f"""
+import sys
+sys.stdout.write("plan output\\n" * 10000)
+sys.stderr.write({output!r})
+sys.exit({returncode})
+"""
+    process = subprocess.Popen(
+        [sys.executable, "-c", script],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    actual = []
+    if raises:
+        with pytest.raises(TerragruntException):
+            for path in stream_plan_diff_paths(process):
+                actual.append(path)
+    else:
+        actual = list(stream_plan_diff_paths(process))
+
+    assert actual == expected_paths
@@ -8,7 +8,7 @@ log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
 
-@patch("github.Github")
+@patch("docker.src.pr_plan.plan.get_client")
 @patch.dict(
     os.environ,
     {"CFG_PATH": "terraform/cfg", "REPO_FULL_NAME": "user/repo", "PR_ID": "1"},
@@ -0,0 +1,166 @@
+import os
+import re
+import logging
+import zipfile
+from unittest.mock import patch
+
+from docker.src.common.provider_mirror import (
+    configure,
+    get_locked_providers,
+    get_lock_files,
+    get_package_path,
+    populate,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+def write_lock_file(path, providers: dict) -> None:
+    """
+    Writes a Terraform lock file that selects the provider versions
+
+    Arguments:
+        providers: Map keys consisting of provider addresses and their version
+    """
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, ".terraform.lock.hcl"), "w") as f:
+        for address, version in providers.items():
+            f.write(
+                f"""
+provider "{address}" {{
+  version     = "{version}"
+  constraints = "~> {version}"
+  hashes = [
+    "h1:mock=",
+  ]
+}}
+"""
+            )
+
+
+def mock_subprocess_run(cmd):
+    """Mock `terraform providers mirror` that writes the configuration's providers"""
+    cfg_dir = re.search(r"-chdir=(\S+)", cmd).group(1)
+    mirror_path = cmd.split(" ")[-1]
+    with open(os.path.join(cfg_dir, "main.tf"), "r") as f:
+        cfg = f.read()
+    for address, version in re.findall(
+        r'source  = "(.+)"\n      version = "= (.+)"', cfg
+    ):
+        path = get_package_path(mirror_path, address, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with zipfile.ZipFile(path, "w") as zip:
+            zip.writestr("terraform-provider", "")
+
+
+def test_populate(tmp_path):
+    """
+    Ensures populate() mirrors every locked provider version across
+    repository directories and only downloads versions that are not
+    already within the mirror
+    """
+    repo_path = str(tmp_path / "repo")
+    mirror_path = str(tmp_path / "mirror")
+    write_lock_file(
+        os.path.join(repo_path, "dev/foo"),
+        {
+            "registry.terraform.io/hashicorp/aws": "4.0.0",
+            "registry.terraform.io/hashicorp/null": "3.1.0",
+        },
+    )
+    write_lock_file(
+        os.path.join(repo_path, "dev/bar"),
+        {"registry.terraform.io/hashicorp/aws": "4.1.0"},
+    )
+    write_lock_file(
+        os.path.join(repo_path, "dev/bar/.terragrunt-cache/baz"),
+        {"registry.terraform.io/hashicorp/random": "3.0.0"},
+    )
+
+    providers = get_locked_providers(get_lock_files(repo_path))
+    assert providers == {
+        "registry.terraform.io/hashicorp/aws": {"4.0.0", "4.1.0"},
+        "registry.terraform.io/hashicorp/null": {"3.1.0"},
+    }
+
+    with patch(
+        "docker.src.common.provider_mirror.subprocess_run",
+        side_effect=mock_subprocess_run,
+    ) as mock_run:
+        added = populate(mirror_path, providers)
+        # multiple versions of the same provider require separate rounds
+        assert mock_run.call_count == 2
+        assert sorted(added) == sorted(
+            [
+                get_package_path(mirror_path, "registry.terraform.io/hashicorp/aws", v)
+                for v in ["4.0.0", "4.1.0"]
+            ]
+            + [
+                get_package_path(
+                    mirror_path, "registry.terraform.io/hashicorp/null", "3.1.0"
+                )
+            ]
+        )
+        assert all(os.path.isfile(path) for path in added)
+        assert not os.path.exists(f"{mirror_path}.{os.getpid()}.tmp")
+
+        providers["registry.terraform.io/hashicorp/null"].add("3.2.0")
+        added = populate(mirror_path, providers)
+        assert mock_run.call_count == 3
+        assert added == [
+            get_package_path(
+                mirror_path, "registry.terraform.io/hashicorp/null", "3.2.0"
+            )
+        ]
+
+
+def test_configure(tmp_path):
+    """
+    Ensures configure() writes a CLI configuration that uses the image and
+    shared mirror and extends the existing CLI configuration
+    """
+    repo_path = str(tmp_path / "repo")
+    image_mirror_path = str(tmp_path / "image-mirror")
+    shared_mirror_path = str(tmp_path / "shared-mirror")
+    cli_config_path = str(tmp_path / "cli" / "mirror.tfrc")
+    base_config_path = str(tmp_path / "base.tfrc")
+    os.makedirs(image_mirror_path)
+    write_lock_file(repo_path, {"registry.terraform.io/hashicorp/aws": "4.0.0"})
+    with open(base_config_path, "w") as f:
+        f.write('plugin_cache_dir = "/tmp/cache"\n')
+
+    with patch.dict(
+        os.environ,
+        {
+            "PROVIDER_IMAGE_MIRROR_PATH": image_mirror_path,
+            "PROVIDER_MIRROR_PATH": shared_mirror_path,
+            "TF_CLI_CONFIG_FILE": base_config_path,
+        },
+    ), patch(
+        "docker.src.common.provider_mirror.subprocess_run",
+        side_effect=mock_subprocess_run,
+    ):
+        assert configure(repo_path, cli_config_path)
+
+    assert os.path.isfile(
+        get_package_path(
+            shared_mirror_path, "registry.terraform.io/hashicorp/aws", "4.0.0"
+        )
+    )
+    with open(cli_config_path, "r") as f:
+        actual = f.read()
+    assert actual.startswith('plugin_cache_dir = "/tmp/cache"\n')
+    assert actual.index(image_mirror_path) < actual.index(shared_mirror_path)
+    assert "direct {}" in actual
+
+    with open(base_config_path, "w") as f:
+        f.write(actual)
+    with patch.dict(
+        os.environ,
+        {
+            "PROVIDER_IMAGE_MIRROR_PATH": image_mirror_path,
+            "TF_CLI_CONFIG_FILE": base_config_path,
+        },
+    ):
+        assert not configure(repo_path, cli_config_path)
@@ -0,0 +1,129 @@
+import pytest
+import json
+import logging
+from docker.src.common.providers import get_config_providers, get_state_providers
+from docker.src.common.graph import UnresolvableConfigException
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+def write_files(root, files: dict) -> None:
+    for path, content in files.items():
+        (root / path).write_text(content)
+
+
+def test_get_config_providers(tmp_path):
+    """
+    Ensures get_config_providers() collects the required, configured and
+    implied providers of the Terraform configuration
+    """
+    write_files(
+        tmp_path,
+        {
+            "terragrunt.hcl": "",
+            "main.tf": """
+terraform {
+  required_providers {
+    dummy = {
+      source  = "marshall7m/dummy"
+      version = "0.0.3"
+    }
+    aws = "~> 4.0"
+  }
+}
+
+provider "dummy" {
+  foo = "bar"
+}
+
+resource "dummy_resource" "this" {}
+
+resource "null_resource" "this" {
+  provider = null.alias
+}
+
+data "terraform_remote_state" "this" {}
+""",
+            "outputs.tf": 'data "external" "this" {}',
+        },
+    )
+
+    assert get_config_providers(str(tmp_path)) == [
+        "registry.terraform.io/hashicorp/aws",
+        "registry.terraform.io/hashicorp/external",
+        "registry.terraform.io/hashicorp/null",
+        "registry.terraform.io/marshall7m/dummy",
+    ]
+
+
+def test_get_config_providers_lock_file(tmp_path):
+    """Ensures get_config_providers() includes the lock file providers of modules"""
+    write_files(
+        tmp_path,
+        {
+            "terragrunt.hcl": "",
+            "main.tf": 'module "foo" {\n  source = "./foo"\n}',
+        },
+    )
+
+    with pytest.raises(UnresolvableConfigException):
+        get_config_providers(str(tmp_path))
+
+    write_files(
+        tmp_path,
+        {
+            ".terraform.lock.hcl": """
+provider "registry.terraform.io/hashicorp/random" {
+  version = "3.4.3"
+  hashes = [
+    "h1:foo=",
+  ]
+}
+""",
+        },
+    )
+
+    assert get_config_providers(str(tmp_path)) == [
+        "registry.terraform.io/hashicorp/random"
+    ]
+
+
+def test_get_config_providers_terraform_source(tmp_path):
+    """Ensures get_config_providers() can't be used for remote Terraform sources"""
+    write_files(
+        tmp_path,
+        {
+            "terragrunt.hcl": 'terraform {\n  source = "github.com/foo/bar"\n}',
+            "main.tf": "",
+        },
+    )
+
+    with pytest.raises(UnresolvableConfigException):
+        get_config_providers(str(tmp_path))
+
+
+def test_get_state_providers():
+    """Ensures get_state_providers() collects the providers of the state resources"""
+    state = {
+        "version": 4,
+        "resources": [
+            {
+                "mode": "managed",
+                "type": "dummy_resource",
+                "provider": 'provider["registry.terraform.io/marshall7m/dummy"]',
+            },
+            {
+                "module": "module.foo",
+                "mode": "managed",
+                "type": "aws_instance",
+                "provider": 'provider["registry.terraform.io/hashicorp/aws"].west',
+            },
+        ],
+    }
+
+    assert get_state_providers(json.dumps(state)) == [
+        "registry.terraform.io/hashicorp/aws",
+        "registry.terraform.io/marshall7m/dummy",
+    ]
+    assert get_state_providers("") == []
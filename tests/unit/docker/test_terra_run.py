@@ -187,7 +187,7 @@ def test_main(
     assert mock_send_commit_status.call_args_list == [call(expected_status, log_url)]
 
 
-@patch("github.Github")
+@patch("docker.src.terra_run.run.get_client")
 @patch.dict(
     os.environ,
     {
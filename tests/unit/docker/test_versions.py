@@ -0,0 +1,60 @@
+import os
+import logging
+import zipfile
+from unittest.mock import patch
+
+from docker.src.common.versions import install, resolve, use
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+def mock_urlretrieve(tmp_path):
+    """Returns mock urlretrieve() that writes a dummy binary or zip archive"""
+
+    def urlretrieve(url):
+        path = str(tmp_path / f"download-{os.path.basename(url)}")
+        if url.endswith(".zip"):
+            with zipfile.ZipFile(path, "w") as zip:
+                zip.writestr("terraform", "#!/bin/sh\n")
+        else:
+            with open(path, "w") as f:
+                f.write("#!/bin/sh\n")
+        return path, None
+
+    return urlretrieve
+
+
+def test_install_and_use(tmp_path):
+    """
+    Ensures install() only downloads versions that are not pre-installed and
+    that use() links the pre-installed binaries without any downloads
+    """
+    cache_dir = str(tmp_path / "cache")
+    bin_dir = str(tmp_path / "bin")
+
+    with patch(
+        "docker.src.common.versions.urllib.request.urlretrieve",
+        side_effect=mock_urlretrieve(tmp_path),
+    ) as mock_download, patch(
+        "docker.src.common.versions.get_latest_version", return_value="1.3.1"
+    ):
+        install("terraform", "1.3.0", cache_dir)
+        install("terraform", "latest", cache_dir)
+        install("terragrunt", "v0.31.0", cache_dir)
+        install("terraform", "1.3.0", cache_dir)
+        assert mock_download.call_count == 3
+
+        assert use("terraform", "latest", cache_dir, bin_dir)
+        assert os.readlink(os.path.join(bin_dir, "terraform")) == resolve(
+            "terraform", "1.3.1", cache_dir
+        )
+        assert use("terraform", "1.3.0", cache_dir, bin_dir)
+        assert os.readlink(os.path.join(bin_dir, "terraform")) == resolve(
+            "terraform", "1.3.0", cache_dir
+        )
+        assert use("terragrunt", "0.31.0", cache_dir, bin_dir)
+        assert not use("terragrunt", "latest", cache_dir, bin_dir)
+        assert not use("terraform", "1.2.0", cache_dir, bin_dir)
+
+        assert mock_download.call_count == 3
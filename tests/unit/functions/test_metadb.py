@@ -0,0 +1,99 @@
+import os
+import logging
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from functions.common_lambda.metadb import Session, migrate
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+@patch.dict(os.environ, {"METADB_NAME": "mock-db"})
+@patch("functions.common_lambda.metadb.aurora_data_api.connect")
+def test_session_transaction(mock_connect):
+    """
+    Ensures the session reuses one connection, joins nested transactions into
+    the outermost transaction and records every statement's duration
+    """
+    conn = mock_connect.return_value
+    session = Session(MagicMock())
+
+    with session.transaction() as cur:
+        cur.execute("SELECT 1")
+        with session.transaction() as nested_cur:
+            nested_cur.execute("UPDATE executions SET status = 'running'")
+        assert conn.commit.call_count == 0
+
+    assert conn.commit.call_count == 1
+    assert conn.cursor.call_count == 1
+
+    with pytest.raises(ValueError):
+        with session.transaction() as cur:
+            cur.executemany("INSERT INTO executions VALUES (:id)", [{"id": "run-1"}])
+            raise ValueError("mock error")
+
+    assert conn.rollback.call_count == 1
+    assert conn.commit.call_count == 1
+    mock_connect.assert_called_once()
+    assert mock_connect.call_args.kwargs["database"] == "mock-db"
+
+    assert [timing["statement"] for timing in session.timings] == [
+        "SELECT 1",
+        "UPDATE executions SET status = 'running'",
+        "INSERT INTO executions VALUES (:id)",
+    ]
+    assert all(timing["duration_ms"] >= 0 for timing in session.timings)
+
+    session.log_timings()
+    assert session.timings == []
+
+
+class FakeCursor:
+    """Cursor that applies `schema_migrations` inserts to the shared version list"""
+
+    def __init__(self, versions: list, statements: list):
+        self.versions = versions
+        self.statements = statements
+        self.result = None
+
+    def execute(self, operation, parameters=None):
+        self.statements.append(operation)
+        if "MAX(" in operation:
+            self.result = (max(self.versions, default=0),)
+        elif "INSERT INTO schema_migrations" in operation:
+            self.versions.append(parameters["version"])
+
+    def fetchone(self):
+        return self.result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def test_migrate(tmp_path):
+    """
+    Ensures migrate() only applies migrations newer than the schema version
+    and only reads the schema version once the schema is up to date
+    """
+    for filename in ["0001_foo.sql", "0002_bar.sql", "0010_baz.sql", "README.md"]:
+        with open(tmp_path / filename, "w") as f:
+            f.write(f"-- {filename}")
+
+    versions = [1]
+    statements = []
+    conn = MagicMock()
+    conn.cursor.side_effect = lambda: FakeCursor(versions, statements)
+
+    assert migrate(conn, str(tmp_path)) == [2, 10]
+    assert "-- 0001_foo.sql" not in statements
+    assert statements.index("-- 0002_bar.sql") < statements.index("-- 0010_baz.sql")
+    assert conn.commit.call_count == 1
+
+    statements.clear()
+    assert migrate(conn, str(tmp_path)) == []
+    assert len(statements) == 1
@@ -0,0 +1,77 @@
+import logging
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from functions.common_lambda.ssm_cache import ParameterCache
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+def mock_get_parameters(Names, WithDecryption):
+    return {
+        "Parameters": [
+            {"Name": name, "Value": f"{name}-value"}
+            for name in Names
+            if name != "missing"
+        ],
+        "InvalidParameters": [name for name in Names if name == "missing"],
+    }
+
+
+@patch("functions.common_lambda.ssm_cache.time.monotonic")
+def test_parameter_cache(mock_monotonic):
+    """
+    Ensures the cache fetches its parameters within one batched call, only
+    refreshes expired parameters and never caches parameters with a TTL of 0
+    """
+    mock_monotonic.return_value = 0
+    ssm = MagicMock()
+    ssm.get_parameters.side_effect = mock_get_parameters
+    cache = ParameterCache(
+        ssm, ["token", "secret", None], ttl=60, ttls={"merge-lock": 0, None: 0}
+    )
+
+    assert cache.get("token") == "token-value"
+    assert cache.get("secret") == "secret-value"
+    ssm.get_parameters.assert_called_once_with(
+        Names=["token", "secret"], WithDecryption=True
+    )
+
+    # the merge lock isn't fetched along with the other parameters and is
+    # fetched every time it's requested
+    assert cache.get("merge-lock") == "merge-lock-value"
+    assert cache.get("merge-lock") == "merge-lock-value"
+    assert ssm.get_parameters.call_count == 3
+    assert ssm.get_parameters.call_args.kwargs["Names"] == ["merge-lock"]
+
+    mock_monotonic.return_value = 60
+    assert cache.get("secret") == "secret-value"
+    assert ssm.get_parameters.call_args.kwargs["Names"] == ["secret", "token"]
+    assert cache.get("token") == "token-value"
+    assert ssm.get_parameters.call_count == 4
+
+    assert (cache.hits, cache.misses) == (2, 4)
+    cache.log_metrics()
+    assert (cache.hits, cache.misses) == (0, 0)
+
+    with pytest.raises(KeyError):
+        cache.get("missing")
+
+
+def test_parameter_cache_batch_size():
+    """Ensures the cache splits its parameters into GetParameters sized batches"""
+    ssm = MagicMock()
+    ssm.get_parameters.side_effect = mock_get_parameters
+    names = [f"param-{i}" for i in range(25)]
+    cache = ParameterCache(ssm, names, ttl=60)
+
+    assert cache.get("param-24") == "param-24-value"
+    assert [len(c.kwargs["Names"]) for c in ssm.get_parameters.call_args_list] == [
+        10,
+        10,
+        5,
+    ]
+    assert all(cache.get(name) == f"{name}-value" for name in names)
+    assert ssm.get_parameters.call_count == 3
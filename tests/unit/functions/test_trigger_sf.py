@@ -1,6 +1,8 @@
 import os
+import json
+import time
 import logging
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
 import pytest
 import aurora_data_api
@@ -107,8 +109,9 @@ def test_abort_commit_records():
         assert len(in_progress_ids) == 0
 
 
+@pytest.mark.parametrize("concurrency", ["2", "0"])
 @mock_stepfunctions
-def test_abort_sf_executions():
+def test_abort_sf_executions(concurrency):
     execution_id = "run-123"
     sf = boto3.client("stepfunctions")
 
@@ -121,6 +124,9 @@ def test_abort_sf_executions():
     execution_arn = sf.start_execution(stateMachineArn=machine_arn, name=execution_id)[
         "executionArn"
     ]
+    sibling_arn = sf.start_execution(stateMachineArn=machine_arn, name="run-456")[
+        "executionArn"
+    ]
 
     execution = lambda_function.ExecutionFinished(
         execution_id=execution_id,
@@ -131,13 +137,14 @@ def test_abort_sf_executions():
         account_id="123456789012",
     )
 
-    with patch.dict(os.environ, {"STATE_MACHINE_ARN": machine_arn}):
-        # TODO: figure out how mock sf client with moto client to allow module-scope client in lambda file
-        with patch("boto3.client") as mock_sf:
-            mock_sf.return_value = sf
-            execution.abort_sf_executions([execution_id])
+    with patch.dict(
+        os.environ,
+        {"STATE_MACHINE_ARN": machine_arn, "SF_STOP_CONCURRENCY": concurrency},
+    ), patch.object(lambda_function, "sf", sf):
+        execution.abort_sf_executions([execution_id, "run-456", "run-missing"])
 
     assert sf.describe_execution(executionArn=execution_arn)["status"] == "ABORTED"
+    assert sf.describe_execution(executionArn=sibling_arn)["status"] == "ABORTED"
 
 
 @pytest.mark.usefixtures("aws_credentials", "truncate_executions", "setup_metadb")
@@ -209,6 +216,84 @@ def test_handle_failed_execution_is_rollback():
         execution.handle_failed_execution()
 
 
+@patch("functions.trigger_sf.lambda_function.sf")
+@patch.object(
+    lambda_function, "check_executions_running", side_effect=Exception("mock error")
+)
+@patch.dict(os.environ, {"STATE_MACHINE_ARN": "mock"})
+@pytest.mark.usefixtures("aws_credentials", "truncate_executions")
+def test_lambda_handler_keeps_finished_status(mock_running, mock_sf):
+    """
+    Ensures the finished execution's status and the aborted records are
+    committed and their Step Function executions are stopped even if the
+    transaction that schedules the next executions is rolled back
+    """
+    commit_id = "test-commit"
+    insert_records(
+        "executions",
+        [
+            {
+                "execution_id": "run-123",
+                "status": "running",
+                "is_rollback": False,
+                "commit_id": commit_id,
+                "cfg_path": "dev/foo",
+            },
+            {
+                "execution_id": "run-bar",
+                "status": "running",
+                "is_rollback": False,
+                "commit_id": commit_id,
+                "cfg_path": "dev/bar",
+            },
+        ],
+        enable_defaults=True,
+    )
+    event = {
+        "execution": {
+            "output": json.dumps(
+                {
+                    "execution_id": "run-123",
+                    "status": "failed",
+                    "is_rollback": False,
+                    "commit_id": commit_id,
+                    "cfg_path": "dev/foo",
+                }
+            )
+        }
+    }
+    context = MagicMock(
+        invoked_function_arn="arn:aws:lambda:us-west-2:123456789012:function:mock"
+    )
+
+    with patch.object(
+        lambda_function.ExecutionFinished, "send_commit_status"
+    ) as mock_send_commit_status:
+        res = lambda_function.lambda_handler(event, context)
+
+    assert res["statusCode"] == 500
+    assert mock_running.call_count == 1
+    mock_sf.stop_execution.assert_called_once()
+    assert mock_sf.stop_execution.call_args.kwargs["executionArn"].endswith(":run-bar")
+    mock_send_commit_status.assert_called_once()
+
+    with aurora_data_api.connect(
+        database=os.environ["METADB_NAME"], rds_data_client=rds_data_client
+    ) as conn, conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT execution_id, status
+            FROM executions
+            WHERE commit_id = '{commit_id}'
+            ORDER BY execution_id
+            """
+        )
+        assert [tuple(r) for r in cur.fetchall()] == [
+            ("run-123", "failed"),
+            ("run-bar", "aborted"),
+        ]
+
+
 @patch.dict(os.environ, {"STATE_MACHINE_ARN": "mock"})
 @pytest.mark.usefixtures("aws_credentials", "truncate_executions")
 @pytest.mark.parametrize(
@@ -374,6 +459,326 @@ def test_start_executions(mock_sf, records, expected_running_ids):
     assert mock_sf.start_execution.call_count == len(expected_running_ids)
 
 
+@pytest.mark.usefixtures("aws_credentials", "truncate_executions")
+@patch("functions.trigger_sf.lambda_function.sf")
+@patch.dict(
+    os.environ,
+    {"GITHUB_MERGE_LOCK_SSM_KEY": "mock-key", "STATE_MACHINE_ARN": "mock"},
+)
+def test_start_executions_failed_start(mock_sf):
+    """
+    Test to ensure that the ready executions are started concurrently and
+    that executions that fail to start are set back to waiting
+    """
+    mock_sf.exceptions.ExecutionAlreadyExists = type(
+        "ExecutionAlreadyExists", (Exception,), {}
+    )
+
+    def start_execution(name, **kwargs):
+        if name == "run-bar":
+            raise Exception("mock start error")
+        if name == "run-baz":
+            raise mock_sf.exceptions.ExecutionAlreadyExists()
+
+    mock_sf.start_execution.side_effect = start_execution
+    insert_records(
+        "executions",
+        [
+            {
+                "execution_id": f"run-{name}",
+                "cfg_path": f"dev/{name}",
+                "cfg_deps": [],
+                "account_name": "dev",
+                "account_deps": [],
+                "status": "waiting",
+                "is_rollback": False,
+                "commit_id": "test-commit",
+            }
+            for name in ["foo", "bar", "baz"]
+        ],
+        enable_defaults=True,
+    )
+
+    with pytest.raises(lambda_function.ServerException):
+        lambda_function.start_sf_executions()
+
+    with aurora_data_api.connect(
+        database=os.environ["METADB_NAME"], rds_data_client=rds_data_client
+    ) as conn, conn.cursor() as cur:
+        cur.execute("SELECT execution_id, status FROM executions")
+        res = dict(cur.fetchall())
+
+    log.debug(f"Actual: {res}")
+    assert res == {"run-foo": "running", "run-bar": "waiting", "run-baz": "running"}
+    assert mock_sf.start_execution.call_count == 3
+
+
+@pytest.mark.usefixtures("aws_credentials", "truncate_executions")
+def test_get_target_execution_ids_multiple_commits():
+    """
+    Ensures get_target_execution_ids() errors if executions of more than one
+    commit are waiting even if only one of the commits has ready executions
+    """
+    insert_records(
+        "executions",
+        [
+            {
+                "execution_id": "run-foo",
+                "cfg_path": "dev/foo",
+                "cfg_deps": [],
+                "status": "waiting",
+                "is_rollback": False,
+                "commit_id": "commit-1",
+            },
+            {
+                "execution_id": "run-bar",
+                "cfg_path": "dev/bar",
+                "cfg_deps": [],
+                "status": "running",
+                "is_rollback": False,
+                "commit_id": "commit-2",
+            },
+            {
+                "execution_id": "run-baz",
+                "cfg_path": "dev/baz",
+                "cfg_deps": ["dev/bar"],
+                "status": "waiting",
+                "is_rollback": False,
+                "commit_id": "commit-2",
+            },
+        ],
+        enable_defaults=True,
+    )
+
+    with pytest.raises(
+        aurora_data_api.exceptions.DatabaseError,
+        match="More than one commit ID is waiting",
+    ):
+        with lambda_function.metadb.transaction() as cur:
+            cur.execute("SELECT get_target_execution_ids()")
+
+
+@pytest.mark.parametrize("count", [10, 500, 5000])
+@pytest.mark.usefixtures("aws_credentials", "truncate_executions")
+def test_incremental_scheduler_benchmark(count):
+    """
+    Benchmarks the incremental get_target_execution_ids() against the
+    original function that compares every waiting execution with the entire
+    commit and ensures both return the same ready executions
+    """
+    with open(
+        os.path.join(
+            os.path.dirname(lambda_function.__file__),
+            "sql/migrations/0001_get_target_execution_ids.sql",
+        )
+    ) as f:
+        legacy_sql = f.read().replace(
+            "get_target_execution_ids()", "legacy_get_target_execution_ids()"
+        )
+
+    with lambda_function.metadb.transaction() as cur:
+        cur.execute(legacy_sql)
+        # binary tree of directories where the executions of one account
+        # also depend on every execution of another account
+        cur.execute(
+            f"""
+            INSERT INTO executions (
+                execution_id, commit_id, is_rollback, cfg_path, cfg_deps,
+                account_name, account_deps, "status"
+            )
+            SELECT
+                'run-' || i,
+                'bench-commit',
+                false,
+                'dir-' || i,
+                CASE WHEN i = 0 THEN ARRAY[]::TEXT[] ELSE ARRAY['dir-' || ((i - 1) / 2)] END,
+                'account-' || (i % 5),
+                CASE WHEN i % 5 = 4 THEN ARRAY['account-3'] ELSE ARRAY[]::TEXT[] END,
+                'waiting'
+            FROM generate_series(0, {count - 1}) AS i
+            """
+        )
+
+    def get_ready(function):
+        with lambda_function.metadb.transaction() as cur:
+            start = time.perf_counter()
+            cur.execute(f"SELECT {function}()")
+            duration = time.perf_counter() - start
+            return sorted(cur.fetchone()[0] or []), duration
+
+    start = time.perf_counter()
+    ready, _ = get_ready("get_target_execution_ids")
+    init_duration = time.perf_counter() - start
+
+    incremental_duration = 0
+    legacy_duration = 0
+    completions = 0
+    while len(ready) > 0 and completions < 20:
+        with lambda_function.metadb.transaction() as cur:
+            cur.execute(
+                f"UPDATE executions SET \"status\" = 'succeeded' WHERE execution_id = '{ready[0]}'"
+            )
+        completions += 1
+
+        ready, duration = get_ready("get_target_execution_ids")
+        incremental_duration += duration
+        expected, duration = get_ready("legacy_get_target_execution_ids")
+        legacy_duration += duration
+
+        assert ready == expected
+
+    log.info(
+        f"Executions: {count} -- Completions: {completions} -- Init duration: {init_duration:.4f}s -- Incremental duration: {incremental_duration:.4f}s -- Legacy duration: {legacy_duration:.4f}s"
+    )
+
+    assert completions > 0
+    if count >= 5000:
+        assert incremental_duration < legacy_duration
+
+
+@pytest.mark.parametrize(
+    "query,expected_index",
+    [
+        pytest.param(
+            "SELECT 1 FROM executions WHERE status IN ('waiting', 'running') LIMIT 1",
+            "executions_active_idx",
+            id="check_executions_running",
+        ),
+        pytest.param(
+            """
+            UPDATE executions
+            SET "status" = 'aborted'
+            WHERE "status" IN ('waiting', 'running')
+            AND commit_id = 'commit-1'
+            AND is_rollback = false
+            """,
+            "executions_active_idx",
+            id="abort_commit_records",
+        ),
+        pytest.param(
+            "SELECT cfg_path FROM executions WHERE cfg_deps @> ARRAY['dir-1']",
+            "executions_cfg_deps_idx",
+            id="rollback_cfg_deps",
+        ),
+        pytest.param(
+            "SELECT cfg_path FROM executions WHERE commit_id = 'commit-1' AND is_rollback = true",
+            "executions_commit_idx",
+            id="commit_executions",
+        ),
+        pytest.param(
+            "SELECT execution_id FROM executions WHERE \"status\" = 'waiting' AND unmet_deps = 0",
+            "executions_ready_idx",
+            id="ready_executions",
+        ),
+    ],
+)
+@pytest.mark.usefixtures("aws_credentials", "truncate_executions")
+def test_executions_indexes(query, expected_index):
+    """Ensures the query plans of the scheduling queries use the executions indexes"""
+    with lambda_function.metadb.transaction() as cur:
+        # mostly finished executions with one active commit
+        cur.execute(
+            """
+            INSERT INTO executions (
+                execution_id, commit_id, is_rollback, cfg_path, cfg_deps,
+                account_name, account_deps, "status", unmet_deps
+            )
+            SELECT
+                'run-' || i,
+                'commit-' || (i / 10),
+                false,
+                'dir-' || (i % 10),
+                ARRAY['dir-' || ((i % 10) / 2)],
+                'account-' || (i % 5),
+                ARRAY[]::TEXT[],
+                CASE WHEN i < 10 THEN 'waiting' ELSE 'succeeded' END,
+                CASE WHEN i < 10 THEN 0 END
+            FROM generate_series(0, 1999) AS i
+            """
+        )
+        cur.execute("ANALYZE executions")
+
+    with lambda_function.metadb.transaction() as cur:
+        # the planner may prefer sequential scans over small tables so they're
+        # disabled to ensure the query is able to use the index
+        cur.execute("SET LOCAL enable_seqscan = off")
+        cur.execute(f"EXPLAIN (FORMAT JSON) {query}")
+        plan = str(cur.fetchall())
+
+    log.debug(f"Query plan: {plan}")
+    assert expected_index in plan
+
+
+@pytest.mark.usefixtures("aws_credentials", "truncate_executions")
+@patch.dict(os.environ, {"METADB_EXECUTIONS_RETENTION_DAYS": "30"})
+def test_archive_executions():
+    """
+    Ensures only the executions of commits that finished before the retention
+    period are moved into the executions_archive table
+    """
+    insert_records(
+        "executions",
+        [
+            {"execution_id": "run-old", "commit_id": "old", "status": "succeeded"},
+            {"execution_id": "run-old-failed", "commit_id": "old", "status": "failed"},
+            {
+                "execution_id": "run-recent",
+                "commit_id": "recent",
+                "status": "succeeded",
+            },
+            {
+                "execution_id": "run-active",
+                "commit_id": "active",
+                "status": "succeeded",
+            },
+            {
+                "execution_id": "run-active-2",
+                "commit_id": "active",
+                "status": "waiting",
+            },
+        ],
+        enable_defaults=True,
+    )
+
+    with lambda_function.metadb.transaction() as cur:
+        cur.execute("TRUNCATE executions_archive")
+        cur.execute(
+            """
+            UPDATE executions
+            SET finished_at = CURRENT_TIMESTAMP - INTERVAL '60 days'
+            WHERE commit_id IN ('old', 'active')
+            """
+        )
+        cur.execute(
+            """
+            UPDATE executions
+            SET finished_at = CURRENT_TIMESTAMP - INTERVAL '1 day'
+            WHERE commit_id = 'recent'
+            """
+        )
+
+    assert lambda_function.archive_executions() == 2
+
+    with lambda_function.metadb.transaction() as cur:
+        cur.execute("SELECT execution_id FROM executions ORDER BY execution_id")
+        remaining = [r[0] for r in cur.fetchall()]
+        cur.execute(
+            """
+            SELECT execution_id, commit_id, "status"
+            FROM executions_archive
+            ORDER BY execution_id
+            """
+        )
+        archived = [tuple(r) for r in cur.fetchall()]
+        cur.execute("TRUNCATE executions_archive")
+
+    assert remaining == ["run-active", "run-active-2", "run-recent"]
+    assert archived == [
+        ("run-old", "old", "succeeded"),
+        ("run-old-failed", "old", "failed"),
+    ]
+
+
 # TODO: Put into integration test where function is runned within container
 @pytest.mark.parametrize(
     "records,expect_unlocked_merge_lock",
@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import fnmatch
+import logging
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from functions.webhook_receiver.utils import PathTrie
+from docker.src.common.github_client import GitHubClient
+from tests.helpers.github_server import FakeGitHub
+
+log = logging.getLogger(__name__)
+stream = logging.StreamHandler(sys.stdout)
+log.addHandler(stream)
+log.setLevel(logging.DEBUG)
+
+
+def test_path_trie_group():
+    """
+    Ensures PathTrie.group() only maps the .hcl/.tf files to the account paths
+    that contain them including nested account paths
+    """
+    trie = PathTrie(["dev", "dev/nested", "prod"])
+
+    actual = trie.group(
+        [
+            "dev/foo/terragrunt.hcl",
+            "dev/foo/main.tf",
+            "dev/main.tf",
+            "dev/nested/bar/main.tf",
+            "dev/foo/README.md",
+            "prod-other/foo/main.tf",
+            "prod",
+            "staging/foo/main.tf",
+        ]
+    )
+
+    assert {path: sorted(dirs) for path, dirs in actual.items()} == {
+        "dev": ["dev", "dev/foo", "dev/nested/bar"],
+        "dev/nested": ["dev/nested/bar"],
+    }
+
+
+@pytest.mark.parametrize("file_count", [1000, 10000])
+@pytest.mark.parametrize("account_count", [15, 100])
+def test_path_trie_benchmark(file_count, account_count):
+    """
+    Benchmarks PathTrie.group() against matching every file with every
+    account's fnmatch globs
+    """
+    account_paths = [f"account-{i}" for i in range(account_count)]
+    filenames = [
+        f"account-{i % account_count}/region-{i % 3}/dir-{i}/{'main.tf' if i % 2 else 'terragrunt.hcl'}"
+        for i in range(file_count)
+    ]
+
+    start = time.perf_counter()
+    trie = PathTrie(account_paths)
+    actual = trie.group(filenames)
+    trie_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = {}
+    for path in account_paths:
+        dirs = set(
+            os.path.dirname(filename)
+            for filename in filenames
+            if fnmatch.fnmatch(filename, f"{path}/**.hcl")
+            or fnmatch.fnmatch(filename, f"{path}/**.tf")
+        )
+        if len(dirs) > 0:
+            expected[path] = sorted(dirs)
+    fnmatch_duration = time.perf_counter() - start
+
+    log.info(
+        f"Files: {file_count} -- Accounts: {account_count} -- Trie duration: {trie_duration:.4f}s -- fnmatch duration: {fnmatch_duration:.4f}s"
+    )
+
+    assert {path: sorted(dirs) for path, dirs in actual.items()} == expected
+    assert trie_duration < fnmatch_duration
+
+
+@patch.dict(
+    os.environ,
+    {
+        "GITHUB_TOKEN": "mock-token",
+        "AWS_REGION": "us-west-2",
+        "ECS_CLUSTER_ARN": "mock-cluster",
+        "ECS_NETWORK_CONFIG": "{}",
+        "PR_PLAN_TASK_DEFINITION_ARN": "mock-task-def",
+        "PR_PLAN_TASK_CONTAINER_NAME": "mock-container",
+        "ACCOUNT_DIM": json.dumps(
+            [
+                {"path": "dev", "plan_role_arn": "dev-plan-role"},
+                {"path": "prod", "plan_role_arn": "prod-plan-role"},
+            ]
+        ),
+    },
+)
+@pytest.mark.parametrize(
+    "concurrency,expected_max_active",
+    [
+        pytest.param("5", 5, id="concurrent"),
+        pytest.param("0", 1, id="misconfigured"),
+    ],
+)
+def test_trigger_pr_plan_concurrent_launches(concurrency, expected_max_active):
+    """
+    Ensures every PR plan task is launched concurrently and each directory's
+    pending commit status is created on the planned head commit
+    """
+    from functions.webhook_receiver import invoker
+
+    os.environ["PR_PLAN_LAUNCH_CONCURRENCY"] = concurrency
+
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def mock_run_task(**kwargs):
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return {"tasks": [{"taskArn": "arn:aws:ecs:us-west-2:123:task/cluster/id"}]}
+
+    paths = [f"dev/dir-{i}" for i in range(10)] + [f"prod/dir-{i}" for i in range(5)]
+    with FakeGitHub() as server, patch.object(invoker, "ecs") as mock_ecs, patch.object(
+        invoker,
+        "get_client",
+        return_value=GitHubClient("mock-token", base_url=server.url),
+    ):
+        # the branch moved on to a newer commit while the tasks were launched
+        server.branches[("user/repo", "feature")] = "def456"
+        server.pull_files[("user/repo", 1)] = [f"{path}/main.tf" for path in paths]
+        mock_ecs.run_task.side_effect = mock_run_task
+        mock_ecs.describe_task_definition.return_value = {
+            "taskDefinition": {
+                "containerDefinitions": [
+                    {
+                        "logConfiguration": {
+                            "options": {
+                                "awslogs-group": "mock-group",
+                                "awslogs-stream-prefix": "mock-prefix",
+                            }
+                        }
+                    }
+                ]
+            }
+        }
+        invoker.get_log_options.cache_clear()
+        invoker.get_accounts.cache_clear()
+
+        invoker.trigger_pr_plan(
+            "user/repo", "master", "feature", "abc123", 1, "mock-logs-url", True
+        )
+
+    assert mock_ecs.run_task.call_count == len(paths)
+    assert max_active <= expected_max_active
+    if expected_max_active > 1:
+        assert max_active > 1
+    mock_ecs.describe_task_definition.assert_called_once()
+
+    # the commit is built from the head sha without any branch lookup
+    assert server.count("GET") == 1
+    assert sorted(status["context"] for status in server.statuses) == sorted(
+        f"Plan: {path}" for path in paths
+    )
+    assert all(status["state"] == "pending" for status in server.statuses)
+    assert all(status["sha"] == "abc123" for status in server.statuses)
+
+
+@patch.dict(os.environ, {"GITHUB_TOKEN": "mock-token", "ACCOUNT_DIM": "[]"})
+def test_trigger_pr_plan_truncated_files(caplog):
+    """
+    Ensures a warning is logged if the GitHub API returns less files than the
+    amount of files changed within the PR
+    """
+    from functions.webhook_receiver import invoker
+
+    with FakeGitHub() as server, patch.object(
+        invoker,
+        "get_client",
+        return_value=GitHubClient("mock-token", base_url=server.url),
+    ):
+        server.pull_files[("user/repo", 1)] = ["dev/foo/main.tf"]
+        invoker.get_accounts.cache_clear()
+
+        with caplog.at_level(logging.WARNING):
+            invoker.trigger_pr_plan(
+                "user/repo", "master", "feature", "abc123", 1, "mock-logs-url", True, 1
+            )
+        assert "files were returned" not in caplog.text
+
+        with caplog.at_level(logging.WARNING):
+            invoker.trigger_pr_plan(
+                "user/repo",
+                "master",
+                "feature",
+                "abc123",
+                1,
+                "mock-logs-url",
+                True,
+                3001,
+            )
+        assert "Only 1 of the PR's 3001 files were returned" in caplog.text
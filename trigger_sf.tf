@@ -45,11 +45,15 @@ module "lambda_trigger_sf" {
   ]
 
   environment_variables = {
-    GITHUB_MERGE_LOCK_SSM_KEY    = aws_ssm_parameter.merge_lock.name
-    GITHUB_TOKEN_SSM_KEY         = local.github_token_ssm_key
-    COMMIT_STATUS_CONFIG_SSM_KEY = local.commit_status_config_ssm_key
-    REPO_FULL_NAME               = local.repo_full_name
-    STATE_MACHINE_ARN            = local.state_machine_arn
+    GITHUB_MERGE_LOCK_SSM_KEY        = aws_ssm_parameter.merge_lock.name
+    GITHUB_TOKEN_SSM_KEY             = local.github_token_ssm_key
+    COMMIT_STATUS_CONFIG_SSM_KEY     = local.commit_status_config_ssm_key
+    REPO_FULL_NAME                   = local.repo_full_name
+    STATE_MACHINE_ARN                = local.state_machine_arn
+    SF_START_CONCURRENCY             = tostring(var.trigger_sf_start_concurrency)
+    SF_STOP_CONCURRENCY              = tostring(var.trigger_sf_stop_concurrency)
+    SSM_CACHE_TTL                    = tostring(var.lambda_ssm_cache_ttl)
+    METADB_EXECUTIONS_RETENTION_DAYS = var.metadb_executions_retention_days != null ? tostring(var.metadb_executions_retention_days) : ""
 
     PGUSER             = var.metadb_ci_username
     PGPORT             = var.metadb_port
@@ -113,6 +113,20 @@ variable "pr_plan_env_vars" {
   default = []
 }
 
+variable "pr_plan_launch_concurrency" {
+  description = <<EOF
+Maximum number of PR plan ECS tasks the webhook receiver Lambda Function launches at once. The tasks are launched
+concurrently along with their pending commit statuses.
+EOF
+  type        = number
+  default     = 10
+
+  validation {
+    condition     = var.pr_plan_launch_concurrency >= 1
+    error_message = "The PR plan launch concurrency must be at least 1."
+  }
+}
+
 variable "ecs_image_address" {
   description = <<EOF
 Docker registry image to use for the ECS Fargate containers. If not specified, this Terraform module's GitHub registry image
@@ -149,6 +163,29 @@ EOF
   default     = ""
 }
 
+variable "ecs_image_provider_lock_files" {
+  description = <<EOF
+Paths to Terraform lock files (`.terraform.lock.hcl`) whose selected provider versions will be mirrored within the ECS tasks image.
+Tasks install mirrored providers from the local filesystem instead of downloading them on every `terraform init`.
+Only used if `ecs_image_address` is not set.
+EOF
+  type    = list(string)
+  default = []
+}
+
+variable "ecs_image_preinstalled_versions" {
+  description = <<EOF
+Terraform and Terragrunt versions that will be pre-installed within the ECS tasks image in addition to `terraform_version` and `terragrunt_version`.
+Tasks that use a pre-installed version don't download it at startup. The `latest` version resolves to the latest version at the time the image was built.
+Only used if `ecs_image_address` is not set.
+EOF
+  type = object({
+    terraform  = optional(list(string), [])
+    terragrunt = optional(list(string), [])
+  })
+  default = {}
+}
+
 variable "terra_run_env_vars" {
   description = "Environment variables that will be provided for tf plan/apply tasks"
   type = list(object({
@@ -183,11 +220,66 @@ If set to `plan`, the build will use terragrunt run-all plan detected difference
 Set to `plan` if changes to the terraform resources are also being controlled outside of the repository (e.g AWS console, separate CI pipeline, etc.)
 which results in need to refresh the terraform remote state to accurately detect changes.
 Otherwise set to `graph`, given that collecting changes via git will be significantly faster than collecting changes via terragrunt run-all plan.
+If set to `hybrid`, the build will only run terragrunt plan within the directories collected by the `graph` scan and keep the directories with plan differences.
 EOF
   type        = string
   default     = "graph"
 }
 
+variable "create_deploy_stack_account_concurrency" {
+  description = <<EOF
+Maximum number of accounts the create deploy stack task will create deployment stacks for at once.
+Each account runs its own account-level Terragrunt command (e.g. graph dependencies) while its commands that install providers
+share the `create_deploy_stack_path_concurrency` limit. The task runs at most the sum of both values of Terragrunt commands at once.
+EOF
+  type        = number
+  default     = 4
+
+  validation {
+    condition     = var.create_deploy_stack_account_concurrency >= 1
+    error_message = "The create deploy stack account concurrency must be at least 1."
+  }
+}
+
+variable "create_deploy_stack_graph_cache_bucket" {
+  description = <<EOF
+Name of an existing S3 bucket the create_deploy_stack build will cache each Terragrunt directory's dependencies within.
+Entries are keyed by a hash of the directory's HCL files and the files they read (e.g. via `read_terragrunt_config()` or `file()`).
+Directories that read files through paths that can only be resolved by evaluating the configuration are never cached.
+If `create_deploy_stack_graph_deps_extractor` is set to `python`, only directories with changed configurations are re-evaluated.
+If set to `terragrunt`, the `terragrunt graph-dependencies` command is skipped only when every directory is cached and any cache miss
+re-runs it for the entire account path. If not set, the dependencies are collected from scratch on every build.
+EOF
+  type        = string
+  default     = null
+}
+
+variable "create_deploy_stack_graph_deps_extractor" {
+  description = <<EOF
+If set to `terragrunt`, the create_deploy_stack build will use the `terragrunt graph-dependencies` command to collect the directory dependencies.
+If set to `python`, the build will read the `dependency` and `dependencies` blocks of the Terragrunt configurations directly which avoids
+running Terragrunt for the graph scan. Configurations with dependency paths that can only be resolved by evaluating the configuration
+(e.g. interpolated or function based paths) will fall back to the `terragrunt graph-dependencies` command.
+EOF
+  type        = string
+  default     = "terragrunt"
+}
+
+variable "create_deploy_stack_path_concurrency" {
+  description = <<EOF
+Maximum number of Terragrunt directories the create deploy stack task will detect new providers for or plan (`hybrid` scan) at once.
+The limit is shared by every account that's processed at once instead of applying per account.
+Each concurrent Terragrunt command uses its own Terraform provider plugin cache directory given the cache isn't safe for concurrent writes.
+EOF
+  type        = number
+  default     = 4
+
+  validation {
+    condition     = var.create_deploy_stack_path_concurrency >= 1
+    error_message = "The create deploy stack path concurrency must be at least 1."
+  }
+}
+
 variable "ecs_tasks_common_env_vars" {
   description = "Common env vars defined within all ECS tasks. Useful for setting Terragrunt specific env vars required to run Terragrunt commands."
   type = list(object({
@@ -197,6 +289,32 @@ variable "ecs_tasks_common_env_vars" {
   default = []
 }
 
+variable "ecs_tasks_source_clone_mode" {
+  description = <<EOF
+If set to `full`, the ECS tasks will clone the entire source branch.
+If set to `sparse`, the PR plan and terra run tasks will only fetch the latest commit of the branch without file contents (blobless)
+and check out the Terragrunt directory, its parent directory files, its includes, dependencies and local Terraform modules.
+Tasks fall back to a full clone if the directories can only be determined by evaluating the Terragrunt configuration.
+EOF
+  type        = string
+  default     = "full"
+}
+
+variable "ecs_tasks_source_mirror_efs" {
+  description = <<EOF
+Existing EFS file system the ECS tasks will keep a shared mirror of the source repository within.
+Tasks clone the source repository by referencing the mirror's objects and only fetch new objects into the mirror.
+Tasks also keep a shared Terraform provider mirror within the file system that is populated with the source repository's locked providers.
+The file system's mount targets must be reachable from the ECS tasks' subnets and security groups.
+If not set, every task clones the source repository from scratch.
+EOF
+  type = object({
+    file_system_id = string
+    root_directory = optional(string, "/")
+  })
+  default = null
+}
+
 variable "merge_lock_status_check_name" {
   description = "Name of the merge lock GitHub status"
   type        = string
@@ -327,6 +445,34 @@ variable "step_function_name" {
   default     = "deployment-flow"
 }
 
+variable "trigger_sf_start_concurrency" {
+  description = <<EOF
+Maximum number of Step Function executions the trigger Step Function Lambda will start at once when multiple executions are ready.
+Executions that fail to start are set back to `waiting`.
+EOF
+  type        = number
+  default     = 10
+
+  validation {
+    condition     = var.trigger_sf_start_concurrency >= 1
+    error_message = "The trigger Step Function start concurrency must be at least 1."
+  }
+}
+
+variable "trigger_sf_stop_concurrency" {
+  description = <<EOF
+Maximum number of Step Function executions the trigger Step Function Lambda will stop at once when a failed deployment
+aborts the remaining executions of its commit.
+EOF
+  type        = number
+  default     = 10
+
+  validation {
+    condition     = var.trigger_sf_stop_concurrency >= 1
+    error_message = "The trigger Step Function stop concurrency must be at least 1."
+  }
+}
+
 # RDS #
 
 variable "metadb_username" {
@@ -382,6 +528,20 @@ variable "metadb_ci_password" {
   sensitive   = true
 }
 
+variable "metadb_executions_retention_days" {
+  description = <<EOF
+Number of days after a commit's executions finish before they are moved from the metadb executions table into the executions_archive table.
+If null, executions are not archived.
+EOF
+  type        = number
+  default     = null
+
+  validation {
+    condition     = var.metadb_executions_retention_days == null || try(var.metadb_executions_retention_days >= 1, false)
+    error_message = "The metadb executions retention days must be at least 1."
+  }
+}
+
 # LAMBDA #
 
 variable "lambda_approval_request_vpc_config" {
@@ -441,6 +601,15 @@ EOF
   default = null
 }
 
+variable "lambda_ssm_cache_ttl" {
+  description = <<EOF
+Number of seconds the Lambda Functions cache SSM Parameter Store values (e.g. GitHub token, webhook secret) within warm containers.
+The merge lock value is never cached.
+EOF
+  type        = number
+  default     = 300
+}
+
 variable "webhook_receiver_image_address" {
   description = <<EOF
 Docker registry image to use for the webhook receiver Lambda Function. If not specified, this Terraform module's GitHub registry image